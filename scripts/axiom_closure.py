@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Transitive axiom, sorry and unsafe closure over the dependency graph.
+
+Each node in depgraph.json lists only the axioms it uses *directly*. This script
+answers "which axioms does each declaration transitively depend on" for the whole
+project in one pass: a Kahn traversal pushes each finished closure to its
+dependents. If the graph has cycles, strongly connected components are condensed
+first and every component ORs together the closures of its dependencies in
+topological order.
+
+Closures are packed-integer bitsets (bit 0: sorry, bit 1: unsafe, bit 2+k:
+axiom k), so merging a dependency is a single big-int OR regardless of how many
+axioms the project uses.
+
+The output is a per-tool report in the unified format (tool "axiom-closure"), so
+it can be merged with merge_reports.py, and optionally cross-checked against a
+LeanParanoia report.
+
+Usage:
+    python scripts/axiom_closure.py \
+        --depgraph depgraph.json \
+        --out axiom_closure.json \
+        [--allowed-axioms propext,Quot.sound,Classical.choice] \
+        [--paranoia paranoia_report.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from compact_report import load_report
+from depgraph_core import DepGraph
+
+SORRY_BIT = 1
+UNSAFE_BIT = 2
+AXIOM_SHIFT = 2
+
+DEFAULT_ALLOWED_AXIOMS = ["propext", "Quot.sound", "Classical.choice"]
+
+
+def compute_closure(graph: DepGraph) -> Tuple[List[str], List[int]]:
+    """
+    Compute the transitive closure bitset of every vertex.
+
+    Returns (axiom names indexed by bit position - AXIOM_SHIFT, closure per vertex).
+    """
+    axiom_names: List[str] = []
+    axiom_bit: Dict[str, int] = {}
+
+    def bit(name: str) -> int:
+        b = axiom_bit.get(name)
+        if b is None:
+            b = axiom_bit[name] = 1 << (len(axiom_names) + AXIOM_SHIFT)
+            axiom_names.append(name)
+        return b
+
+    own = [0] * graph.vertex_count
+    for v in range(graph.node_count):
+        bits = (SORRY_BIT if graph.has_sorry(v) else 0) | (UNSAFE_BIT if graph.is_unsafe(v) else 0)
+        for a in graph.axioms(v):
+            bits |= bit(a)
+        # An axiom depends on itself, as in `#print axioms`
+        if graph.kind(v) == "axiom":
+            bits |= bit(graph.full_names[v])
+        own[v] = bits
+
+    closure = _propagate_acyclic(graph, own)
+    if closure is None:
+        closure = _propagate_condensed(graph, own)
+    return axiom_names, closure
+
+
+def _propagate_acyclic(graph: DepGraph, own: List[int]) -> Optional[List[int]]:
+    """
+    Single Kahn pass that pushes each finished closure to its dependents.
+
+    Returns None when the graph has a cycle, in which case the partially
+    propagated result is discarded.
+    """
+    offsets, targets = graph.out_offsets, graph.out_targets
+    in_offsets = graph.in_offsets
+    closure = list(own)
+    indegree = [in_offsets[v + 1] - in_offsets[v] for v in range(graph.vertex_count)]
+    queue = [v for v, d in enumerate(indegree) if not d]
+    push = queue.append
+    for v in queue:
+        bits = closure[v]
+        for w in targets[offsets[v]:offsets[v + 1]]:
+            closure[w] |= bits
+            indegree[w] -= 1
+            if not indegree[w]:
+                push(w)
+    return closure if len(queue) == graph.vertex_count else None
+
+
+def _propagate_condensed(graph: DepGraph, own: List[int]) -> List[int]:
+    """Propagate over the SCC condensation; every member of a cycle shares one closure."""
+    comp_of, comp_offsets, members = graph.condensation()
+    in_offsets, in_sources = graph.in_offsets, graph.in_sources
+    closure = [0] * (len(comp_offsets) - 1)
+    for c in range(len(closure)):
+        bits = 0
+        for i in range(comp_offsets[c], comp_offsets[c + 1]):
+            v = members[i]
+            bits |= own[v]
+            for u in in_sources[in_offsets[v]:in_offsets[v + 1]]:
+                bits |= closure[comp_of[u]]
+        closure[c] = bits
+    return [closure[c] for c in comp_of]
+
+
+def decode_axioms(bits: int, axiom_names: List[str]) -> List[str]:
+    """Axiom names set in a closure bitset, sorted."""
+    names = []
+    bits >>= AXIOM_SHIFT
+    while bits:
+        low = bits & -bits
+        names.append(axiom_names[low.bit_length() - 1])
+        bits ^= low
+    return sorted(names)
+
+
+def build_report(graph: DepGraph, axiom_names: List[str], closure: List[int],
+                 allowed: List[str]) -> List[Dict[str, Any]]:
+    """Per-declaration closure records in the unified per-tool format."""
+    allowed_set = set(allowed)
+    decoded: Dict[int, List[str]] = {}
+    records = []
+
+    for v in range(graph.node_count):
+        bits = closure[v]
+        axioms = decoded.get(bits)
+        if axioms is None:
+            axioms = decoded[bits] = decode_axioms(bits, axiom_names)
+
+        has_sorry = bool(bits & SORRY_BIT)
+        is_unsafe = bool(bits & UNSAFE_BIT)
+        disallowed = [a for a in axioms if a not in allowed_set and a != "sorryAx"]
+
+        checks = []
+        problems = []
+        if has_sorry:
+            checks.append("sorry")
+            problems.append("depends on sorry")
+        if disallowed:
+            checks.append("disallowed-axioms")
+            problems.append(f"uses disallowed axioms: {', '.join(disallowed)}")
+        if is_unsafe:
+            checks.append("unsafe")
+            problems.append("depends on unsafe declarations")
+
+        records.append({
+            "decl": graph.full_names[v],
+            "module": graph.module(v),
+            "tool": "axiom-closure",
+            "zone": graph.extra(v).get("zone", "unknown"),
+            "kind": graph.kind(v),
+            "ok": not problems,
+            "checks": checks or ["axiom-closure-pass"],
+            "error": "; ".join(problems) if problems else None,
+            "axioms": axioms,
+            "hasSorry": has_sorry,
+            "isUnsafe": is_unsafe,
+        })
+
+    return records
+
+
+def cross_check(records: List[Dict[str, Any]], paranoia: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Compare closure verdicts with LeanParanoia results on axiom/sorry issues.
+
+    Flags declarations where the closure finds a sorry or disallowed axiom that
+    paranoia passed, and paranoia axiom/sorry failures the closure cannot explain.
+    Differences can also come from zone-specific allowed_axioms in the policy.
+    """
+    by_decl = {r["decl"]: r for r in records}
+    mismatches = []
+    for p in paranoia.get("declarations", paranoia.get("results", [])):
+        closure = by_decl.get(p["decl"])
+        # An axiom's closure contains itself; paranoia judges its users, not the axiom
+        if closure is None or closure["kind"] == "axiom":
+            continue
+        error = (p.get("error") or "").lower()
+        paranoia_flags = "axiom" in error or "sorry" in error
+        closure_flags = "sorry" in closure["checks"] or "disallowed-axioms" in closure["checks"]
+        if p.get("ok") and closure_flags:
+            reason = f"closure: {closure['error']}; paranoia passed"
+        elif not p.get("ok") and paranoia_flags and not closure_flags:
+            reason = f"paranoia: {p.get('error')}; closure found no sorry or disallowed axioms"
+        else:
+            continue
+        mismatches.append({"decl": p["decl"], "reason": reason})
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute transitive axiom/sorry/unsafe closures for every declaration")
+    parser.add_argument("--depgraph", required=True, help="Path to dependency graph JSON")
+    parser.add_argument("--out", required=True, help="Output report JSON path")
+    parser.add_argument("--allowed-axioms", default=",".join(DEFAULT_ALLOWED_AXIOMS),
+                        help="Comma-separated axioms that do not fail a declaration")
+    parser.add_argument("--paranoia", help="LeanParanoia report to cross-check against (optional)")
+
+    args = parser.parse_args()
+
+    depgraph_path = Path(args.depgraph)
+    if not depgraph_path.exists():
+        print(f"Error: Dependency graph not found: {depgraph_path}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    graph = DepGraph.load(depgraph_path)
+    loaded = time.perf_counter()
+    axiom_names, closure = compute_closure(graph)
+    computed = time.perf_counter()
+
+    allowed = [a.strip() for a in args.allowed_axioms.split(",") if a.strip()]
+    records = build_report(graph, axiom_names, closure, allowed)
+
+    output = {
+        "tool": "axiom-closure",
+        "version": "0.1.0",
+        "allowed_axioms": allowed,
+        "axioms": axiom_names,
+        "declarations": records,
+        "summary": {
+            "total": len(records),
+            "passed": sum(1 for r in records if r["ok"]),
+            "failed": sum(1 for r in records if not r["ok"]),
+        },
+    }
+
+    mismatches: Optional[List[Dict[str, Any]]] = None
+    if args.paranoia:
+        mismatches = cross_check(records, load_report(Path(args.paranoia)))
+        output["cross_check"] = {"paranoia_report": Path(args.paranoia).name, "mismatches": mismatches}
+
+    with open(args.out, "w") as f:
+        json.dump(output, f, indent=2)
+
+    print(f"✓ Axiom closure written to {args.out}")
+    print(f"  {graph.node_count} declarations, {graph.edge_count} edges, {len(axiom_names)} distinct axioms")
+    print(f"  Load: {loaded - start:.3f}s, closure: {computed - loaded:.3f}s")
+    print(f"  Declarations: {output['summary']['passed']}/{output['summary']['total']} passed")
+
+    if mismatches is not None:
+        print(f"  Cross-check against paranoia: {len(mismatches)} mismatch(es)")
+        for m in mismatches[:20]:
+            print(f"    ✗ {m['decl']}: {m['reason']}")
+        if mismatches:
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
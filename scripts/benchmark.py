@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the Python side on synthetic projects from 1k to 1M declarations.
+
+For each size, depgraph_synth.py generates a depgraph and checker reports
+(once; they are reused while the parameters are unchanged), and each target
+is run in a fresh process:
+
+    decls_for_zone            paranoia_runner.decls_for_zone for every zone of the policy
+    attach_to_declarations    lean4checker_adapter.attach_to_declarations for all modules
+    merge_reports             merge_reports.py on the three tool reports
+    validate_unified_report   validate_unified_report.py on the merged report
+    embed_data                embed_data.py with the merged report (default options)
+
+Loading the inputs a function takes (the DepGraph, the module results) is not
+part of its time, and is reported as setup. The command-line targets are timed
+end to end, including reading and writing their files. Each run records:
+
+    seconds          median wall time over --repeat runs (each in a new process)
+    setup_seconds    time to load the inputs before the timed part
+    rss_mb           resident memory when the timed part starts
+    peak_rss_mb      peak resident memory during the timed part
+    python_peak_mb   peak Python heap during the timed part, from an extra run
+                     under tracemalloc (skipped with --no-tracemalloc)
+
+Results go to a JSON file together with the commit, Python version, machine
+and generator parameters. --compare puts two result files side by side and
+exits with 1 if a target got slower or bigger by more than --threshold:
+
+    python scripts/benchmark.py --out bench-new.json --compare bench-old.json
+    python scripts/benchmark.py --compare bench-old.json bench-new.json   # no runs
+
+Peak RSS is measured by resetting the kernel's high-water mark
+(/proc/self/clear_refs) before the timed part, so it needs Linux; elsewhere
+peak_rss_mb is the peak of the whole process.
+
+Usage:
+    python scripts/benchmark.py                                   # 1k, 10k, 100k
+    python scripts/benchmark.py --sizes 1k,10k,100k,1m --repeat 5 --out bench.json
+    python scripts/benchmark.py --sizes 100k --targets merge_reports,embed_data --sorry-density 0.05
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from depgraph_synth import add_synth_arguments, ensure, format_count, params_from_args, parse_count
+
+FORMAT_NAME = "leandepviz-benchmark"
+FORMAT_VERSION = 1
+
+SCRIPTS = Path(__file__).resolve().parent
+VIEWER = SCRIPTS.parent / "viewer" / "paranoia-viewer.html"
+TARGETS = ["decls_for_zone", "attach_to_declarations", "merge_reports", "validate_unified_report", "embed_data"]
+DEFAULT_SIZES = "1k,10k,100k"
+
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS = 0.05
+MIN_MB = 10.0
+
+
+# Measurement (in the worker process)
+
+def _status_mb(field: str) -> Optional[float]:
+    """VmRSS / VmHWM of this process in MB (Linux), or None."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak() -> bool:
+    """Reset the peak RSS to the current RSS (Linux 4.0+)."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _max_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _cli(main: Callable[[], Any], argv: List[str]) -> Callable[[], Any]:
+    """Run a script's main() with `argv` as its command line."""
+    def run() -> Any:
+        saved = sys.argv
+        sys.argv = [main.__module__, *argv]
+        try:
+            return main()
+        except SystemExit as e:
+            return e.code
+        finally:
+            sys.argv = saved
+    return run
+
+
+def _merge(data: Path, scratch: Path) -> Callable[[], Any]:
+    import merge_reports
+    return _cli(merge_reports.main, ["--reports", str(data / "paranoia_report.json"), str(data / "kernel_report.json"),
+                                     str(data / "safeverify_report.json"), "--out", str(scratch / "unified_report.json")])
+
+
+def _prepare(target: str, data: Path, scratch: Path) -> Callable[[], Any]:
+    """Load the target's inputs; the function to time."""
+    if target == "decls_for_zone":
+        import yaml
+        from depgraph_core import DepGraph
+        from paranoia_runner import decls_for_zone
+        graph = DepGraph.load(data / "depgraph.json")
+        zones = yaml.safe_load((data / "policy.yaml").read_text())["zones"]
+        return lambda: [decls_for_zone(graph, z["include"], z.get("exclude", [])) for z in zones]
+
+    if target == "attach_to_declarations":
+        from depgraph_core import DepGraph
+        from lean4checker_adapter import attach_to_declarations
+        graph = DepGraph.load(data / "depgraph.json")
+        module_results = json.loads((data / "kernel_modules.json").read_text())
+        return lambda: attach_to_declarations(graph, module_results, False)
+
+    if target == "merge_reports":
+        return _merge(data, scratch)
+
+    # The other targets read the merged report
+    unified = scratch / "unified_report.json"
+    if not unified.exists():
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            _merge(data, scratch)()
+
+    if target == "validate_unified_report":
+        import validate_unified_report
+        return _cli(validate_unified_report.main, ["--report", str(unified)])
+
+    if target == "embed_data":
+        import embed_data
+        return _cli(embed_data.main, ["--viewer", str(VIEWER), "--depgraph", str(data / "depgraph.json"),
+                                      "--report", str(unified), "--output", str(scratch / "report.html")])
+
+    raise ValueError(f"unknown target: {target}")
+
+
+def run_target(target: str, data: Path, scratch: Path, trace: bool) -> Dict[str, Any]:
+    """Time one target in this process (the --run worker)."""
+    scratch.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        fn = _prepare(target, data, scratch)
+    setup = time.perf_counter() - start
+
+    rss = _status_mb("VmRSS")
+    exact_peak = _reset_peak()
+    if trace:
+        tracemalloc.start()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        status = fn()
+        seconds = time.perf_counter() - start
+    # merge_reports exits with 1 because the synthetic reports have failures
+    if target in ("validate_unified_report", "embed_data") and status:
+        sys.exit(f"{target} exited with {status}")
+    result = {"seconds": seconds, "setup_seconds": setup, "rss_mb": rss,
+              "peak_rss_mb": (_status_mb("VmHWM") if exact_peak else None) or _max_rss_mb()}
+    if trace:
+        result["python_peak_mb"] = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return result
+
+
+# Orchestration (in the parent process)
+
+def spawn(target: str, data: Path, scratch: Path, trace: bool) -> Dict[str, Any]:
+    """run_target in a fresh process."""
+    cmd = [sys.executable, str(Path(__file__).resolve()), "--run", target, "--data", str(data), "--scratch", str(scratch)]
+    if trace:
+        cmd.append("--trace")
+    p = subprocess.run(cmd, capture_output=True, text=True)
+    if p.returncode != 0:
+        raise RuntimeError((p.stderr or p.stdout).strip().splitlines()[-1] if (p.stderr or p.stdout).strip()
+                           else f"exit {p.returncode}")
+    return json.loads(p.stdout.strip().splitlines()[-1])
+
+
+def benchmark(target: str, data: Path, scratch: Path, repeat: int, trace: bool) -> Dict[str, Any]:
+    runs = [spawn(target, data, scratch, False) for _ in range(repeat)]
+    result = {
+        "seconds": statistics.median(r["seconds"] for r in runs),
+        "runs": [round(r["seconds"], 6) for r in runs],
+        "setup_seconds": statistics.median(r["setup_seconds"] for r in runs),
+        "rss_mb": max((r["rss_mb"] for r in runs if r["rss_mb"] is not None), default=None),
+        "peak_rss_mb": max(r["peak_rss_mb"] for r in runs),
+    }
+    if trace:
+        result["python_peak_mb"] = spawn(target, data, scratch, True)["python_peak_mb"]
+    return result
+
+
+def git_commit() -> Optional[str]:
+    """HEAD of the repository, with "+dirty" if the tree has changes."""
+    try:
+        head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=SCRIPTS, capture_output=True, text=True, check=True)
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=SCRIPTS,
+                               capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return head.stdout.strip() + ("+dirty" if dirty.stdout.strip() else "")
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float) -> int:
+    """Print both result sets side by side; the number of regressions."""
+    before = {(r["size"], r["target"]): r for r in old["results"]}
+    print(f"Baseline: {old.get('commit') or '?'}  ({old.get('timestamp', '?')})")
+    print(f"Current:  {new.get('commit') or '?'}  ({new.get('timestamp', '?')})")
+    print(f"\n  {'Size':<6}{'Target':<26}{'Seconds':>18}{'Change':>9}{'Peak MB':>20}{'Change':>9}")
+    regressions = 0
+    for r in new["results"]:
+        b = before.get((r["size"], r["target"]))
+        if b is None or "seconds" not in r or "seconds" not in b:
+            continue
+        slower = r["seconds"] > b["seconds"] * (1 + threshold) and r["seconds"] - b["seconds"] > MIN_SECONDS
+        grown = (r["peak_rss_mb"] - (r["rss_mb"] or 0)) - (b["peak_rss_mb"] - (b["rss_mb"] or 0))
+        bigger = grown > MIN_MB and r["peak_rss_mb"] > b["peak_rss_mb"] * (1 + threshold)
+        mark = "✗" if slower or bigger else " "
+        regressions += slower or bigger
+        print(f"{mark} {r['size']:<6}{r['target']:<26}"
+              f"{b['seconds']:>8.3f} → {r['seconds']:<7.3f}{(r['seconds'] / b['seconds'] - 1) * 100 if b['seconds'] else 0:>+8.0f}%"
+              f"{b['peak_rss_mb']:>9.0f} → {r['peak_rss_mb']:<8.0f}"
+              f"{(r['peak_rss_mb'] / b['peak_rss_mb'] - 1) * 100 if b['peak_rss_mb'] else 0:>+8.0f}%")
+    print()
+    if regressions:
+        print(f"✗ {regressions} regression(s) beyond {threshold:.0%}")
+    else:
+        print(f"✓ No regressions beyond {threshold:.0%}")
+    return regressions
+
+
+def load_results(path: Path) -> Dict[str, Any]:
+    with open(path) as f:
+        results = json.load(f)
+    if results.get("format") != FORMAT_NAME:
+        raise ValueError(f"{path} is not a benchmark.py result file")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Python tools on synthetic projects")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma-separated declaration counts, e.g. 1k,10k,100k,1m (default: {DEFAULT_SIZES})")
+    parser.add_argument("--targets", default=",".join(TARGETS),
+                        help=f"Comma-separated targets (default: all of {', '.join(TARGETS)})")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per target and size (default: 3)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip the extra run that measures the Python heap")
+    parser.add_argument("--work-dir", default="benchmark-data",
+                        help="Where generated data and outputs go (default: benchmark-data)")
+    parser.add_argument("--out", default="benchmark-results.json",
+                        help="Results file (default: benchmark-results.json)")
+    parser.add_argument("--compare", nargs="+", metavar="RESULTS",
+                        help="Baseline results to compare with (and, with a second file, the results to compare "
+                             "instead of running)")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Slowdown or memory growth that counts as a regression (default: 0.25)")
+    add_synth_arguments(parser)
+    # Worker mode: one target, one process
+    parser.add_argument("--run", choices=TARGETS, help=argparse.SUPPRESS)
+    parser.add_argument("--data", help=argparse.SUPPRESS)
+    parser.add_argument("--scratch", help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.run:
+        print(json.dumps(run_target(args.run, Path(args.data), Path(args.scratch), args.trace)))
+        return 0
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline and optionally the results to compare with it")
+    if args.compare and len(args.compare) == 2:
+        try:
+            return 1 if compare(load_results(Path(args.compare[0])), load_results(Path(args.compare[1])),
+                                args.threshold) else 0
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
+    try:
+        sizes = [parse_count(s) for s in args.sizes.split(",") if s.strip()]
+    except ValueError:
+        print(f"Error: Not a list of sizes: {args.sizes}", file=sys.stderr)
+        return 1
+    targets = [t.strip() for t in args.targets.split(",") if t.strip()]
+    unknown = [t for t in targets if t not in TARGETS]
+    if unknown:
+        print(f"Error: Unknown target(s): {', '.join(unknown)} (choose from {', '.join(TARGETS)})", file=sys.stderr)
+        return 1
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_results(Path(args.compare[0]))
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+
+    params = params_from_args(args)
+    work_dir = Path(args.work_dir)
+    output = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "timestamp": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "repeat": args.repeat,
+        "results": [],
+    }
+
+    print(f"Benchmarking {len(targets)} target(s) at {len(sizes)} size(s), {args.repeat} run(s) each")
+    print(f"\n  {'Size':<6}{'Target':<26}{'Seconds':>10}{'Setup':>9}{'RSS MB':>9}{'Peak MB':>9}{'Heap MB':>9}")
+    failed = 0
+    for size in sizes:
+        label = format_count(size)
+        data = work_dir / label
+        start = time.perf_counter()
+        synth = ensure(data, {**params, "nodes": size})
+        generated = time.perf_counter() - start
+        if generated > 1:
+            print(f"  {label:<6}(generated {synth['nodes']} declarations, {synth['edges']} edges in {generated:.1f}s)")
+        for target in targets:
+            row = {"size": label, "nodes": synth["nodes"], "edges": synth["edges"], "target": target}
+            try:
+                row.update(benchmark(target, data, data / "scratch", args.repeat, not args.no_tracemalloc))
+            except (RuntimeError, ValueError) as e:
+                row["error"] = str(e)
+                failed += 1
+                print(f"✗ {label:<6}{target:<26}{str(e)[:80]}")
+            else:
+                heap = f"{row['python_peak_mb']:>9.1f}" if "python_peak_mb" in row else f"{'-':>9}"
+                print(f"  {label:<6}{target:<26}{row['seconds']:>10.3f}{row['setup_seconds']:>9.2f}"
+                      f"{row['rss_mb'] or 0:>9.0f}{row['peak_rss_mb']:>9.0f}{heap}")
+            output["results"].append(row)
+            # Written after every target, so a long run that is interrupted keeps what it measured
+            Path(args.out).write_text(json.dumps(output, indent=2) + "\n")
+
+    print(f"\n✓ Results written to {args.out}")
+    if baseline:
+        print()
+        if compare(baseline, output, args.threshold):
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Shared runtime for the checker adapters.
+
+paranoia_runner.py, lean4checker_adapter.py and safeverify_adapter.py each
+run one external checker process per work item (a declaration or a module)
+and turn its output into report rows. This module does everything around that
+process once, for all of them. An adapter only provides a CheckerAdapter: the
+command for an item and a parser for the finished process.
+
+    class MyAdapter(CheckerAdapter):
+        tool = "mychecker"
+        timeout = 120
+
+        def command(self, item):
+            return ["lake", "exe", "mychecker", item]
+
+        def parse(self, item, result):
+            return {"module": item, "ok": result.ok, "error": summarize(result.stderr), "log": result.logs}
+
+    runtime = runtime_from_args(MyAdapter(cwd), args, out_path)
+    outcomes = runtime.run(modules)
+
+The runtime gives every adapter:
+
+- bounded concurrency (--jobs), with processes driven by one asyncio loop
+  instead of a thread per process
+- a slot from the shared resource broker around each process (--broker, see
+  resource_broker.py)
+- timeouts (--timeout) that kill the checker's whole process group
+- cancellation: Ctrl-C kills running checkers instead of leaving them behind
+- retries (--retries) of runs that look transient, such as a checker killed by
+  a signal or a failure to start it (CheckerAdapter.transient)
+- caching (--cache FILE): an adapter whose results depend only on files it can
+  hash returns a cache_key, and the parsed results are reused while the key is
+  unchanged
+- streaming: output is read while the process runs, only the last
+  output_limit characters of each stream are kept, and with --verbose every
+  line is printed as it arrives; on_result is called as each item finishes
+  (the runner's journal uses it)
+- a log store (--log-store, see log_store.py): the full output of every
+  stream is written, compressed and deduplicated, to a content-addressed
+  store next to the report, CheckResult.logs holds the references and
+  write_report() records where the store is; only the logs that parse()
+  puts in its result (under "log" keys) are kept, so passing runs leave
+  nothing behind; --inline-logs keeps the output in the report rows instead
+- direct runs (--direct): `lake exe NAME` is replaced by the binary that
+  lake_exec.py resolved, with Lake's environment, so no run waits for Lake
+- unified_report() for the report every adapter writes
+
+parse() returns whatever the adapter collects per item: report rows, or a
+module result that is mapped to declarations afterwards. It must be JSON
+serializable when caching is used. run() returns the parsed results in the
+order of the items.
+"""
+
+import argparse
+import asyncio
+import codecs
+import hashlib
+import json
+import os
+import random
+import shlex
+import signal
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from compact_report import dump_report
+from lake_exec import DirectLauncher, LakeError, resolve as resolve_executables
+from log_store import DEFAULT_STORE, LogStore, LogWriter, value_refs
+from resource_broker import POLL_SECONDS, ResourceBroker, add_broker_arguments, broker_from_args
+
+DEFAULT_OUTPUT_LIMIT = 64 * 1024
+READ_CHUNK = 64 * 1024
+
+
+class CheckResult:
+    """A finished (or failed to finish) checker process."""
+
+    def __init__(self, cmd: Sequence[str], returncode: Optional[int] = None, stdout: str = "", stderr: str = "",
+                 seconds: float = 0.0, timed_out: bool = False, error: Optional[str] = None,
+                 truncated: bool = False, attempts: int = 1, logs: Optional[Dict[str, str]] = None,
+                 log_writers: Optional[List[LogWriter]] = None):
+        self.cmd = list(cmd)
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.seconds = seconds
+        self.timed_out = timed_out
+        self.error = error  # the process could not be started
+        self.truncated = truncated  # output beyond output_limit was dropped
+        self.attempts = attempts
+        self.logs = logs or {}  # log store reference per non-empty stream ("stdout", "stderr")
+        self.log_writers = log_writers or []  # finished, not yet committed (see CheckerRuntime.keep_logs)
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and self.error is None
+
+    @property
+    def exit(self) -> int:
+        """The exit code as the reports record it (-1 if there was none)."""
+        return -1 if self.returncode is None or self.timed_out else self.returncode
+
+    @property
+    def command(self) -> str:
+        return " ".join(shlex.quote(c) for c in self.cmd)
+
+
+class CheckerAdapter:
+    """How to run one checker: override command() and parse(), and the class attributes."""
+
+    tool = "checker"
+    executable: Optional[str] = None  # the `lake exe` target it runs (for --direct)
+    timeout: Optional[float] = 300  # seconds per item
+    output_limit = DEFAULT_OUTPUT_LIMIT  # characters kept from the end of each stream
+
+    def __init__(self, cwd: Optional[Path] = None):
+        self.cwd = cwd
+
+    def command(self, item: Any) -> List[str]:
+        raise NotImplementedError
+
+    def parse(self, item: Any, result: CheckResult) -> Any:
+        raise NotImplementedError
+
+    def cache_key(self, item: Any) -> Optional[str]:
+        """A key covering everything the result depends on, or None to always run the item."""
+        return None
+
+    def transient(self, result: CheckResult) -> bool:
+        """Whether a failed run is worth retrying (not a timeout or a plain failed check)."""
+        if result.timed_out:
+            return False
+        return result.error is not None or (result.returncode is not None and result.returncode < 0)
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Parsed results by cache key, kept in one JSON file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.entries: Dict[str, Any] = {}
+        if self.path.exists():
+            try:
+                self.entries = json.loads(self.path.read_text())
+            except ValueError:
+                self.entries = {}
+        self.hits = 0
+        self.dirty = False
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, value: Any) -> None:
+        self.entries[key] = value
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, separators=(",", ":")))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+class _Tail:
+    """Decoded output of one stream, keeping only the last `limit` characters."""
+
+    def __init__(self, limit: Optional[int]):
+        self.limit = limit
+        self.parts: List[str] = []
+        self.size = 0
+        self.truncated = False
+
+    def add(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        if self.limit is not None and self.size > 2 * self.limit:
+            self.parts = [self.text()]
+            self.size = len(self.parts[0])
+
+    def text(self) -> str:
+        text = "".join(self.parts)
+        if self.limit is not None and len(text) > self.limit:
+            self.truncated = True
+            text = text[-self.limit:]
+        return text
+
+
+class CheckerRuntime:
+    """Runs an adapter's items with bounded concurrency; see the module docstring."""
+
+    def __init__(self, adapter: CheckerAdapter, jobs: int = 1, broker: Optional[ResourceBroker] = None,
+                 retries: int = 0, cache: Optional[ResultCache] = None,
+                 on_line: Optional[Callable[[Any, str, str], None]] = None,
+                 launcher: Optional[DirectLauncher] = None, log_store: Optional[LogStore] = None):
+        self.adapter = adapter
+        self.jobs = max(1, jobs)
+        self.broker = broker
+        self.retries = retries
+        self.cache = cache
+        self.on_line = on_line  # (item, "stdout" | "stderr", line) for every output line
+        self.launcher = launcher  # runs `lake exe` targets directly (lake_exec.py)
+        self.log_store = log_store  # full output of every stream (log_store.py)
+        self.ran = 0
+        self.spawned = 0
+        self.direct = 0  # processes started without lake exe
+        self.process_seconds = 0.0
+        self.cached = 0
+        self.retried = 0
+
+    def run(self, items: Iterable[Any], on_result: Optional[Callable[[Any, Any], None]] = None) -> List[Any]:
+        """Check every item; the parsed results in item order. `on_result(item, parsed)` is called as each finishes."""
+        items = list(items)
+        try:
+            return asyncio.run(self._run_all(items, on_result))
+        finally:
+            if self.cache:
+                self.cache.save()
+
+    async def _run_all(self, items: List[Any], on_result) -> List[Any]:
+        results: List[Any] = [None] * len(items)
+        queue = iter(enumerate(items))
+
+        async def worker() -> None:
+            for i, item in queue:  # workers share the iterator: at most `jobs` items at a time
+                results[i] = await self._check(item)
+                if on_result:
+                    on_result(item, results[i])
+
+        # Checkers run in their own sessions; on SIGTERM cancel like Ctrl-C so they get killed
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        except (NotImplementedError, RuntimeError):
+            pass
+        workers = [asyncio.ensure_future(worker()) for _ in range(min(self.jobs, len(items)))]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return results
+
+    async def _check(self, item: Any) -> Any:
+        adapter = self.adapter
+        cmd = adapter.command(item)
+        key = None
+        if self.cache:
+            key = adapter.cache_key(item)
+            if key is not None:
+                # Cached rows carry log references, so they are only valid for the same store
+                logs = str(self.log_store.root.resolve()) if self.log_store else "inline"
+                key = hashlib.sha256(json.dumps([adapter.tool, cmd, key, logs]).encode()).hexdigest()
+                hit = self.cache.get(key)
+                if hit is not None and self._logs_exist(hit):
+                    self.cached += 1
+                    return hit
+
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                result = await self._execute(item, cmd)
+            except Exception as e:
+                result = CheckResult(cmd, error=str(e))
+            result.attempts = attempts
+            self.process_seconds += result.seconds
+            if result.ok or attempts > self.retries or not adapter.transient(result):
+                break
+            keep_logs(result, None)
+            self.retried += 1
+            await asyncio.sleep(min(2 ** attempts, 30) * (0.5 + random.random()))
+        self.ran += 1
+
+        parsed = None
+        try:
+            parsed = adapter.parse(item, result)
+        finally:
+            keep_logs(result, parsed)
+        if key is not None and not result.timed_out and result.error is None:
+            self.cache.put(key, parsed)
+        return parsed
+
+    def _logs_exist(self, parsed: Any) -> bool:
+        """Whether the logs a cached result refers to are still in the store (log_store.py gc may remove them)."""
+        if not self.log_store:
+            return True
+        return all(self.log_store.path(ref).exists() for ref in value_refs(parsed))
+
+    async def _execute(self, item: Any, cmd: List[str]) -> CheckResult:
+        request = self.broker.request() if self.broker else None
+        try:
+            if request:
+                while not request.poll():
+                    await asyncio.sleep(POLL_SECONDS * (0.5 + random.random()))
+            return await self._spawn(item, cmd)
+        finally:
+            if request:
+                request.release()
+
+    async def _spawn(self, item: Any, cmd: List[str]) -> CheckResult:
+        # Reports keep the `lake exe` command; with a launcher the binary is started directly
+        run_cmd, env = self.launcher.rewrite(cmd) if self.launcher else (cmd, None)
+        self.spawned += 1
+        self.direct += env is not None
+        start = time.perf_counter()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *run_cmd, cwd=self.adapter.cwd, env=env, stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,  # own process group, so a timeout kills lake's children too
+            )
+        except OSError as e:
+            return CheckResult(cmd, error=str(e), seconds=time.perf_counter() - start)
+
+        tails = {"stdout": _Tail(self.adapter.output_limit), "stderr": _Tail(self.adapter.output_limit)}
+        writers = {name: self.log_store.writer() for name in tails} if self.log_store else {}
+        readers = [asyncio.ensure_future(self._read(item, proc.stdout, "stdout", tails["stdout"], writers.get("stdout"))),
+                   asyncio.ensure_future(self._read(item, proc.stderr, "stderr", tails["stderr"], writers.get("stderr")))]
+        timed_out = False
+        finished = False
+        try:
+            await asyncio.wait_for(asyncio.gather(proc.wait(), *readers), self.adapter.timeout)
+            finished = True
+        except asyncio.TimeoutError:
+            timed_out = finished = True  # the output so far is kept
+        finally:
+            # Timed out or cancelled (Ctrl-C): do not leave the checker running
+            if proc.returncode is None:
+                try:
+                    os.killpg(proc.pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                await proc.wait()
+            for reader in readers:
+                reader.cancel()
+            if not finished:
+                for writer in writers.values():
+                    writer.abort()
+
+        # Committed once parse() shows which logs the rows refer to (keep_logs)
+        logs = {name: writer.finish() for name, writer in writers.items()}
+        stdout, stderr = tails["stdout"].text(), tails["stderr"].text()
+        return CheckResult(cmd, None if timed_out else proc.returncode, stdout, stderr,
+                           seconds=time.perf_counter() - start, timed_out=timed_out,
+                           truncated=tails["stdout"].truncated or tails["stderr"].truncated,
+                           logs={name: ref for name, ref in logs.items() if ref},
+                           log_writers=[writer for writer in writers.values() if writer.ref])
+
+    def describe(self) -> str:
+        """One line on how the checker runs went, for the adapters' output."""
+        parts = [f"{self.ran} checker run(s)"]
+        if self.spawned:
+            # process_seconds covers every attempt, including retries
+            parts[0] += f", {self.process_seconds / self.spawned * 1000:.0f}ms each on average"
+        if self.direct:
+            parts.append("direct" if self.direct == self.spawned else f"{self.direct} direct")
+        else:
+            parts.append("via lake exe")
+        if self.cached:
+            parts.append(f"{self.cached} cached")
+        if self.retried:
+            parts.append(f"{self.retried} retried")
+        return "; ".join(parts)
+
+    async def _read(self, item: Any, stream: asyncio.StreamReader, name: str, tail: _Tail,
+                    writer: Optional[LogWriter]) -> None:
+        pending = ""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")  # chunks may split characters
+        while True:
+            chunk = await stream.read(READ_CHUNK)
+            if writer and chunk:
+                writer.write(chunk)
+            text = decoder.decode(chunk, final=not chunk)
+            tail.add(text)
+            if self.on_line:
+                lines = (pending + text).split("\n")
+                pending = lines.pop()
+                for line in lines:
+                    self.on_line(item, name, line)
+            if not chunk:
+                break
+        if self.on_line and pending:
+            self.on_line(item, name, pending)
+
+
+def keep_logs(result: CheckResult, parsed: Any) -> None:
+    """Commit the logs of a run that the parsed result refers to, and drop the others."""
+    refs = set(value_refs(parsed))
+    for writer in result.log_writers:
+        if writer.ref in refs:
+            writer.commit()
+        else:
+            writer.abort()
+    result.log_writers = []
+
+
+def unified_report(tool: str, declarations: List[Dict[str, Any]], **extra: Any) -> Dict[str, Any]:
+    """A report in the unified format; `extra` adds top-level fields (and "summary" fields via summary=...)."""
+    summary = {
+        "total": len(declarations),
+        "passed": sum(1 for r in declarations if r.get("ok", False)),
+        "failed": sum(1 for r in declarations if not r.get("ok", False)),
+    }
+    summary.update(extra.pop("summary", {}))
+    report = {
+        "tool": tool,
+        "version": "0.1.0",
+        "timestamp": datetime.now().astimezone().isoformat(timespec="seconds"),
+    }
+    report.update(extra)
+    report["declarations"] = declarations
+    report["summary"] = summary
+    return report
+
+
+def write_report(report: Dict[str, Any], path: Path, log_store: Optional[LogStore] = None) -> None:
+    """Write a report as indented JSON (compressed for a .gz/.zst suffix), noting where its logs are."""
+    if log_store:
+        report["log_store"] = os.path.relpath(log_store.root, Path(path).parent)
+    dump_report(report, Path(path))
+
+
+def add_runtime_arguments(parser: argparse.ArgumentParser, tool: str, jobs: int, timeout: float) -> None:
+    """The options every adapter takes: concurrency, timeouts, retries, caching, output and the broker."""
+    parser.add_argument("--jobs", type=int, default=jobs, help=f"Checker processes at a time (default: {jobs})")
+    parser.add_argument("--timeout", type=float, default=timeout,
+                        help=f"Seconds before a checker process is killed (default: {timeout:g})")
+    parser.add_argument("--retries", type=int, default=0,
+                        help="Retry a checker that crashed or could not start this many times (default: 0)")
+    parser.add_argument("--cache", metavar="FILE",
+                        help="Reuse results for items whose inputs are unchanged, kept in FILE")
+    parser.add_argument("--verbose", action="store_true", help="Print checker output as it arrives")
+    parser.add_argument("--direct", nargs="?", const="", metavar="MANIFEST",
+                        help="Run the checker binary directly instead of through lake exe, using a manifest "
+                             "from lake_exec.py (or resolving it now without MANIFEST)")
+    parser.add_argument("--log-store", metavar="DIR",
+                        help=f"Store the full checker output here (default: {DEFAULT_STORE} next to the report)")
+    parser.add_argument("--inline-logs", action="store_true",
+                        help="Keep checker output in the report rows instead of a log store")
+    add_broker_arguments(parser, tool)
+
+
+def runtime_from_args(adapter: CheckerAdapter, args: argparse.Namespace, report: Path) -> CheckerRuntime:
+    """The runtime the options ask for; `report` is where the adapter writes its report (for the log store)."""
+    adapter.timeout = args.timeout or None
+
+    def print_line(item: Any, stream: str, line: str) -> None:
+        print(f"[{item if isinstance(item, str) else adapter.tool}] {line}", file=sys.stderr, flush=True)
+
+    on_line = print_line if args.verbose else None
+    launcher = None
+    if args.direct is not None:
+        try:
+            if args.direct:
+                launcher = DirectLauncher.load(Path(args.direct))
+            else:
+                launcher = DirectLauncher(resolve_executables(adapter.cwd or Path.cwd(), [adapter.executable]))
+        except (LakeError, OSError, ValueError) as e:
+            print(f"Warning: running through lake exe ({e})", file=sys.stderr)
+        else:
+            for name in launcher.stale():
+                print(f"Warning: {name} changed since the manifest was written; running it through lake exe",
+                      file=sys.stderr)
+    return CheckerRuntime(
+        adapter,
+        jobs=args.jobs,
+        broker=broker_from_args(args, adapter.tool),
+        retries=args.retries,
+        cache=ResultCache(Path(args.cache)) if args.cache else None,
+        on_line=on_line,
+        launcher=launcher,
+        log_store=None if args.inline_logs else LogStore(Path(args.log_store or Path(report).parent / DEFAULT_STORE)),
+    )
+
+
+def describe_timeout(seconds: Optional[float]) -> str:
+    """"5 minutes", "60 seconds" etc. for timeout messages."""
+    if seconds is None:
+        return "forever"
+    if seconds >= 60 and seconds % 60 == 0:
+        minutes = int(seconds // 60)
+        return f"{minutes} minute{'s' if minutes != 1 else ''}"
+    return f"{seconds:g} seconds"
@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+Compact dictionary-encoded format for verification reports.
+
+Per-tool and unified reports repeat the same module, zone, tool, check and
+command strings on every declaration. The compact encoding stores those strings
+once in string tables and lays the declaration fields out as columns:
+
+    {
+        "format": "leandepviz-compact",
+        "format_version": 1,
+        "records_key": "declarations",
+        "meta": { ...every top-level field except the declarations... },
+        "tables": {"modules": [...], "zones": [...], "tools": [...], "checks": [...], "cmds": [...], ...},
+        "records": {
+            "length": 1129,
+            "fields": {
+                "decl":   {"enc": "raw",   "values": ["foo", ...]},
+                "module": {"enc": "table", "table": "modules", "values": [0, 0, 3, ...]},
+                "checks": {"enc": "table-list", "table": "checks", "values": [[0], [0, 2], ...]},
+                "tools":  {"enc": "records", "length": ..., "fields": {...}},
+                "notes":  {"enc": "raw", "rows": [4, 17], "values": ["...", "..."]}
+            }
+        }
+    }
+
+A field carries "rows" only when it is absent from some records. Nested objects
+(the per-tool results of a unified report) are encoded recursively.
+
+Any report file may additionally be gzip- or zstd-compressed; loaders detect the
+compression from the file's magic bytes, and writers pick it from the output
+suffix (.gz / .zst).
+
+Usage:
+    # Plain JSON -> compact (gzip-compressed)
+    python scripts/compact_report.py kernel_report.json kernel_report.cjson.gz
+
+    # Compact -> plain JSON
+    python scripts/compact_report.py --expand kernel_report.cjson.gz kernel_report.json
+"""
+
+import argparse
+import gzip
+import io
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_NAME = "leandepviz-compact"
+FORMAT_VERSION = 1
+
+# Top-level keys of a compact report, and how much of a file is_plain_json() reads
+COMPACT_KEYS = ("format", "format_version", "records_key", "meta", "tables", "records")
+HEAD_BYTES = 64 * 1024
+_WHITESPACE = re.compile(r"\s*")
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Fields whose string values are always interned, and the table they go into
+TABLE_FOR_FIELD = {
+    "module": "modules",
+    "zone": "zones",
+    "tool": "tools",
+    "kind": "kinds",
+    "checks": "checks",
+    "cmd": "cmds",
+}
+
+# Other string fields are interned into the shared table when they repeat this much
+SHARED_TABLE = "strings"
+INTERN_MIN_REPEAT = 2
+
+
+def _read_bytes(path: Path) -> bytes:
+    """Read a file, transparently decompressing gzip or zstd content."""
+    data = path.read_bytes()
+    if data.startswith(GZIP_MAGIC):
+        return gzip.decompress(data)
+    if data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd-compressed; install zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data)).read()
+    return data
+
+
+def _write_bytes(path: Path, data: bytes) -> None:
+    """Write a file, compressing according to its suffix (.gz, .zst)."""
+    if path.suffix == ".gz":
+        data = gzip.compress(data, compresslevel=6)
+    elif path.suffix == ".zst":
+        if zstandard is None:
+            raise RuntimeError("Writing .zst requires zstandard (pip install zstandard)")
+        data = zstandard.ZstdCompressor(level=10).compress(data)
+    path.write_bytes(data)
+
+
+def is_compact(data: Dict[str, Any]) -> bool:
+    """Check whether a parsed report uses the compact encoding."""
+    return isinstance(data, dict) and data.get("format") == FORMAT_NAME
+
+
+def is_plain_json(path: Path) -> bool:
+    """
+    Check whether a report file is uncompressed, non-compact JSON.
+
+    Only the first HEAD_BYTES are read, so callers can cheaply decide whether
+    the file can be used verbatim. The top-level keys are decoded in order
+    until the "format" key settles it, or a key that compact reports do not
+    have shows the report is plain; when the head cannot tell, the file is
+    treated as not plain (load_report reads either).
+    """
+    with open(path, "rb") as f:
+        head = f.read(HEAD_BYTES)
+    if head.startswith(GZIP_MAGIC) or head.startswith(ZSTD_MAGIC):
+        return False
+    text = head.decode("utf-8", errors="replace")
+    decoder = json.JSONDecoder()
+    pos = _WHITESPACE.match(text).end()
+    if not text.startswith("{", pos):
+        return True
+    pos += 1
+    while True:
+        pos = _WHITESPACE.match(text, pos).end()
+        if text.startswith("}", pos):
+            return True
+        try:
+            key, pos = decoder.raw_decode(text, pos)
+            pos = _WHITESPACE.match(text, pos).end()
+            if not isinstance(key, str) or not text.startswith(":", pos):
+                return False
+            if key not in COMPACT_KEYS:
+                return True
+            value, pos = decoder.raw_decode(text, _WHITESPACE.match(text, pos + 1).end())
+        except ValueError:
+            return False  # runs past the head
+        if key == "format":
+            return value != FORMAT_NAME
+        pos = _WHITESPACE.match(text, pos).end()
+        if text.startswith(",", pos):
+            pos += 1
+
+
+class _Tables:
+    """String tables being built during encoding."""
+
+    def __init__(self):
+        self.tables: Dict[str, List[Any]] = {}
+        self.index: Dict[str, Dict[Any, int]] = {}
+
+    def intern(self, table: str, value: Any) -> int:
+        index = self.index.setdefault(table, {})
+        idx = index.get(value)
+        if idx is None:
+            idx = index[value] = len(index)
+            self.tables.setdefault(table, []).append(value)
+        return idx
+
+
+def _table_for(field: str, values: List[Any]) -> Optional[str]:
+    """Pick the string table for a scalar column, or None to store it raw."""
+    if not all(v is None or isinstance(v, str) for v in values):
+        return None
+    if field in TABLE_FOR_FIELD:
+        return TABLE_FOR_FIELD[field]
+    if len(values) >= INTERN_MIN_REPEAT * len(set(values)):
+        return SHARED_TABLE
+    return None
+
+
+def _encode_column(field: str, values: List[Any], tables: _Tables) -> Dict[str, Any]:
+    """Encode the present values of one field."""
+    if values and all(isinstance(v, dict) for v in values):
+        return {"enc": "records", **_encode_records(values, tables)}
+
+    if (values and field in TABLE_FOR_FIELD
+            and all(isinstance(v, list) and all(isinstance(x, str) for x in v) for v in values)):
+        table = TABLE_FOR_FIELD[field]
+        return {"enc": "table-list", "table": table,
+                "values": [[tables.intern(table, x) for x in v] for v in values]}
+
+    table = _table_for(field, values)
+    if table is not None:
+        return {"enc": "table", "table": table,
+                "values": [tables.intern(table, v) for v in values]}
+
+    return {"enc": "raw", "values": values}
+
+
+def _encode_records(records: List[Dict[str, Any]], tables: _Tables) -> Dict[str, Any]:
+    """Encode a list of dicts as columns, one per field."""
+    fields: Dict[str, List[int]] = {}
+    for i, record in enumerate(records):
+        for key in record:
+            fields.setdefault(key, []).append(i)
+
+    columns = {}
+    for field, rows in fields.items():
+        column = _encode_column(field, [records[r][field] for r in rows], tables)
+        if len(rows) != len(records):
+            column["rows"] = rows
+        columns[field] = column
+
+    return {"length": len(records), "fields": columns}
+
+
+def _decode_column(column: Dict[str, Any], tables: Dict[str, List[Any]]) -> List[Any]:
+    enc = column["enc"]
+    if enc == "raw":
+        return column["values"]
+    if enc == "table":
+        table = tables[column["table"]]
+        return [table[i] for i in column["values"]]
+    if enc == "table-list":
+        table = tables[column["table"]]
+        return [[table[i] for i in v] for v in column["values"]]
+    if enc == "records":
+        return _decode_records(column, tables)
+    raise ValueError(f"Unknown column encoding: {enc}")
+
+
+def _decode_records(encoded: Dict[str, Any], tables: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    n = encoded["length"]
+    records: List[Dict[str, Any]] = [{} for _ in range(n)]
+    for field, column in encoded["fields"].items():
+        rows = column.get("rows", range(n))
+        for r, value in zip(rows, _decode_column(column, tables)):
+            records[r][field] = value
+    return records
+
+
+def encode_report(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a plain report (per-tool, unified or legacy) to the compact encoding."""
+    if is_compact(report):
+        return report
+
+    records_key = "results" if "results" in report and "declarations" not in report else "declarations"
+    tables = _Tables()
+    records = _encode_records(report.get(records_key, []), tables)
+
+    return {
+        "format": FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "records_key": records_key if records_key in report else None,
+        "meta": {k: v for k, v in report.items() if k != records_key},
+        "tables": tables.tables,
+        "records": records,
+    }
+
+
+def decode_report(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a compact report back to its plain form. Plain reports pass through."""
+    if not is_compact(data):
+        return data
+
+    version = data.get("format_version")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported compact report version: {version}")
+
+    report = dict(data["meta"])
+    if data["records_key"] is not None:
+        report[data["records_key"]] = _decode_records(data["records"], data["tables"])
+    return report
+
+
+def load_report(path: Path) -> Dict[str, Any]:
+    """
+    Load a report in any supported format.
+
+    Accepts plain or compact JSON, optionally gzip/zstd-compressed, and always
+    returns the plain report structure.
+    """
+    return decode_report(json.loads(_read_bytes(Path(path))))
+
+
+def dump_report(report: Dict[str, Any], path: Path, compact: bool = False) -> None:
+    """Write a report as plain (indented) or compact JSON, compressed by suffix."""
+    path = Path(path)
+    if compact:
+        text = json.dumps(encode_report(report), separators=(",", ":"))
+    else:
+        text = json.dumps(decode_report(report), indent=2)
+    _write_bytes(path, text.encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert reports between plain and compact encodings")
+    parser.add_argument("input", help="Report to convert (plain or compact, optionally .gz/.zst)")
+    parser.add_argument("output", help="Output path; a .gz or .zst suffix compresses the result")
+    parser.add_argument("--expand", action="store_true", help="Write plain JSON instead of the compact encoding")
+
+    args = parser.parse_args()
+
+    in_path = Path(args.input)
+    out_path = Path(args.output)
+    if not in_path.exists():
+        print(f"Error: Report not found: {in_path}", file=sys.stderr)
+        return 1
+
+    try:
+        report = load_report(in_path)
+        dump_report(report, out_path, compact=not args.expand)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    in_size = in_path.stat().st_size
+    out_size = out_path.stat().st_size
+    print(f"✓ Wrote {'plain' if args.expand else 'compact'} report to {out_path}")
+    print(f"  Size: {in_size / 1024:.1f}KB → {out_size / 1024:.1f}KB")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Coarsen a dependency graph into a module- or namespace-level overview.
+
+Declarations are collapsed into groups (their module, or their namespace
+prefix), edges between groups are counted into weights, strongly connected
+groups are merged, and the transitive reduction of the result is taken so only
+the edges that are not implied by longer paths remain. The overview is written
+as depgraph JSON and DOT, so embed_data.py and Graphviz handle it like any
+other graph but lay it out in seconds.
+
+Each overview node carries:
+- "members": number of declarations in the group, including edge endpoints
+  that are not nodes of the graph
+- "nameOnly": how many of the members are such endpoints, when there are any
+  (with --by module they all form the "_unknown_" group)
+- "internalEdges": edges between declarations of the same group
+- "groups": the merged group names, when several formed a cycle
+- hasSorry / isUnsafe / axioms aggregated over its declarations
+
+Each edge carries "weight" (declaration-level edges it stands for) and
+"weights" per edge kind; "kind" is "value" if any value edge contributed.
+The transitive reduction adds the weights of each edge it removes to the edges
+of one remaining path between the same groups, so the weights still account
+for every declaration-level edge; "directWeight" then gives the count of edges
+that run directly between the two groups.
+
+Drill down into a group with depgraph_query.py (--module or --namespace).
+
+Usage:
+    python scripts/depgraph_coarsen.py --depgraph depgraph.json \
+        [--by module|namespace] [--depth 2] [--no-reduce] \
+        --json-out overview.json --dot-out overview.dot
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from depgraph_core import DepGraph, depgraph_to_dot
+
+ROOT_GROUP = "_root_"
+UNKNOWN_MODULE = "_unknown_"
+
+
+def namespace_of(full_name: str) -> str:
+    """Namespace part of a declaration name ("A.B.foo" -> "A.B")."""
+    head, _, _ = full_name.rpartition(".")
+    return head or ROOT_GROUP
+
+
+def truncate(name: str, depth: int) -> str:
+    """First `depth` dot-separated components of a name (all of them for depth 0)."""
+    if depth <= 0 or name in (ROOT_GROUP, UNKNOWN_MODULE):
+        return name
+    return ".".join(name.split(".")[:depth])
+
+
+def group_vertices(graph: DepGraph, by: str, depth: int) -> Tuple[List[str], List[int]]:
+    """Assign every vertex to a group; returns (group names, group ID per vertex)."""
+    names: List[str] = []
+    ids: Dict[str, int] = {}
+    group_of = []
+    for v in range(graph.vertex_count):
+        if by == "module":
+            key = graph.module(v) or UNKNOWN_MODULE
+        else:
+            key = namespace_of(graph.full_names[v])
+        key = truncate(key, depth)
+        g = ids.get(key)
+        if g is None:
+            g = ids[key] = len(names)
+            names.append(key)
+        group_of.append(g)
+    return names, group_of
+
+
+def fold_removed_weights(graph: DepGraph, keep: bytearray, by_pair: Dict[Tuple[str, str], Dict[str, Any]]) -> None:
+    """
+    Add the weight of every edge the reduction removes to the kept edges of a path that implies it.
+
+    `graph` is the (acyclic) overview and `keep` its reduction mask; edges are
+    looked up in `by_pair` by (source, target) name. The path follows, from
+    each vertex, the first kept edge whose target still reaches the end.
+    """
+    names = graph.full_names
+    offsets, targets = graph.out_offsets, graph.out_targets
+    kept = [[targets[k] for k in range(offsets[v], offsets[v + 1]) if keep[k]] for v in range(graph.vertex_count)]
+    reach = [0] * graph.vertex_count  # bit w set when w is reachable from v
+    for v in reversed(graph.topological_order()):
+        bits = 0
+        for w in kept[v]:
+            bits |= reach[w] | 1 << w
+        reach[v] = bits
+
+    for v in range(graph.vertex_count):
+        for k in range(offsets[v], offsets[v + 1]):
+            if keep[k]:
+                continue
+            end = targets[k]
+            removed = by_pair[(names[v], names[end])]
+            x = v
+            while x != end:
+                y = next(w for w in kept[x] if w == end or reach[w] >> end & 1)
+                edge = by_pair[(names[x], names[y])]
+                edge.setdefault("directWeight", edge["weight"])
+                edge["weight"] += removed["weight"]
+                per_kind = dict(edge["weights"])
+                for kind, count in removed["weights"].items():
+                    per_kind[kind] = per_kind.get(kind, 0) + count
+                edge["weights"] = dict(sorted(per_kind.items()))
+                x = y
+
+
+def coarsen(graph: DepGraph, by: str = "module", depth: int = 0, reduce: bool = True) -> Dict[str, Any]:
+    """Build the overview graph as depgraph JSON (see module docstring for fields)."""
+    names, group_of = group_vertices(graph, by, depth)
+
+    # Merge groups that depend on each other cyclically
+    weights: Dict[Tuple[int, int], Dict[str, int]] = {}
+    for v in range(graph.vertex_count):
+        gv = group_of[v]
+        for k in range(graph.out_offsets[v], graph.out_offsets[v + 1]):
+            gw = group_of[graph.out_targets[k]]
+            if gw != gv:
+                weights.setdefault((gv, gw), {})
+    group_graph = DepGraph.from_json({
+        "nodes": [{"name": n, "fullName": n} for n in names],
+        "edges": [{"source": names[a], "target": names[b]} for a, b in weights],
+    })
+    comp_of, comp_offsets, members = group_graph.condensation()
+    node_of = [comp_of[group_of[v]] for v in range(graph.vertex_count)]
+
+    nodes = []
+    for c in range(len(comp_offsets) - 1):
+        merged = sorted(names[g] for g in members[comp_offsets[c]:comp_offsets[c + 1]])
+        node = {
+            "name": " + ".join(merged),
+            "module": merged[0] if by == "module" and len(merged) == 1 else "",
+            "kind": by,
+            "isUnsafe": False,
+            "hasSorry": False,
+            "fullName": " + ".join(merged),
+            "axioms": [],
+            "members": 0,
+            "internalEdges": 0,
+        }
+        if len(merged) > 1:
+            node["groups"] = merged
+        nodes.append(node)
+
+    axioms: List[set] = [set() for _ in nodes]
+    for v in range(graph.node_count, graph.vertex_count):
+        node = nodes[node_of[v]]
+        node["members"] += 1
+        node["nameOnly"] = node.get("nameOnly", 0) + 1
+    for v in range(graph.node_count):
+        node = nodes[node_of[v]]
+        node["members"] += 1
+        node["hasSorry"] = node["hasSorry"] or graph.has_sorry(v)
+        node["isUnsafe"] = node["isUnsafe"] or graph.is_unsafe(v)
+        axioms[node_of[v]].update(graph.axioms(v))
+    for node, names_used in zip(nodes, axioms):
+        node["axioms"] = sorted(names_used)
+
+    weights = {}
+    for v in range(graph.vertex_count):
+        cv = node_of[v]
+        for k in range(graph.out_offsets[v], graph.out_offsets[v + 1]):
+            cw = node_of[graph.out_targets[k]]
+            if cw == cv:
+                nodes[cv]["internalEdges"] += 1
+                continue
+            per_kind = weights.setdefault((cv, cw), {})
+            kind = graph.edge_kinds[graph.out_kinds[k]]
+            per_kind[kind] = per_kind.get(kind, 0) + 1
+
+    edges = []
+    for (a, b), per_kind in weights.items():
+        edges.append({
+            "source": nodes[a]["fullName"],
+            "target": nodes[b]["fullName"],
+            "kind": "value" if "value" in per_kind or "type" not in per_kind else "type",
+            "weight": sum(per_kind.values()),
+            "weights": dict(sorted(per_kind.items())),
+        })
+    overview = {"nodes": nodes, "edges": edges}
+
+    if reduce and edges:
+        reduced = DepGraph.from_json(overview)
+        keep = reduced.transitive_reduction()
+        by_pair = {(e["source"], e["target"]): e for e in edges}
+        fold_removed_weights(reduced, keep, by_pair)
+        names_of = reduced.full_names
+        overview["edges"] = [
+            by_pair[(names_of[v], names_of[reduced.out_targets[k]])]
+            for v in range(reduced.vertex_count)
+            for k in range(reduced.out_offsets[v], reduced.out_offsets[v + 1])
+            if keep[k]
+        ]
+    return overview
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Collapse a dependency graph into a module/namespace overview")
+    parser.add_argument("--depgraph", required=True, help="Path to dependency graph JSON")
+    parser.add_argument("--by", choices=["module", "namespace"], default="module",
+                        help="Group declarations by module (default) or namespace prefix")
+    parser.add_argument("--depth", type=int, default=0,
+                        help="Keep only the first N name components of each group (default: all)")
+    parser.add_argument("--no-reduce", action="store_true",
+                        help="Keep edges implied by longer paths (skip transitive reduction)")
+    parser.add_argument("--json-out", help="Write the overview as depgraph JSON")
+    parser.add_argument("--dot-out", help="Write the overview as DOT")
+
+    args = parser.parse_args()
+    if not args.json_out and not args.dot_out:
+        parser.error("at least one of --json-out / --dot-out is required")
+
+    depgraph_path = Path(args.depgraph)
+    if not depgraph_path.exists():
+        print(f"Error: Dependency graph not found: {depgraph_path}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    graph = DepGraph.load(depgraph_path)
+    overview = coarsen(graph, args.by, args.depth, reduce=not args.no_reduce)
+    elapsed = time.perf_counter() - start
+
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(overview, f, indent=2)
+    if args.dot_out:
+        with open(args.dot_out, "w") as f:
+            f.write(depgraph_to_dot(overview))
+
+    merged = sum(1 for n in overview["nodes"] if "groups" in n)
+    print(f"✓ Overview by {args.by}: {len(overview['nodes'])} groups from {graph.node_count} declarations")
+    print(f"  Edges: {len(overview['edges'])} (from {graph.edge_count} declaration-level edges)")
+    if merged:
+        print(f"  ⚠ {merged} group(s) merged from dependency cycles")
+    for path in (args.json_out, args.dot_out):
+        if path:
+            print(f"  Written to {path}")
+    print(f"  Time: {elapsed:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
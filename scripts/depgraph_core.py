@@ -0,0 +1,685 @@
+#!/usr/bin/env python3
+"""
+Shared in-memory dependency graph used by the LeanDepViz scripts.
+
+`DepGraph` replaces ad-hoc walks over `depgraph["nodes"]`: it interns names,
+keeps per-node attributes in flat arrays, stores adjacency as forward and
+reverse CSR, and precomputes by-name, by-module and by-kind indices.
+
+Vertex IDs 0..node_count-1 are the graph's nodes in file order. Edge endpoints
+that are not nodes (possible with --keep-all extractions) get IDs after that and
+only carry a name. A bare endpoint name such as "foo" resolves to the node
+"Mod.foo" when the extractor prefixed a top-level declaration with its module.
+
+Edges follow the extractor's convention: `source` is the dependency and `target`
+the declaration that uses it. Accordingly:
+
+- `dependencies(v)` / `ancestors(v)`: what `v` uses, directly / transitively
+- `dependents(v)` / `descendants(v)`: what uses `v`, directly / transitively
+
+Usage:
+    from depgraph_core import DepGraph
+
+    graph = DepGraph.load("depgraph.json")   # uses a fresh .idx sidecar if present
+    v = graph.id_of("MyProject.foo")
+    print(len(graph.ancestors([v])))
+"""
+
+import fnmatch
+import json
+import math
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from depgraph_sidecar import (FLAG_SORRY, FLAG_UNSAFE, NODE_FIELDS, DepGraphSidecar, load_depgraph,
+                              top_level_aliases)
+
+
+# DepGraph attribute -> sidecar section, where the names differ
+_SIDECAR_COLUMNS = {"module_of": "node_module", "kind_of": "node_kind", "flags": "node_flags"}
+
+
+class DepGraph:
+    """Array-backed dependency graph with CSR adjacency and lookup indices."""
+
+    __slots__ = (
+        "node_count", "vertex_count", "edge_count",
+        "full_names", "short_names", "modules", "kinds", "edge_kinds",
+        "module_of", "kind_of", "flags", "axiom_offsets", "axiom_names",
+        "out_offsets", "out_targets", "out_kinds",
+        "in_offsets", "in_sources", "in_kinds",
+        "extras", "_index", "_sidecar", "_by_module", "_by_kind",
+    )
+
+    def __init__(self):
+        self.node_count = 0
+        self.vertex_count = 0
+        self.edge_count = 0
+        self.full_names: List[str] = []
+        self.short_names: List[str] = []
+        self.modules: List[str] = []        # module table, indexed by module_of
+        self.kinds: List[str] = []          # kind table, indexed by kind_of
+        self.edge_kinds: List[str] = []     # edge kind table, indexed by out_kinds/in_kinds
+        self.module_of = array("I")
+        self.kind_of = array("I")
+        self.flags = array("B")
+        self.axiom_offsets = array("I", [0])
+        self.axiom_names: List[str] = []
+        self.out_offsets = array("I")
+        self.out_targets = array("I")
+        self.out_kinds = array("B")
+        self.in_offsets = array("I")
+        self.in_sources = array("I")
+        self.in_kinds = array("B")
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        self._index: Optional[Dict[str, int]] = {}
+        self._sidecar: Optional[DepGraphSidecar] = None
+        self._by_module: Optional[Dict[str, array]] = None
+        self._by_kind: Optional[Dict[str, array]] = None
+
+    # Construction
+
+    @classmethod
+    def load(cls, depgraph_path: Path) -> "DepGraph":
+        """Load from a depgraph JSON path, preferring its binary sidecar when fresh."""
+        data = load_depgraph(Path(depgraph_path))
+        if isinstance(data, DepGraphSidecar):
+            return cls.from_sidecar(data)
+        return cls.from_json(data)
+
+    @classmethod
+    def from_json(cls, depgraph: Mapping[str, Any]) -> "DepGraph":
+        """Build from a parsed depgraph ({"nodes": [...], "edges": [...]})."""
+        g = cls()
+        intern = sys.intern
+        module_ids: Dict[str, int] = {}
+        kind_ids: Dict[str, int] = {}
+
+        # Missing and null modules/kinds both become "", as in the sidecar writer
+        nodes = depgraph.get("nodes", [])
+        for i, n in enumerate(nodes):
+            full = intern(n.get("fullName", n.get("name", "")))
+            g.full_names.append(full)
+            g.short_names.append(intern(n.get("name", "")))
+            g._index.setdefault(full, i)
+            g.module_of.append(_table_id(module_ids, g.modules, n.get("module") or ""))
+            g.kind_of.append(_table_id(kind_ids, g.kinds, n.get("kind") or ""))
+            g.flags.append((FLAG_SORRY if n.get("hasSorry") else 0) |
+                           (FLAG_UNSAFE if n.get("isUnsafe") else 0))
+            g.axiom_names.extend(intern(a) for a in n.get("axioms", []))
+            g.axiom_offsets.append(len(g.axiom_names))
+            extra = {k: v for k, v in n.items() if k not in NODE_FIELDS}
+            if extra:
+                g.extras[i] = extra
+        g.node_count = len(g.full_names)
+        aliases = top_level_aliases(nodes)
+
+        edge_kind_ids: Dict[str, int] = {}
+        sources = array("I")
+        targets = array("I")
+        kinds = array("B")
+        for e in depgraph.get("edges", []):
+            sources.append(g._vertex(intern(e["source"]), aliases))
+            targets.append(g._vertex(intern(e["target"]), aliases))
+            kinds.append(_table_id(edge_kind_ids, g.edge_kinds, e.get("kind") or ""))
+        g.vertex_count = len(g.full_names)
+        g.edge_count = len(sources)
+
+        g.out_offsets, order = _csr_order(sources, g.vertex_count)
+        g.out_targets = array("I", (targets[k] for k in order))
+        g.out_kinds = array("B", (kinds[k] for k in order))
+        g._build_reverse()
+        return g
+
+    @classmethod
+    def from_sidecar(cls, sidecar: DepGraphSidecar) -> "DepGraph":
+        """
+        Build from an open binary sidecar without touching the JSON.
+
+        Numeric columns are copied with one memcpy each; names are decoded lazily
+        on access and looked up by binary search over the sidecar's name order,
+        so loading does not scale with the number of declarations.
+        """
+        g = cls()
+        s = sidecar.string
+
+        g.node_count = sidecar.node_count
+        g.vertex_count = sidecar.vertex_count
+        g.edge_count = sidecar.edge_count
+        g.full_names = sidecar.strings(sidecar.node_full)
+        g.short_names = sidecar.strings(sidecar.node_name)
+        g.axiom_names = sidecar.strings(sidecar.axiom_ids)
+        g._index = None
+        g._sidecar = sidecar
+
+        g.modules = [sys.intern(s(i)) for i in sidecar.module_table]
+        g.kinds = [sys.intern(s(i)) for i in sidecar.kind_table]
+        g.edge_kinds = [s(i) for i in sidecar.edge_kinds]
+        for name in ("module_of", "kind_of", "flags", "axiom_offsets",
+                     "out_offsets", "out_targets", "out_kinds",
+                     "in_offsets", "in_sources", "in_kinds"):
+            setattr(g, name, _copy(getattr(sidecar, _SIDECAR_COLUMNS.get(name, name))))
+        if len(sidecar.extras):
+            g.extras = {int(k): v for k, v in json.loads(str(sidecar.extras, "utf-8")).items()}
+        return g
+
+    def _vertex(self, name: str, aliases: Dict[str, int]) -> int:
+        """ID for an edge endpoint, adding a name-only vertex if it is not a node."""
+        v = self._index.get(name)
+        if v is None:
+            v = aliases.get(name)
+        if v is None:
+            v = self._index[name] = len(self.full_names)
+            self.full_names.append(name)
+        return v
+
+    def _build_reverse(self) -> None:
+        sources = array("I")
+        for v in range(self.vertex_count):
+            sources.extend([v] * (self.out_offsets[v + 1] - self.out_offsets[v]))
+        self.in_offsets, order = _csr_order(self.out_targets, self.vertex_count)
+        self.in_sources = array("I", (sources[k] for k in order))
+        self.in_kinds = array("B", (self.out_kinds[k] for k in order))
+
+    # Per-node attributes
+
+    def id_of(self, name: str) -> Optional[int]:
+        """Vertex ID for a full declaration name, or None."""
+        if self._index is None:
+            return self._sidecar.find(name)
+        return self._index.get(name)
+
+    def ids_with_prefix(self, prefix: str) -> List[int]:
+        """Vertex IDs whose full name starts with `prefix` (binary search with a sidecar)."""
+        if self._index is None:
+            return sorted(self._sidecar.find_prefix(prefix))
+        return [v for v, name in enumerate(self.full_names) if name.startswith(prefix)]
+
+    def __contains__(self, name: str) -> bool:
+        return self.id_of(name) is not None
+
+    def __len__(self) -> int:
+        return self.node_count
+
+    def module(self, v: int) -> str:
+        return self.modules[self.module_of[v]] if v < self.node_count else ""
+
+    def kind(self, v: int) -> str:
+        return self.kinds[self.kind_of[v]] if v < self.node_count else ""
+
+    def has_sorry(self, v: int) -> bool:
+        return v < self.node_count and bool(self.flags[v] & FLAG_SORRY)
+
+    def is_unsafe(self, v: int) -> bool:
+        return v < self.node_count and bool(self.flags[v] & FLAG_UNSAFE)
+
+    def axioms(self, v: int) -> List[str]:
+        """Axioms used directly by a node."""
+        if v >= self.node_count:
+            return []
+        return self.axiom_names[self.axiom_offsets[v]:self.axiom_offsets[v + 1]]
+
+    def extra(self, v: int) -> Dict[str, Any]:
+        """Non-standard node fields (e.g. "zone") carried through from the JSON."""
+        return self.extras.get(v, {})
+
+    def node(self, v: int) -> Dict[str, Any]:
+        """Node as a depgraph JSON dict."""
+        node = {
+            "name": self.short_names[v] if v < self.node_count else self.full_names[v],
+            "module": self.module(v),
+            "kind": self.kind(v),
+            "isUnsafe": self.is_unsafe(v),
+            "hasSorry": self.has_sorry(v),
+            "fullName": self.full_names[v],
+            "axioms": self.axioms(v),
+        }
+        node.update(self.extra(v))
+        return node
+
+    def nodes(self) -> Iterator[Dict[str, Any]]:
+        for v in range(self.node_count):
+            yield self.node(v)
+
+    # Indices
+
+    @property
+    def by_module(self) -> Dict[str, array]:
+        """Module name -> node IDs in file order."""
+        if self._by_module is None:
+            self._by_module = _group(self.module_of, self.modules)
+        return self._by_module
+
+    @property
+    def by_kind(self) -> Dict[str, array]:
+        """Node kind -> node IDs in file order."""
+        if self._by_kind is None:
+            self._by_kind = _group(self.kind_of, self.kinds)
+        return self._by_kind
+
+    def modules_matching(self, include: Iterable[str], exclude: Iterable[str] = ()) -> List[str]:
+        """Modules matching any include glob and no exclude glob (matched once per module)."""
+        include = list(include)
+        exclude = list(exclude or [])
+        return [m for m in self.modules
+                if any(fnmatch.fnmatch(m, g) for g in include)
+                and not any(fnmatch.fnmatch(m, g) for g in exclude)]
+
+    # Adjacency
+
+    def dependents(self, v: int) -> array:
+        """Direct users of `v` (edge targets)."""
+        return self.out_targets[self.out_offsets[v]:self.out_offsets[v + 1]]
+
+    def dependencies(self, v: int) -> array:
+        """Direct dependencies of `v` (edge sources)."""
+        return self.in_sources[self.in_offsets[v]:self.in_offsets[v + 1]]
+
+    def cone(self, seeds: Iterable[int], direction: str = "ancestors",
+             max_depth: Optional[int] = None) -> Dict[int, int]:
+        """
+        Breadth-first closure from `seeds`.
+
+        `direction` is "ancestors" (follow dependencies), "descendants" (follow
+        dependents) or "both". Returns vertex ID -> hop distance, seeds included
+        at distance 0.
+        """
+        steps = []
+        if direction in ("ancestors", "both"):
+            steps.append((self.in_offsets, self.in_sources))
+        if direction in ("descendants", "both"):
+            steps.append((self.out_offsets, self.out_targets))
+        if not steps:
+            raise ValueError(f"Unknown cone direction: {direction}")
+
+        dist = {v: 0 for v in seeds}
+        frontier = list(dist)
+        depth = 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            nxt = []
+            for v in frontier:
+                for offsets, adj in steps:
+                    for w in adj[offsets[v]:offsets[v + 1]]:
+                        if w not in dist:
+                            dist[w] = depth
+                            nxt.append(w)
+            frontier = nxt
+        return dist
+
+    def ancestors(self, seeds: Iterable[int]) -> Dict[int, int]:
+        """Everything the seeds transitively depend on (seeds included)."""
+        return self.cone(seeds, "ancestors")
+
+    def descendants(self, seeds: Iterable[int]) -> Dict[int, int]:
+        """Everything that transitively depends on the seeds (seeds included)."""
+        return self.cone(seeds, "descendants")
+
+    # Ordering
+
+    def topological_order(self) -> Optional[array]:
+        """Vertices with every dependency before its dependents, or None if there are cycles."""
+        n = self.vertex_count
+        offsets, targets = self.out_offsets, self.out_targets
+        indegree = [self.in_offsets[v + 1] - self.in_offsets[v] for v in range(n)]
+        order = array("I", (v for v in range(n) if indegree[v] == 0))
+        i = 0
+        while i < len(order):
+            v = order[i]
+            i += 1
+            for w in targets[offsets[v]:offsets[v + 1]]:
+                indegree[w] -= 1
+                if indegree[w] == 0:
+                    order.append(w)
+        return order if len(order) == n else None
+
+    def condensation(self) -> Tuple[array, array, array]:
+        """
+        Strongly connected components in topological order (dependencies first).
+
+        Returns (comp_of, comp_offsets, members): component ID per vertex, and the
+        vertices of component c as members[comp_offsets[c]:comp_offsets[c + 1]].
+        Acyclic graphs (the common case) take a Kahn fast path with one vertex
+        per component.
+        """
+        n = self.vertex_count
+        order = self.topological_order()
+        if order is not None:
+            comp_of = array("I", bytes(4 * n))
+            for c, v in enumerate(order):
+                comp_of[v] = c
+            return comp_of, array("I", range(n + 1)), order
+
+        # Iterative Tarjan; components come out dependents-first, so reverse at the end
+        offsets, targets = self.out_offsets, self.out_targets
+        index = array("l", [-1]) * n
+        low = array("l", [0]) * n
+        on_stack = bytearray(n)
+        comp_rev = array("I", bytes(4 * n))
+        members_rev = array("I")
+        sizes = []
+        stack = []
+        counter = 0
+        for root in range(n):
+            if index[root] != -1:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [[root, offsets[root]]]
+            while work:
+                frame = work[-1]
+                v, k = frame
+                if k < offsets[v + 1]:
+                    frame[1] = k + 1
+                    w = targets[k]
+                    if index[w] == -1:
+                        index[w] = low[w] = counter
+                        counter += 1
+                        stack.append(w)
+                        on_stack[w] = 1
+                        work.append([w, offsets[w]])
+                    elif on_stack[w] and index[w] < low[v]:
+                        low[v] = index[w]
+                    continue
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    if low[v] < low[u]:
+                        low[u] = low[v]
+                if low[v] == index[v]:
+                    size = 0
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = 0
+                        comp_rev[w] = len(sizes)
+                        members_rev.append(w)
+                        size += 1
+                        if w == v:
+                            break
+                    sizes.append(size)
+
+        count = len(sizes)
+        comp_of = array("I", (count - 1 - c for c in comp_rev))
+        comp_offsets = array("I", [0])
+        members = array("I")
+        end = len(members_rev)
+        for size in reversed(sizes):
+            members.extend(members_rev[end - size:end])
+            end -= size
+            comp_offsets.append(len(members))
+        return comp_of, comp_offsets, members
+
+    def restrict_edges(self, kinds: Iterable[str]) -> Tuple["DepGraph", array]:
+        """
+        Same vertices with only the edges of the given kinds.
+
+        Returns (graph, positions), where positions[i] is the CSR position in
+        this graph of the restricted graph's edge i. Vertex attributes are shared,
+        not copied.
+        """
+        wanted = {i for i, k in enumerate(self.edge_kinds) if k in set(kinds)}
+        g = DepGraph()
+        for name in ("node_count", "vertex_count", "full_names", "short_names", "modules",
+                     "kinds", "edge_kinds", "module_of", "kind_of", "flags", "axiom_offsets",
+                     "axiom_names", "extras", "_index", "_sidecar"):
+            setattr(g, name, getattr(self, name))
+        positions = array("I")
+        g.out_offsets = array("I", [0])
+        for v in range(self.vertex_count):
+            positions.extend(pos for pos in range(self.out_offsets[v], self.out_offsets[v + 1])
+                             if self.out_kinds[pos] in wanted)
+            g.out_offsets.append(len(positions))
+        g.out_targets = array("I", (self.out_targets[pos] for pos in positions))
+        g.out_kinds = array("B", (self.out_kinds[pos] for pos in positions))
+        g.edge_count = len(positions)
+        g._build_reverse()
+        return g, positions
+
+    def transitive_reduction(self, kinds: Optional[Iterable[str]] = None,
+                             window: int = 8192) -> bytearray:
+        """
+        Mark edges implied by longer paths.
+
+        Returns a keep-mask over CSR edge positions (aligned with `out_targets`):
+        0 for an edge u -> w when w is also reachable from another dependent of u,
+        or when it duplicates an earlier edge. With `kinds`, only edges of those
+        kinds are considered (paths use only those kinds) and all others are kept.
+
+        Works on the SCC condensation, so edges inside a cycle are always kept and
+        one edge per pair of components suffices. Reachability is tracked as
+        integer bitsets over components in topological order, `window`
+        components at a time, which bounds memory on large graphs.
+        """
+        if kinds is not None:
+            sub, positions = self.restrict_edges(kinds)
+            keep = bytearray(b"\1") * self.edge_count
+            for pos, kept in zip(positions, sub.transitive_reduction(window=window)):
+                keep[pos] = kept
+            return keep
+
+        comp_of, comp_offsets, _ = self.condensation()
+        count = len(comp_offsets) - 1
+        offsets, targets = self.out_offsets, self.out_targets
+
+        # Per component: (target component, edge position), nearest target first
+        children: List[List[Tuple[int, int]]] = [[] for _ in range(count)]
+        for v in range(self.vertex_count):
+            cv = comp_of[v]
+            for pos in range(offsets[v], offsets[v + 1]):
+                cw = comp_of[targets[pos]]
+                if cw != cv:
+                    children[cv].append((cw, pos))
+        for row in children:
+            row.sort()
+
+        keep = bytearray(b"\1") * self.edge_count
+        for lo in range(0, count, window):
+            hi = min(count, lo + window)
+            reach = [0] * hi
+            # Components are numbered topologically, so only c < hi can reach the window
+            for c in range(hi - 1, -1, -1):
+                covered = 0
+                for cw, pos in children[c]:
+                    if cw >= hi:
+                        break
+                    if cw >= lo and covered >> (cw - lo) & 1:
+                        keep[pos] = 0
+                    covered |= reach[cw]
+                reach[c] = covered | (1 << (c - lo) if c >= lo else 0)
+        return keep
+
+    def cone_sizes(self, window: int = 8192) -> Tuple[array, array]:
+        """
+        Size of every vertex's ancestor and descendant cone, itself excluded.
+
+        Returns (ancestor counts, descendant counts) indexed by vertex. Members of
+        a cycle count each other. Like transitive_reduction, reachability is
+        tracked as integer bitsets over the SCC condensation, here with one bit
+        per vertex (grouped by component in topological order), `window` bits at
+        a time.
+        """
+        comp_of, comp_offsets, _ = self.condensation()
+        count = len(comp_offsets) - 1
+
+        children: List[set] = [set() for _ in range(count)]
+        for v in range(self.vertex_count):
+            cv = comp_of[v]
+            for w in self.dependents(v):
+                if comp_of[w] != cv:
+                    children[cv].add(comp_of[w])
+        child_lists = [sorted(c) for c in children]
+        parent_lists: List[List[int]] = [[] for _ in range(count)]
+        for c, row in enumerate(child_lists):
+            for cw in row:
+                parent_lists[cw].append(c)
+
+        def own_bits(c: int, lo: int, hi: int) -> int:
+            start, end = max(comp_offsets[c], lo), min(comp_offsets[c + 1], hi)
+            return ((1 << (end - start)) - 1) << (start - lo) if start < end else 0
+
+        desc = [0] * count
+        anc = [0] * count
+        total = comp_offsets[count]
+        for lo in range(0, total, window):
+            hi = min(total, lo + window)
+            # Descendants sit later in topological order: components starting at
+            # or after `hi` cannot reach the window
+            reach = [0] * count
+            for c in range(count - 1, -1, -1):
+                if comp_offsets[c] >= hi:
+                    continue
+                bits = own_bits(c, lo, hi)
+                for cw in child_lists[c]:
+                    bits |= reach[cw]
+                reach[c] = bits
+                desc[c] += bits.bit_count()
+            # Ancestors sit earlier: components ending at or before `lo` cannot reach it
+            reach = [0] * count
+            for c in range(count):
+                if comp_offsets[c + 1] <= lo:
+                    continue
+                bits = own_bits(c, lo, hi)
+                for cp in parent_lists[c]:
+                    bits |= reach[cp]
+                reach[c] = bits
+                anc[c] += bits.bit_count()
+
+        ancestors = array("I", (anc[comp_of[v]] - 1 for v in range(self.vertex_count)))
+        descendants = array("I", (desc[comp_of[v]] - 1 for v in range(self.vertex_count)))
+        return ancestors, descendants
+
+    def edges(self, vertices: Optional[Iterable[int]] = None) -> Iterator[Dict[str, str]]:
+        """
+        Edges as depgraph JSON dicts, grouped by source.
+
+        With `vertices`, only the edges between those vertices (the induced
+        subgraph) are produced, in ascending source order.
+        """
+        names = self.full_names
+        if vertices is None:
+            keep = None
+            sources: Iterable[int] = range(self.vertex_count)
+        else:
+            keep = set(vertices)
+            sources = sorted(keep)
+        for v in sources:
+            for k in range(self.out_offsets[v], self.out_offsets[v + 1]):
+                w = self.out_targets[k]
+                if keep is None or w in keep:
+                    yield {"target": names[w], "source": names[v],
+                           "kind": self.edge_kinds[self.out_kinds[k]]}
+
+    def subgraph(self, vertices: Iterable[int]) -> Dict[str, Any]:
+        """Induced subgraph as depgraph JSON ({"nodes": [...], "edges": [...]})."""
+        keep = sorted(set(vertices))
+        return {
+            "nodes": [self.node(v) for v in keep if v < self.node_count],
+            "edges": list(self.edges(keep)),
+        }
+
+
+def _dot_escape(s: str) -> str:
+    return s.replace('"', '\\"')
+
+
+def _dot_label(node: Mapping[str, Any]) -> str:
+    tags = []
+    if node.get("hasSorry"):
+        tags.append("HAS SORRY")
+    if node.get("axioms"):
+        tags.append("USES AXIOM")
+    if node.get("isUnsafe"):
+        tags.append("UNSAFE")
+    if node.get("noncomp"):
+        tags.append("NONCOMP")
+    if "members" in node:
+        tags.insert(0, f"{node['members']} decls")
+    return node.get("name", "") + ("\\n" + ", ".join(tags) if tags else "")
+
+
+def _dot_color(node: Mapping[str, Any]) -> Tuple[str, str]:
+    if node.get("hasSorry"):
+        return "#d33", "filled"
+    if node.get("axioms"):
+        return "#e6972b", "filled"
+    if node.get("isUnsafe"):
+        return "#555", "filled"
+    if node.get("noncomp"):
+        return "#777", "filled,diagonals"
+    return "#bbbbbb", "filled"
+
+
+def depgraph_to_dot(depgraph: Mapping[str, Any]) -> str:
+    """
+    Render depgraph JSON as DOT, styled like the Lean extractor's --dot output.
+
+    Lets subgraphs produced by the Python tools go straight to Graphviz and
+    embed_data.py without re-running the extractor. Coarsened graphs (nodes with
+    "members", edges with "weight") get member counts in labels and weighted
+    edge labels.
+    """
+    lines = [
+        "digraph DepViz {",
+        "  rankdir=LR;",
+        '  node [shape=ellipse, fontsize=10, fontname="Helvetica"];',
+        "  edge [arrowsize=0.8];",
+    ]
+    for n in depgraph.get("nodes", []):
+        color, style = _dot_color(n)
+        name = _dot_escape(n.get("fullName", n.get("name", "")))
+        lines.append(f'  "{name}" [label="{_dot_escape(_dot_label(n))}", color="{color}", '
+                     f'style="{style}", tooltip="{_dot_escape(n.get("module", ""))}"];')
+    for e in depgraph.get("edges", []):
+        kind = e.get("kind", "")
+        style = "dashed" if kind == "type" else "solid"
+        label = "type" if kind == "type" else "value"
+        extra = ""
+        if "weight" in e:
+            label = str(e["weight"])
+            extra = f", penwidth={1 + math.log10(max(e['weight'], 1)):.1f}"
+        lines.append(f'  "{_dot_escape(e["source"])}" -> "{_dot_escape(e["target"])}" '
+                     f'[style="{style}", label="{label}", fontsize=8{extra}];')
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def _table_id(ids: Dict[str, int], table: List[str], value: str) -> int:
+    idx = ids.get(value)
+    if idx is None:
+        idx = ids[value] = len(table)
+        table.append(sys.intern(value))
+    return idx
+
+
+def _copy(view: memoryview) -> array:
+    """Copy a sidecar column into an array of the same item type."""
+    out = array(view.format)
+    out.frombytes(view.cast("B"))
+    return out
+
+
+def _csr_order(keys: array, n: int):
+    """Counting sort of edge positions by key: returns (offsets, positions in key order)."""
+    counts = array("I", bytes(4 * (n + 1)))
+    for k in keys:
+        counts[k + 1] += 1
+    for v in range(n):
+        counts[v + 1] += counts[v]
+    offsets = array("I", counts)
+    order = array("I", bytes(4 * len(keys)))
+    cursor = array("I", counts[:n])
+    for pos, k in enumerate(keys):
+        order[cursor[k]] = pos
+        cursor[k] += 1
+    return offsets, order
+
+
+def _group(column: array, table: List[str]) -> Dict[str, array]:
+    groups = [array("I") for _ in table]
+    for v, t in enumerate(column):
+        groups[t].append(v)
+    return {table[t]: ids for t, ids in enumerate(groups)}
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Remove transitively implied edges from a declaration-level dependency graph.
+
+An edge a -> c is implied when c is also reachable from a through a longer
+path (a -> b -> c). Such edges add nothing to the picture, but Graphviz layout
+time grows super-linearly with the edge count. This pass takes the transitive
+reduction separately for each edge kind: a `type` edge is dropped only when a
+path of `type` edges implies it, and likewise for `value` edges, so both
+dependency views stay faithful. Duplicate edges of the same kind are dropped too.
+
+Reachability is computed with bitsets over the graph's topological order (see
+DepGraph.transitive_reduction), which scales to hundreds of thousands of edges.
+
+The pruned graph is written as depgraph JSON with a "pruning" section recording
+how many edges were removed per kind. The DOT output is the input DOT with the
+removed edge lines dropped (so the extractor's styling is kept), or generated
+from the JSON when no input DOT is given. With --measure-layout, `dot` is run
+on both versions and the layout times are recorded as well.
+
+Usage:
+    python scripts/depgraph_prune.py \
+        --depgraph depgraph.json [--dot depgraph.dot] \
+        --json-out depgraph.pruned.json --dot-out depgraph.pruned.dot \
+        [--kinds type,value] [--measure-layout]
+"""
+
+import argparse
+import json
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from depgraph_core import DepGraph, depgraph_to_dot
+from depgraph_sidecar import top_level_aliases
+
+DEFAULT_KINDS = ["type", "value"]
+
+# `  "source" -> "target" [style="...", label="kind", ...];` as written by the extractor
+DOT_EDGE = re.compile(r'^\s*"((?:[^"\\]|\\.)*)"\s*->\s*"((?:[^"\\]|\\.)*)".*\blabel="([^"]*)"')
+
+
+def prune_edges(depgraph: Dict[str, Any], kinds: List[str]) -> Tuple[List[bool], Dict[str, int]]:
+    """
+    Decide which edges of a parsed depgraph to keep.
+
+    Returns (keep flag per edge in file order, removed count per kind).
+    """
+    graph = DepGraph.from_json(depgraph)
+    keep_pos = bytearray(b"\1") * graph.edge_count
+    for kind in kinds:
+        mask = graph.transitive_reduction([kind])
+        for pos, kept in enumerate(mask):
+            if not kept:
+                keep_pos[pos] = 0
+
+    # CSR rows list each source's edges in file order, so walk a cursor per source
+    aliases = top_level_aliases(depgraph.get("nodes", []))
+    cursor = list(graph.out_offsets[:graph.vertex_count])
+    keep = []
+    removed = {kind: 0 for kind in kinds}
+    for e in depgraph.get("edges", []):
+        v = graph.id_of(e["source"])
+        if v is None:
+            v = aliases[e["source"]]
+        pos = cursor[v]
+        cursor[v] += 1
+        keep.append(bool(keep_pos[pos]))
+        if not keep_pos[pos]:
+            removed[e.get("kind", "")] += 1
+    return keep, removed
+
+
+def prune_dot(dot_text: str, removed_edges: List[Dict[str, Any]]) -> Tuple[str, int]:
+    """Drop the lines of removed edges from extractor DOT; returns (text, lines dropped)."""
+    pending: Dict[Tuple[str, str, str], int] = {}
+    for e in removed_edges:
+        key = (e["source"], e["target"], e.get("kind", ""))
+        pending[key] = pending.get(key, 0) + 1
+
+    lines = []
+    dropped = 0
+    for line in dot_text.splitlines():
+        m = DOT_EDGE.match(line)
+        if m:
+            key = (m.group(1).replace('\\"', '"'), m.group(2).replace('\\"', '"'), m.group(3))
+            if pending.get(key):
+                pending[key] -= 1
+                dropped += 1
+                continue
+        lines.append(line)
+    return "\n".join(lines), dropped
+
+
+def layout_seconds(dot_path: Path, timeout: int) -> Optional[float]:
+    """Wall time of `dot -Tsvg` on a file, or None if it fails or times out."""
+    start = time.perf_counter()
+    try:
+        subprocess.run(["dot", "-Tsvg", "-o", "/dev/null", str(dot_path)],
+                       check=True, capture_output=True, timeout=timeout)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
+        return None
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove transitively implied edges, per edge kind")
+    parser.add_argument("--depgraph", required=True, help="Path to dependency graph JSON")
+    parser.add_argument("--dot", help="DOT file to prune alongside the JSON (default: generate from JSON)")
+    parser.add_argument("--json-out", required=True, help="Output path for the pruned depgraph JSON")
+    parser.add_argument("--dot-out", help="Output path for the pruned DOT")
+    parser.add_argument("--kinds", default=",".join(DEFAULT_KINDS),
+                        help="Comma-separated edge kinds to reduce (others are kept as-is)")
+    parser.add_argument("--measure-layout", action="store_true",
+                        help="Time Graphviz layout of the original and pruned DOT (requires dot)")
+    parser.add_argument("--layout-timeout", type=int, default=600,
+                        help="Timeout in seconds per Graphviz run (default: 600)")
+
+    args = parser.parse_args()
+    if args.measure_layout and not args.dot_out:
+        parser.error("--measure-layout requires --dot-out")
+
+    depgraph_path = Path(args.depgraph)
+    if not depgraph_path.exists():
+        print(f"Error: Dependency graph not found: {depgraph_path}", file=sys.stderr)
+        return 1
+
+    with open(depgraph_path) as f:
+        depgraph = json.load(f)
+    edges = depgraph.get("edges", [])
+    kinds = [k.strip() for k in args.kinds.split(",") if k.strip()]
+
+    start = time.perf_counter()
+    keep, removed = prune_edges(depgraph, kinds)
+    elapsed = time.perf_counter() - start
+
+    pruned = dict(depgraph)
+    pruned["edges"] = [e for e, k in zip(edges, keep) if k]
+    pruning: Dict[str, Any] = {
+        "kinds": kinds,
+        "original_edges": len(edges),
+        "remaining_edges": len(pruned["edges"]),
+        "removed": removed,
+    }
+
+    if args.dot_out:
+        if args.dot:
+            original_dot = Path(args.dot).read_text()
+            dot_text, dropped = prune_dot(original_dot, [e for e, k in zip(edges, keep) if not k])
+            if dropped != len(edges) - len(pruned["edges"]):
+                print(f"⚠ Removed {dropped} DOT edge lines but {len(edges) - len(pruned['edges'])} "
+                      f"JSON edges; is {args.dot} from the same extraction?")
+        else:
+            original_dot = depgraph_to_dot(depgraph)
+            dot_text = depgraph_to_dot(pruned)
+        with open(args.dot_out, "w") as f:
+            f.write(dot_text)
+
+        if args.measure_layout:
+            if shutil.which("dot") is None:
+                print("⚠ Graphviz 'dot' not found; skipping layout timing")
+            else:
+                original_path = Path(args.dot) if args.dot else Path(args.dot_out).with_suffix(".original.dot")
+                if not args.dot:
+                    original_path.write_text(original_dot)
+                before = layout_seconds(original_path, args.layout_timeout)
+                after = layout_seconds(Path(args.dot_out), args.layout_timeout)
+                if not args.dot:
+                    original_path.unlink()
+                pruning["layout_seconds"] = {"original": before, "pruned": after}
+
+    pruned["pruning"] = pruning
+    with open(args.json_out, "w") as f:
+        json.dump(pruned, f, indent=2)
+
+    total_removed = sum(removed.values())
+    print(f"✓ Pruned graph written to {args.json_out}" + (f" and {args.dot_out}" if args.dot_out else ""))
+    print(f"  Edges: {len(edges)} → {len(pruned['edges'])} "
+          f"({total_removed / max(len(edges), 1) * 100:.1f}% removed in {elapsed:.3f}s)")
+    for kind, count in removed.items():
+        print(f"    {kind}: {count} removed")
+    layout = pruning.get("layout_seconds")
+    if layout:
+        before, after = (("failed/timeout" if t is None else f"{t:.2f}s") for t in layout.values())
+        print(f"  Graphviz layout: {before} → {after}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
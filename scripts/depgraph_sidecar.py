@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Compact binary sidecar for dependency graph JSON files.
+
+`depgraph.json` is a list of node dicts plus a list of edge dicts, so every
+consumer pays for a full `json.load` even when it only needs names and modules.
+The sidecar (`depgraph.json.idx`, written next to the JSON) stores the same graph
+in fixed-width arrays that are memory-mapped on open:
+
+- one interned string table (names, modules, kinds, axioms, edge kinds)
+- integer node IDs with per-node name/fullName string IDs
+- module and kind tables, with per-node indices into them
+- a one-byte flags column (bit 0: hasSorry, bit 1: isUnsafe)
+- axioms as CSR (offsets + string IDs)
+- edges as CSR keyed by source node (offsets + target IDs + kind IDs), and
+  again keyed by target node for reverse traversal
+- every vertex ID sorted by full name, for binary-search lookups by name
+
+Edge endpoints that are not nodes of the graph (possible with --keep-all
+extractions) get vertex IDs after the last node and carry only a name.
+
+Opening a sidecar is constant-time; pages are read on demand. Scripts call
+`load_depgraph()`, which returns a sidecar-backed mapping with the usual
+"nodes"/"edges" sequences when a fresh sidecar exists, and the parsed JSON
+otherwise. A sidecar is fresh when the size and mtime recorded in it match the
+JSON file.
+
+Usage:
+    python scripts/depgraph_sidecar.py depgraph.json          # writes depgraph.json.idx
+    python scripts/depgraph_sidecar.py depgraph.json --info   # prints sidecar statistics
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+MAGIC = b"LDVIDX02"
+SIDECAR_SUFFIX = ".idx"
+
+FLAG_SORRY = 1
+FLAG_UNSAFE = 2
+
+# Sections in file order: name -> array typecode
+SECTIONS = [
+    ("str_offsets", "Q"),
+    ("str_data", "B"),
+    ("node_name", "I"),
+    ("node_full", "I"),
+    ("module_table", "I"),
+    ("kind_table", "I"),
+    ("node_module", "I"),
+    ("node_kind", "I"),
+    ("node_flags", "B"),
+    ("axiom_offsets", "I"),
+    ("axiom_ids", "I"),
+    ("edge_kinds", "I"),
+    ("out_offsets", "I"),
+    ("out_targets", "I"),
+    ("out_kinds", "B"),
+    ("in_offsets", "I"),
+    ("in_sources", "I"),
+    ("in_kinds", "B"),
+    ("name_order", "I"),
+    ("extras", "B"),
+]
+
+# magic, node_count, vertex_count, edge_count, string_count, source_size, source_mtime_ns
+HEADER = struct.Struct("<8sIIIIQQ")
+SECTION_ENTRY = struct.Struct("<QQ")
+ALIGN = 8
+
+NODE_FIELDS = ("name", "module", "kind", "isUnsafe", "hasSorry", "fullName", "axioms")
+
+# Sidecars are read by casting memory views, so the layout is little-endian only
+NATIVE_OK = sys.byteorder == "little" and array("I").itemsize == 4 and array("Q").itemsize == 8
+
+
+def sidecar_path(depgraph_path: Path) -> Path:
+    """Path of the sidecar belonging to a depgraph JSON file."""
+    depgraph_path = Path(depgraph_path)
+    return depgraph_path.with_name(depgraph_path.name + SIDECAR_SUFFIX)
+
+
+def _source_stamp(depgraph_path: Path) -> tuple:
+    st = os.stat(depgraph_path)
+    return st.st_size, st.st_mtime_ns
+
+
+def top_level_aliases(nodes) -> Dict[str, int]:
+    """
+    Map bare edge endpoint names to the nodes they refer to.
+
+    The extractor prefixes top-level declarations with their module in
+    `fullName` ("Mod.foo") while edges keep the bare name ("foo"). Returns
+    bare name -> node index for every such node whose bare name is unambiguous.
+    """
+    aliases: Dict[str, int] = {}
+    for i, n in enumerate(nodes):
+        name = n.get("name", "")
+        if name and "." not in name and n.get("fullName") == f"{n.get('module', '')}.{name}":
+            aliases[name] = -1 if name in aliases else i
+    return {name: i for name, i in aliases.items() if i >= 0}
+
+
+class _StringTable:
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.data = bytearray()
+        self.offsets = array("Q", [0])
+
+    def intern(self, s: str) -> int:
+        idx = self.index.get(s)
+        if idx is None:
+            idx = self.index[s] = len(self.index)
+            self.data += s.encode("utf-8")
+            self.offsets.append(len(self.data))
+        return idx
+
+
+def write_sidecar(depgraph: Dict[str, Any], depgraph_path: Path, out_path: Optional[Path] = None) -> Path:
+    """
+    Write the binary sidecar for an already-parsed depgraph.
+
+    `depgraph_path` is the JSON file the graph was read from; its size and mtime
+    are recorded so readers can detect a stale sidecar.
+    """
+    if not NATIVE_OK:
+        raise RuntimeError("Depgraph sidecars require a little-endian platform")
+
+    depgraph_path = Path(depgraph_path)
+    out_path = Path(out_path) if out_path else sidecar_path(depgraph_path)
+    nodes = depgraph.get("nodes", [])
+    edges = depgraph.get("edges", [])
+
+    strings = _StringTable()
+    cols = {name: array(code) for name, code in SECTIONS if name not in ("str_offsets", "str_data")}
+    cols["axiom_offsets"].append(0)
+    extras = {}
+    module_ids: Dict[str, int] = {}
+    kind_ids: Dict[str, int] = {}
+
+    def table_id(ids: Dict[str, int], table: array, value: str) -> int:
+        idx = ids.get(value)
+        if idx is None:
+            idx = ids[value] = len(table)
+            table.append(strings.intern(value))
+        return idx
+
+    vertex_of: Dict[str, int] = {}
+    for i, n in enumerate(nodes):
+        full = n.get("fullName", n.get("name", ""))
+        vertex_of.setdefault(full, i)
+        cols["node_name"].append(strings.intern(n.get("name", "")))
+        cols["node_full"].append(strings.intern(full))
+        cols["node_module"].append(table_id(module_ids, cols["module_table"], n.get("module") or ""))
+        cols["node_kind"].append(table_id(kind_ids, cols["kind_table"], n.get("kind") or ""))
+        cols["node_flags"].append((FLAG_SORRY if n.get("hasSorry") else 0) |
+                                  (FLAG_UNSAFE if n.get("isUnsafe") else 0))
+        cols["axiom_ids"].extend(strings.intern(a) for a in n.get("axioms", []))
+        cols["axiom_offsets"].append(len(cols["axiom_ids"]))
+        extra = {k: v for k, v in n.items() if k not in NODE_FIELDS}
+        if extra:
+            extras[i] = extra
+
+    # Bare names of module-prefixed nodes resolve to those nodes; other edge
+    # endpoints outside the node set become name-only vertices
+    for name, i in top_level_aliases(nodes).items():
+        vertex_of.setdefault(name, i)
+    for e in edges:
+        for end in (e["source"], e["target"]):
+            if end not in vertex_of:
+                vertex_of[end] = len(cols["node_full"])
+                cols["node_full"].append(strings.intern(end))
+    vertex_count = len(cols["node_full"])
+
+    edge_kind_ids: Dict[str, int] = {}
+    buckets: List[List[tuple]] = [[] for _ in range(vertex_count)]
+    for e in edges:
+        kind = e.get("kind") or ""
+        if kind not in edge_kind_ids:
+            if len(edge_kind_ids) == 256:
+                raise ValueError("Too many distinct edge kinds for the sidecar format")
+            edge_kind_ids[kind] = len(edge_kind_ids)
+            cols["edge_kinds"].append(strings.intern(kind))
+        buckets[vertex_of[e["source"]]].append((vertex_of[e["target"]], edge_kind_ids[kind]))
+
+    in_buckets: List[List[tuple]] = [[] for _ in range(vertex_count)]
+    # Reverse rows list sources in ascending order, as DepGraph builds them
+    for source, bucket in enumerate(buckets):
+        for target, kind in bucket:
+            in_buckets[target].append((source, kind))
+
+    for prefix, other, rows in (("out", "targets", buckets), ("in", "sources", in_buckets)):
+        offsets, ends, kinds = cols[f"{prefix}_offsets"], cols[f"{prefix}_{other}"], cols[f"{prefix}_kinds"]
+        offsets.append(0)
+        for bucket in rows:
+            for end, kind in bucket:
+                ends.append(end)
+                kinds.append(kind)
+            offsets.append(len(ends))
+
+    # Stable sort, so duplicate names keep the lowest vertex ID first
+    names = list(strings.index)
+    full = cols["node_full"]
+    cols["name_order"] = array("I", sorted(range(vertex_count), key=lambda v: names[full[v]]))
+
+    if extras:
+        cols["extras"].frombytes(json.dumps(extras).encode("utf-8"))
+    cols["str_offsets"] = strings.offsets
+    cols["str_data"] = array("B", strings.data)
+
+    source_size, source_mtime = _source_stamp(depgraph_path)
+    header = HEADER.pack(MAGIC, len(nodes), vertex_count, len(edges), len(strings.index),
+                         source_size, source_mtime)
+
+    table_size = SECTION_ENTRY.size * len(SECTIONS)
+    pos = HEADER.size + table_size
+    entries = []
+    payloads = []
+    for name, _ in SECTIONS:
+        pos += -pos % ALIGN
+        data = cols[name].tobytes()
+        entries.append(SECTION_ENTRY.pack(pos, len(data)))
+        payloads.append((pos, data))
+        pos += len(data)
+
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"".join(entries))
+        for offset, data in payloads:
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class _NodeSequence(Sequence):
+    """Lazy sequence of node dicts, materialized one at a time from the sidecar."""
+
+    def __init__(self, graph: "DepGraphSidecar"):
+        self._g = graph
+
+    def __len__(self) -> int:
+        return self._g.node_count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._g.node(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._g.node(i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        node = self._g.node
+        for i in range(self._g.node_count):
+            yield node(i)
+
+
+class _EdgeSequence(Sequence):
+    """Lazy sequence of edge dicts in source-grouped (CSR) order."""
+
+    def __init__(self, graph: "DepGraphSidecar"):
+        self._g = graph
+
+    def __len__(self) -> int:
+        return self._g.edge_count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        g = self._g
+        # Binary search the source whose CSR row contains edge i
+        lo, hi = 0, g.vertex_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if g.out_offsets[mid + 1] <= i:
+                lo = mid + 1
+            else:
+                hi = mid
+        return g.edge(lo, i)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        g = self._g
+        offsets = g.out_offsets
+        for v in range(g.vertex_count):
+            for i in range(offsets[v], offsets[v + 1]):
+                yield g.edge(v, i)
+
+
+class _StringColumn(Sequence):
+    """Lazy sequence of the strings referenced by an ID column, decoded on access."""
+
+    def __init__(self, graph: "DepGraphSidecar", ids):
+        self._string = graph.string
+        self._ids = ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._string(j) for j in self._ids[i]]
+        return self._string(self._ids[i])
+
+    def __iter__(self) -> Iterator[str]:
+        return map(self._string, self._ids)
+
+
+class DepGraphSidecar(Mapping):
+    """
+    Memory-mapped view of a depgraph sidecar.
+
+    Behaves like the parsed JSON mapping ({"nodes": [...], "edges": [...]}) with
+    lazily built dicts, and additionally exposes the raw columns (`node_full`,
+    `node_module`, `out_offsets`, ...) and `string(i)` for array-level consumers.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buf = memoryview(self._mmap)
+
+        (magic, self.node_count, self.vertex_count, self.edge_count, self.string_count,
+         self.source_size, self.source_mtime_ns) = HEADER.unpack_from(buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a depgraph sidecar")
+
+        for k, (name, code) in enumerate(SECTIONS):
+            offset, length = SECTION_ENTRY.unpack_from(buf, HEADER.size + k * SECTION_ENTRY.size)
+            view = buf[offset:offset + length]
+            setattr(self, name, view if code == "B" else view.cast(code))
+
+        self._strings: Dict[int, str] = {}
+        self._extras: Optional[Dict[int, Dict[str, Any]]] = None
+
+    def string(self, i: int) -> str:
+        s = self._strings.get(i)
+        if s is None:
+            s = self._strings[i] = str(self.str_data[self.str_offsets[i]:self.str_offsets[i + 1]], "utf-8")
+        return s
+
+    def full_name(self, v: int) -> str:
+        return self.string(self.node_full[v])
+
+    def strings(self, ids) -> Sequence:
+        """Lazy string view of an ID column, e.g. `strings(node_full)`."""
+        return _StringColumn(self, ids)
+
+    def _lower_bound(self, name: str) -> int:
+        """First position in `name_order` whose full name is not below `name`."""
+        order = self.name_order
+        lo, hi = 0, len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.full_name(order[mid]) < name:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, name: str) -> Optional[int]:
+        """Vertex ID for a full name by binary search over `name_order`, or None."""
+        order = self.name_order
+        lo = self._lower_bound(name)
+        if lo < len(order) and self.full_name(order[lo]) == name:
+            return order[lo]
+        return None
+
+    def find_prefix(self, prefix: str) -> List[int]:
+        """Vertex IDs whose full name starts with `prefix`, in name order, by binary search."""
+        order = self.name_order
+        found = []
+        for k in range(self._lower_bound(prefix), len(order)):
+            if not self.full_name(order[k]).startswith(prefix):
+                break
+            found.append(order[k])
+        return found
+
+    def node(self, i: int) -> Dict[str, Any]:
+        s = self.string
+        flags = self.node_flags[i]
+        node = {
+            "name": s(self.node_name[i]),
+            "module": s(self.module_table[self.node_module[i]]),
+            "kind": s(self.kind_table[self.node_kind[i]]),
+            "isUnsafe": bool(flags & FLAG_UNSAFE),
+            "hasSorry": bool(flags & FLAG_SORRY),
+            "fullName": s(self.node_full[i]),
+            "axioms": [s(a) for a in self.axiom_ids[self.axiom_offsets[i]:self.axiom_offsets[i + 1]]],
+        }
+        if len(self.extras):
+            if self._extras is None:
+                self._extras = {int(k): v for k, v in json.loads(str(self.extras, "utf-8")).items()}
+            node.update(self._extras.get(i, {}))
+        return node
+
+    def edge(self, source: int, i: int) -> Dict[str, Any]:
+        return {
+            "target": self.full_name(self.out_targets[i]),
+            "source": self.full_name(source),
+            "kind": self.string(self.edge_kinds[self.out_kinds[i]]),
+        }
+
+    # Mapping interface mirroring the JSON layout
+
+    def __getitem__(self, key: str):
+        if key == "nodes":
+            return _NodeSequence(self)
+        if key == "edges":
+            return _EdgeSequence(self)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(("nodes", "edges"))
+
+    def __len__(self) -> int:
+        return 2
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Materialize the full JSON-compatible structure."""
+        return {"nodes": list(self["nodes"]), "edges": list(self["edges"])}
+
+
+def open_sidecar(depgraph_path: Path) -> Optional[DepGraphSidecar]:
+    """Open the sidecar for a depgraph JSON if it exists and is fresh, else None."""
+    path = sidecar_path(depgraph_path)
+    if not NATIVE_OK or not path.exists():
+        return None
+    try:
+        graph = DepGraphSidecar(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if (graph.source_size, graph.source_mtime_ns) != _source_stamp(depgraph_path):
+        return None
+    return graph
+
+
+def load_depgraph(depgraph_path: Path) -> Union[Dict[str, Any], DepGraphSidecar]:
+    """
+    Load a dependency graph, preferring a fresh binary sidecar over the JSON.
+
+    Either way the result supports `graph["nodes"]`, `graph.get("edges", [])`
+    and iteration over node/edge dicts.
+    """
+    graph = open_sidecar(depgraph_path)
+    if graph is not None:
+        return graph
+    with open(depgraph_path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a memory-mappable binary sidecar for a depgraph JSON")
+    parser.add_argument("depgraph", help="Path to dependency graph JSON")
+    parser.add_argument("--info", action="store_true", help="Print statistics for the existing sidecar instead")
+
+    args = parser.parse_args()
+
+    depgraph_path = Path(args.depgraph)
+    if not depgraph_path.exists():
+        print(f"Error: Dependency graph not found: {depgraph_path}", file=sys.stderr)
+        return 1
+
+    if args.info:
+        graph = open_sidecar(depgraph_path)
+        if graph is None:
+            print(f"No fresh sidecar for {depgraph_path}")
+            return 1
+        print(f"Sidecar: {graph.path} ({graph.path.stat().st_size / 1024:.1f}KB)")
+        print(f"  Nodes: {graph.node_count} (+{graph.vertex_count - graph.node_count} edge-only names)")
+        print(f"  Edges: {graph.edge_count}")
+        print(f"  Strings: {graph.string_count}")
+        return 0
+
+    with open(depgraph_path) as f:
+        depgraph = json.load(f)
+    out_path = write_sidecar(depgraph, depgraph_path)
+
+    json_size = depgraph_path.stat().st_size
+    idx_size = out_path.stat().st_size
+    print(f"✓ Sidecar written to {out_path}")
+    print(f"  {len(depgraph.get('nodes', []))} nodes, {len(depgraph.get('edges', []))} edges")
+    print(f"  Size: {json_size / 1024:.1f}KB → {idx_size / 1024:.1f}KB")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Synthetic dependency graphs and checker reports, for benchmarks.
+
+Generates a depgraph with the shape of a real project at any size, and the
+reports the checkers would write for it, from a handful of parameters and a
+seed. The same parameters and seed always give the same files.
+
+Declarations are laid out module by module (module_size per module). Each
+module imports `fanout` earlier modules, and each declaration depends on
+about `edges_per_node` earlier declarations: a `local_edges` fraction of them
+in its own module, the rest in the modules it imports. The graph is therefore
+acyclic, like a Lean project. About one module in ten starts with a project
+axiom. An `axiom_density` fraction of the declarations use one of those
+axioms, a `sorry_density` fraction use sorry, and a `module_failure_rate`
+fraction of the modules fail lean4checker and SafeVerify.
+
+Files written to the output directory:
+
+    depgraph.json           nodes and edges, as depviz writes them
+    policy.yaml             three zones (one per package group, the rest)
+    paranoia_report.json    rows for theorems and definitions; sorry and project axioms fail
+    kernel_modules.json     lean4checker module results, as the runtime returns them
+    kernel_report.json      lean4checker rows (attach_to_declarations output)
+    safeverify_report.json  SafeVerify rows
+    synth.json              the parameters and the counts
+
+Failed rows carry log references (log_store.py) but no log files are written.
+Everything is written as it is generated, so memory use stays flat up to
+millions of declarations.
+
+Usage:
+    python scripts/depgraph_synth.py --nodes 100k --out-dir bench/100k
+    python scripts/depgraph_synth.py --nodes 1m --edges-per-node 6 --fanout 8 \
+        --sorry-density 0.01 --out-dir bench/1m
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, IO, List
+
+FORMAT_NAME = "leandepviz-synth"
+FORMAT_VERSION = 1
+
+DEFAULTS: Dict[str, Any] = {
+    "nodes": 10_000,
+    "module_size": 200,
+    "edges_per_node": 4.0,
+    "fanout": 4,
+    "local_edges": 0.6,
+    "axiom_density": 0.002,
+    "sorry_density": 0.005,
+    "module_failure_rate": 0.02,
+    "seed": 0,
+}
+
+MODULES_PER_PACKAGE = 32
+STANDARD_AXIOMS = ["propext", "Classical.choice", "Quot.sound"]
+ALLOWED_AXIOMS = ",".join(STANDARD_AXIOMS)
+# Declaration kinds and edge kinds, with their weights in the example projects
+KINDS = (["thm", "def", "inductive"], [80, 17, 3])
+EDGE_KINDS = (["value", "type"], [65, 35])
+
+
+def parse_count(text: str) -> int:
+    """1000 from "1000", "1k" or "1K"; 1000000 from "1m"."""
+    text = text.strip().lower().replace("_", "")
+    factor = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if factor > 1 else text) * factor)
+
+
+def format_count(n: int) -> str:
+    """"1k", "100k", "1m" for benchmark labels."""
+    for factor, suffix in ((1_000_000, "m"), (1_000, "k")):
+        if n >= factor and n % factor == 0:
+            return f"{n // factor}{suffix}"
+    return str(n)
+
+
+def module_name(k: int) -> str:
+    return f"Synth.P{k // MODULES_PER_PACKAGE:03d}.M{k:05d}"
+
+
+def log_ref(*parts: str) -> str:
+    """A stand-in log store reference: stable for the same output."""
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+class _JsonArray:
+    """A JSON array written one element at a time."""
+
+    def __init__(self, out: IO[str]):
+        self.out = out
+        self.count = 0
+
+    def add(self, value: Any) -> None:
+        self.out.write(",\n" if self.count else "\n")
+        self.out.write(json.dumps(value, separators=(",", ":")))
+        self.count += 1
+
+
+class _ReportWriter:
+    """A per-tool report written row by row, with the summary at the end."""
+
+    def __init__(self, path: Path, header: Dict[str, Any]):
+        self.out = open(path, "w")
+        self.out.write(json.dumps(header, separators=(",", ":"))[:-1] + ',"declarations":[')
+        self.rows = _JsonArray(self.out)
+        self.passed = 0
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.rows.add(row)
+        self.passed += row["ok"]
+
+    def close(self, **summary: Any) -> None:
+        total = self.rows.count
+        summary = {"total": total, "passed": self.passed, "failed": total - self.passed, **summary}
+        self.out.write(f'\n],"summary":{json.dumps(summary)}}}\n')
+        self.out.close()
+
+
+def generate(out_dir: Path, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Write the files described in the module docstring; the counts."""
+    p = {**DEFAULTS, **params}
+    rng = random.Random(p["seed"])
+    n = p["nodes"]
+    size = max(1, p["module_size"])
+    module_count = -(-n // size)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = "2000-01-01T00:00:00+00:00"  # fixed, so the files only depend on the parameters
+
+    kernel_fail = {k for k in range(module_count) if rng.random() < p["module_failure_rate"]}
+    safeverify_fail = {k for k in range(module_count) if rng.random() < p["module_failure_rate"]}
+
+    graph = open(out_dir / "depgraph.json", "w")
+    graph.write('{"nodes":[')
+    nodes = _JsonArray(graph)
+    edges_tmp = open(out_dir / "depgraph.edges.tmp", "w+")
+    edges = _JsonArray(edges_tmp)
+    kernel_modules = open(out_dir / "kernel_modules.json", "w")
+    kernel_modules.write("[")
+    module_rows = _JsonArray(kernel_modules)
+    paranoia = _ReportWriter(out_dir / "paranoia_report.json",
+                             {"tool": "paranoia", "version": "0.1.0", "timestamp": timestamp,
+                              "log_store": "log-store"})
+    kernel = _ReportWriter(out_dir / "kernel_report.json",
+                           {"tool": "lean4checker", "version": "0.1.0", "timestamp": timestamp,
+                            "log_store": "log-store", "modules_checked": module_count,
+                            "modules_passed": module_count - len(kernel_fail)})
+    safeverify = _ReportWriter(out_dir / "safeverify_report.json",
+                               {"tool": "safeverify", "version": "0.1.0", "timestamp": timestamp,
+                                "log_store": "log-store", "target_dir": "target/.lake/build",
+                                "submit_dir": ".lake/build"})
+
+    project_axioms: List[str] = []
+    counts = {"sorry": 0, "project_axiom_users": 0}
+    whole, fraction = divmod(p["edges_per_node"], 1)
+
+    for k in range(module_count):
+        module = module_name(k)
+        first, last = k * size, min(n, (k + 1) * size)
+        imported = rng.sample(range(k), min(p["fanout"], k))
+        kernel_cmd = f"lake exe lean4checker {module}"
+        safeverify_cmd = (f"lake exe safe_verify target/.lake/build/lib/{module.replace('.', '/')}.olean "
+                          f".lake/build/lib/{module.replace('.', '/')}.olean")
+        kernel_ok = k not in kernel_fail
+        safeverify_ok = k not in safeverify_fail
+        kernel_log = {"stdout": log_ref(module, "replay"), "stderr": log_ref(module, "kernel")}
+        mentioned = f"{module}.d{first}"  # the declaration the failure output names
+
+        for i in range(first, last):
+            short = f"d{i}"
+            full = f"{module}.{short}"
+            axioms: List[str] = []
+            if i == first and (k % 10 == 0):
+                kind = "axiom"
+                project_axioms.append(full)
+            else:
+                kind = rng.choices(*KINDS)[0]
+                axioms = [a for a in STANDARD_AXIOMS if rng.random() < 0.3]
+                if project_axioms and rng.random() < p["axiom_density"]:
+                    axioms.append(rng.choice(project_axioms))
+                    counts["project_axiom_users"] += 1
+            has_sorry = kind != "axiom" and rng.random() < p["sorry_density"]
+            if has_sorry:
+                axioms.append("sorryAx")
+                counts["sorry"] += 1
+            nodes.add({"name": short, "module": module, "kind": kind, "isUnsafe": False,
+                       "hasSorry": has_sorry, "fullName": full, "axioms": axioms})
+
+            # Dependencies: earlier declarations of this module, or of an imported one
+            for _ in range(int(whole) + (rng.random() < fraction)):
+                if i > first and (rng.random() < p["local_edges"] or not imported):
+                    dep = rng.randrange(first, i)
+                elif imported:
+                    m = rng.choice(imported)
+                    dep = rng.randrange(m * size, min(n, (m + 1) * size))
+                else:
+                    continue
+                edges.add({"target": full, "source": f"{module_name(dep // size)}.d{dep}",
+                           "kind": rng.choices(*EDGE_KINDS)[0]})
+
+            if kind in ("thm", "def"):
+                row = {"decl": full, "zone": zone_of(k), "ok": True, "kind": kind, "module": module, "exit": 0,
+                       "cmd": f"lake exe paranoia {full} --allowed-axioms {ALLOWED_AXIOMS} --fail-fast"}
+                bad = [a for a in axioms if a not in STANDARD_AXIOMS and a != "sorryAx"]
+                if has_sorry or bad:
+                    row["ok"] = False
+                    row["exit"] = 1
+                    row["error"] = "sorry: declaration uses sorry" if has_sorry else f"axioms: disallowed axiom {bad[0]}"
+                    row["log"] = {"stdout": log_ref(full, "paranoia"), "stderr": log_ref(module, "build")}
+                paranoia.add(row)
+
+            row = {"decl": full, "module": module, "tool": "lean4checker", "zone": zone_of(k), "ok": kernel_ok,
+                   "checks": ["kernel-replay"], "cmd": kernel_cmd, "exit": 0 if kernel_ok else 1}
+            if kernel_ok:
+                row["notes"] = "Kernel replay successful"
+            else:
+                row["error"] = (f"error: kernel rejected {full}" if full == mentioned
+                                else f"Module {module} kernel replay failed")
+                row["log"] = kernel_log
+            kernel.add(row)
+
+            row = {"decl": full, "module": module, "tool": "safeverify", "zone": zone_of(k), "ok": safeverify_ok,
+                   "cmd": safeverify_cmd, "exit": 0 if safeverify_ok else 1}
+            if safeverify_ok:
+                row["checks"] = ["ref-impl-match"]
+                row["notes"] = "Reference and implementation match"
+            else:
+                row["checks"] = ["statement-changed"]
+                row["error"] = (f"statement changed: {full}" if full == mentioned
+                                else f"Module {module} verification failed: statement-changed")
+                row["log"] = {"stdout": log_ref(module, "safeverify")}
+            safeverify.add(row)
+
+        module_rows.add({"module": module, "ok": kernel_ok, "cmd": kernel_cmd,
+                         "stdout": f"replaying {module}",
+                         "stderr": "" if kernel_ok else f"error: kernel rejected {mentioned}",
+                         "returncode": 0 if kernel_ok else 1,
+                         "log": {"stdout": kernel_log["stdout"]} if kernel_ok else kernel_log})
+
+    # Edges go after the nodes
+    graph.write('\n],"edges":[')
+    edges_tmp.seek(0)
+    shutil.copyfileobj(edges_tmp, graph)
+    edges_tmp.close()
+    (out_dir / "depgraph.edges.tmp").unlink()
+    graph.write("\n]}\n")
+    graph.close()
+    kernel_modules.write("\n]\n")
+    kernel_modules.close()
+    paranoia.close(mode="summary")
+    kernel.close()
+    safeverify.close()
+
+    (out_dir / "policy.yaml").write_text(
+        "zones:\n"
+        "  - name: Core\n"
+        "    include: [\"Synth.P000.*\"]\n"
+        "  - name: Library\n"
+        "    include: [\"Synth.P00[1-9].*\"]\n"
+        "  - name: Rest\n"
+        "    include: [\"Synth.*\"]\n"
+        "    exclude: [\"Synth.P00?.*\"]\n"
+    )
+
+    result = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "params": p,
+        "nodes": n,
+        "edges": edges.count,
+        "modules": module_count,
+        "project_axioms": len(project_axioms),
+        "sorry": counts["sorry"],
+        "project_axiom_users": counts["project_axiom_users"],
+        "kernel_failed_modules": len(kernel_fail),
+        "safeverify_failed_modules": len(safeverify_fail),
+    }
+    (out_dir / "synth.json").write_text(json.dumps(result, indent=2) + "\n")
+    return result
+
+
+def zone_of(k: int) -> str:
+    """The policy.yaml zone of module k."""
+    package = k // MODULES_PER_PACKAGE
+    return "Core" if package == 0 else "Library" if package < 10 else "Rest"
+
+
+def ensure(out_dir: Path, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate into `out_dir` unless it already holds the data for these parameters."""
+    p = {**DEFAULTS, **params}
+    try:
+        existing = json.loads((out_dir / "synth.json").read_text())
+        if existing.get("version") == FORMAT_VERSION and existing.get("params") == p:
+            return existing
+    except (OSError, ValueError):
+        pass
+    return generate(out_dir, p)
+
+
+def add_synth_arguments(parser: argparse.ArgumentParser) -> None:
+    """Generator parameters (shared with benchmark.py)."""
+    parser.add_argument("--module-size", type=int, default=DEFAULTS["module_size"],
+                        help=f"Declarations per module (default: {DEFAULTS['module_size']})")
+    parser.add_argument("--edges-per-node", type=float, default=DEFAULTS["edges_per_node"],
+                        help=f"Mean dependencies per declaration (default: {DEFAULTS['edges_per_node']:g})")
+    parser.add_argument("--fanout", type=int, default=DEFAULTS["fanout"],
+                        help=f"Modules each module imports (default: {DEFAULTS['fanout']})")
+    parser.add_argument("--local-edges", type=float, default=DEFAULTS["local_edges"],
+                        help=f"Fraction of dependencies within the module (default: {DEFAULTS['local_edges']:g})")
+    parser.add_argument("--axiom-density", type=float, default=DEFAULTS["axiom_density"],
+                        help=f"Fraction of declarations using a project axiom (default: {DEFAULTS['axiom_density']:g})")
+    parser.add_argument("--sorry-density", type=float, default=DEFAULTS["sorry_density"],
+                        help=f"Fraction of declarations using sorry (default: {DEFAULTS['sorry_density']:g})")
+    parser.add_argument("--module-failure-rate", type=float, default=DEFAULTS["module_failure_rate"],
+                        help=f"Fraction of modules failing lean4checker / SafeVerify "
+                             f"(default: {DEFAULTS['module_failure_rate']:g})")
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"], help="Random seed (default: 0)")
+
+
+def params_from_args(args: argparse.Namespace) -> Dict[str, Any]:
+    return {key: getattr(args, key) for key in DEFAULTS if key != "nodes"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic depgraph and checker reports")
+    parser.add_argument("--nodes", default=format_count(DEFAULTS["nodes"]),
+                        help=f"Number of declarations, e.g. 5000, 100k, 1m (default: {format_count(DEFAULTS['nodes'])})")
+    parser.add_argument("--out-dir", required=True, help="Directory for the generated files")
+    add_synth_arguments(parser)
+
+    args = parser.parse_args()
+
+    try:
+        nodes = parse_count(args.nodes)
+    except ValueError:
+        print(f"Error: Not a node count: {args.nodes}", file=sys.stderr)
+        return 1
+    if nodes < 1:
+        print("Error: --nodes must be at least 1", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    result = generate(Path(args.out_dir), {**params_from_args(args), "nodes": nodes})
+    print(f"✓ Generated {result['nodes']} declarations, {result['edges']} edges, {result['modules']} modules "
+          f"in {time.perf_counter() - start:.1f}s")
+    print(f"  sorry: {result['sorry']}, project axiom users: {result['project_axiom_users']}, "
+          f"failed modules: {result['kernel_failed_modules']} (lean4checker), "
+          f"{result['safeverify_failed_modules']} (SafeVerify)")
+    print(f"  Written to {args.out_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -11,110 +11,466 @@ Usage:
         --depgraph depgraph.json \
         --report paranoia_report.json \
         --output standalone.html
+
+    # Lay out the DOT offline (needs Graphviz) so the viewer draws it directly
+    python scripts/embed_data.py --depgraph depgraph.json --dot depgraph.dot --layout --output standalone.html
+
+    # gzip the embedded data (decoded in the browser with DecompressionStream)
+    python scripts/embed_data.py --depgraph depgraph.json --dot depgraph.dot --layout --compress --output standalone.html
+
+    # Static bundle: module index in index.html, per-module data loaded on demand
+    python scripts/embed_data.py --depgraph depgraph.json --report report.json --dot depgraph.dot --bundle site/
+
+Checker logs (log_store.py) are not embedded. A standalone HTML file records
+where the report is relative to itself, and the viewer fetches a log from the
+report's log store when it is opened; a bundle gets a copy of the logs its
+report refers to under data/log-store.
 """
 
 import argparse
+import base64
 import json
+import os
+import subprocess
+import shutil
 import sys
+import zlib
+from array import array
 from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from compact_report import is_plain_json, load_report
+from depgraph_core import DepGraph
+from depgraph_sidecar import top_level_aliases
+from graph_index import build_graph_index, encode_array
+from graph_layout import DEFAULT_CACHE_DIR as DEFAULT_LAYOUT_CACHE, compute_layout
+from log_store import LogStore, copy_logs
+from search_index import build_search_index
+
+BUNDLE_FORMAT = "leandepviz-bundle"
+BUNDLE_VERSION = 1
+NO_MODULE = 0xFFFFFFFF  # graph index moduleOf entry for edge endpoints that are not nodes
+CHUNK_CHARS = 1 << 20  # payloads are copied to the output this many characters at a time
+LIBRARY_MARKER = '    <!-- Load d3-graphviz libraries at end of body'
+NOTICE = """<!--
+    Standalone LeanDepViz Report
+    Generated with embedded dependency graph and verification results.
+    
+    This file is self-contained and can be opened directly in a browser
+    or hosted on any static file server (GitHub Pages, Vercel, Netlify, etc.)
+    
+    No backend required - all processing happens client-side.
+-->
+"""
+
+
+def read_chunks(path: Path) -> Iterator[str]:
+    """Text of a file in pieces of at most CHUNK_CHARS characters."""
+    with open(path, encoding="utf-8") as f:
+        while True:
+            chunk = f.read(CHUNK_CHARS)
+            if not chunk:
+                return
+            yield chunk
+
+
+def report_chunks(path: Path) -> Iterable[str]:
+    """
+    A report as JSON text for embedding, in pieces.
+
+    Plain JSON is copied verbatim; compact or compressed reports are decoded
+    back to the plain structure the viewer expects.
+    """
+    if is_plain_json(path):
+        return read_chunks(path)
+    return json.JSONEncoder(separators=(",", ":")).iterencode(load_report(path))
+
+
+def read_layout_json(layout: str, dot_path: Optional[Path], cache_dir: Path) -> Optional[str]:
+    """
+    Layout JSON text to embed, or None.
+
+    `layout` is a layout file written by graph_layout.py, or "auto" to lay out
+    the DOT file now (cached in `cache_dir`).
+    """
+    if layout != "auto":
+        return Path(layout).read_text()
+    if not dot_path or not dot_path.exists():
+        print("⚠ --layout needs a DOT file (--dot); skipping layout", file=sys.stderr)
+        return None
+    try:
+        return json.dumps(compute_layout(dot_path.read_text(), cache_dir=cache_dir), separators=(",", ":"))
+    except RuntimeError as e:
+        print(f"⚠ {e}; the viewer will lay out the graph in the browser", file=sys.stderr)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        print(f"⚠ Graphviz layout failed ({e}); the viewer will lay out the graph in the browser", file=sys.stderr)
+    return None
+
+
+# Escape for JS string: backslashes, quotes, newlines
+JS_STRING_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": None})
+
+
+def js_string_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    """Text as a double-quoted JavaScript string literal, escaped piece by piece."""
+    yield '"'
+    for chunk in chunks:
+        yield chunk.translate(JS_STRING_ESCAPES)
+    yield '"'
 
 
-def embed_data(viewer_path: Path, depgraph_path: Path, report_path: Path, dot_path: Path, svg_path: Path, output_path: Path):
+def script_safe(chunks: Iterable[str]) -> Iterator[str]:
     """
-    Create standalone HTML by embedding JSON, DOT, and SVG data into the viewer.
+    Break up "</" so embedded text cannot end the <script> element early.
+
+    "<\\/" means the same inside JSON and JavaScript strings, and "</" cannot
+    occur outside them. A "<" at the end of a piece is held back until the
+    next piece shows whether a "/" follows.
+    """
+    held = ""
+    for chunk in chunks:
+        chunk = held + chunk
+        held = "<" if chunk.endswith("<") else ""
+        yield (chunk[:-1] if held else chunk).replace("</", "<\\/")
+    yield held
+
+
+def gzip_base64_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    """Text gzipped and base64-encoded incrementally, as a JavaScript string literal."""
+    compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container, mtime 0
+    pending = b""
+    yield '"'
+    for chunk in chunks:
+        pending += compressor.compress(chunk.encode("utf-8"))
+        # Encode whole 3-byte groups so the pieces concatenate to one base64 string
+        cut = len(pending) - len(pending) % 3
+        if cut:
+            yield base64.b64encode(pending[:cut]).decode("ascii")
+            pending = pending[cut:]
+    yield base64.b64encode(pending + compressor.flush()).decode("ascii")
+    yield '"'
+
+
+def split_template(viewer_html: str) -> Tuple[str, str]:
+    """Split the viewer where embedded scripts go: before the library scripts (they must load last)."""
+    at = viewer_html.find(LIBRARY_MARKER)
+    if at < 0:
+        # Fallback: insert before </body> if marker not found
+        at = viewer_html.find('</body>')
+    if at < 0:
+        at = len(viewer_html)
+    return viewer_html[:at], viewer_html[at:]
+
+
+def report_rows(report: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Per-declaration rows of a unified or legacy report."""
+    if not report:
+        return []
+    return report.get("declarations", report.get("results", []))
+
+
+def split_by_module(depgraph: Dict[str, Any], report: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Group nodes, edges and report rows by module.
+
+    Each chunk also lists the node IDs (positions in the depgraph's node list)
+    of its nodes, which is how the graph and search indices refer to them.
+
+    Edges go with the module of their source; report rows with the module of
+    the declaration they check ("" when it is not in the graph).
     """
-    # Read the viewer HTML
-    viewer_html = viewer_path.read_text()
-
-    # Read JSON data
-    depgraph_data = depgraph_path.read_text() if depgraph_path.exists() else "null"
-    report_data = report_path.read_text() if report_path.exists() else "null"
-
-    # Read DOT data and escape for JavaScript string
-    dot_data = "null"
-    if dot_path and dot_path.exists():
-        raw_dot = dot_path.read_text()
-        # Escape for JS string: backslashes, quotes, newlines
-        escaped_dot = raw_dot.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '')
-        dot_data = f'"{escaped_dot}"'
-
-    # Read SVG data and escape for JavaScript string
-    svg_data = "null"
-    if svg_path and svg_path.exists():
-        raw_svg = svg_path.read_text()
-        # Escape for JS string: backslashes, quotes, newlines
-        escaped_svg = raw_svg.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '')
-        svg_data = f'"{escaped_svg}"'
-
-    # Create embedded data script
+    nodes = depgraph.get("nodes", [])
+    aliases = top_level_aliases(nodes)
+    module_of = {n["fullName"]: n.get("module", "") for n in nodes}
+    module_of.update((name, nodes[i].get("module", "")) for name, i in aliases.items())
+
+    chunks: Dict[str, Dict[str, Any]] = {}
+
+    def chunk(module: str) -> Dict[str, Any]:
+        if module not in chunks:
+            chunks[module] = {"module": module, "nodes": [], "ids": [], "edges": [], "rows": []}
+        return chunks[module]
+
+    for v, n in enumerate(nodes):
+        c = chunk(n.get("module", ""))
+        c["nodes"].append(n)
+        c["ids"].append(v)  # position in the full node list, as in the graph and search indices
+    for e in depgraph.get("edges", []):
+        chunk(module_of.get(e["source"], ""))["edges"].append(e)
+    for row in report_rows(report):
+        chunk(module_of.get(row.get("decl", ""), ""))["rows"].append(row)
+    return chunks
+
+
+def module_summary(chunk: Dict[str, Any]) -> Dict[str, Any]:
+    """Counts the viewer shows for a module before its chunk is loaded."""
+    # Like the viewer, only count results for declarations that are in the graph
+    names = {n["fullName"] for n in chunk["nodes"]}
+    rows = [r for r in chunk["rows"] if r.get("decl") in names]
+    return {
+        "name": chunk["module"],
+        "declarations": len(chunk["nodes"]),
+        "edges": len(chunk["edges"]),
+        "checked": len(rows),
+        "passed": sum(1 for r in rows if r.get("ok")),
+        "failed": sum(1 for r in rows if not r.get("ok")),
+        "sorry": sum(1 for n in chunk["nodes"] if n.get("hasSorry")),
+        "axioms": sum(1 for n in chunk["nodes"] if n.get("axioms")),
+        "unsafe": sum(1 for n in chunk["nodes"] if n.get("isUnsafe")),
+        "zones": sorted({r["zone"] for r in rows if r.get("zone")}),
+    }
+
+
+def is_bundle(bundle_dir: Path) -> bool:
+    """Whether `bundle_dir` holds a bundle written by write_bundle (its index.html carries the marker)."""
+    index = bundle_dir / "index.html"
+    return index.is_file() and f'"format":"{BUNDLE_FORMAT}"' in index.read_text(errors="replace")
+
+
+def write_bundle(viewer_path: Path, depgraph_path: Path, report_path: Optional[Path], dot_path: Optional[Path],
+                 svg_path: Optional[Path], bundle_dir: Path, layout_data: Optional[str] = None,
+                 graph_index: Optional[Dict[str, Any]] = None, search_index: Optional[Dict[str, Any]] = None):
+    """
+    Write a static multi-file bundle that the viewer loads module by module.
+
+        bundle_dir/index.html            viewer with the module index inlined
+        bundle_dir/data/modules/N.json   nodes, edges and report rows of one module
+        bundle_dir/data/graph.dot        optional graph files, fetched after first paint
+        bundle_dir/data/layout.json
+        bundle_dir/data/preview.svg
+        bundle_dir/data/graph-index.json (graph_index.py, with names and the
+                                          module list position of every vertex)
+        bundle_dir/data/search-index.json (search_index.py)
+
+    The index holds per-module counts and pass/fail rollups plus the report
+    metadata, so its size grows with the number of modules, not declarations.
+
+    An existing data/ and index.html are only replaced when they are from a
+    previous bundle (see is_bundle); the caller checks that first.
+    """
+    with open(depgraph_path) as f:
+        depgraph = json.load(f)
+    report = load_report(report_path) if report_path and report_path.exists() else None
+    chunks = split_by_module(depgraph, report)
+
+    # Files go to a staging directory that replaces data/ once the bundle is complete
+    data_dir = bundle_dir / "data"
+    staging = bundle_dir / ".data.tmp"
+    if staging.exists():
+        shutil.rmtree(staging)
+    (staging / "modules").mkdir(parents=True)
+
+    modules = []
+    for k, name in enumerate(sorted(chunks)):
+        chunk = chunks[name]
+        path = f"data/modules/{k:05d}.json"
+        with open(staging / "modules" / f"{k:05d}.json", "w") as f:
+            json.dump(chunk, f, separators=(",", ":"))
+        modules.append({**module_summary(chunk), "chunk": path})
+
+    files = {}
+    for key, source, name in (("dot", dot_path, "graph.dot"), ("svg", svg_path, "preview.svg")):
+        if source and source.exists():
+            shutil.copyfile(source, staging / name)
+            files[key] = f"data/{name}"
+    if layout_data:
+        (staging / "layout.json").write_text(layout_data)
+        files["layout"] = "data/layout.json"
+    if graph_index:
+        position = {m["name"]: k for k, m in enumerate(modules)}
+        module_of = array("I", [NO_MODULE]) * graph_index["vertexCount"]
+        for v, node in enumerate(depgraph.get("nodes", [])):
+            module_of[v] = position[node.get("module", "")]
+        graph_index = {**graph_index, "moduleOf": encode_array(module_of)}
+        (staging / "graph-index.json").write_text(json.dumps(graph_index, separators=(",", ":")))
+        files["graphIndex"] = "data/graph-index.json"
+    if search_index:
+        (staging / "search-index.json").write_text(json.dumps(search_index, separators=(",", ":")))
+        files["searchIndex"] = "data/search-index.json"
+
+    logs_copied = 0
+    if report and (report.get("log_store") or report.get("log_stores")):
+        # References are content hashes, so the logs of every tool share one store
+        logs_copied = copy_logs(report_path, report, LogStore(staging / "log-store"))
+        if report.get("log_store"):
+            report["log_store"] = "data/log-store"
+        if report.get("log_stores"):
+            report["log_stores"] = {tool: "data/log-store" for tool in report["log_stores"]}
+
+    index = {
+        "format": BUNDLE_FORMAT,
+        "version": BUNDLE_VERSION,
+        "modules": modules,
+        "files": files,
+        # Report without its rows (tools, summary, ...); rows come with the modules
+        "report": {k: v for k, v in report.items() if k not in ("declarations", "results")} if report else None,
+        "reportKey": "results" if report and "results" in report and "declarations" not in report else "declarations",
+    }
+    index_text = json.dumps(index, separators=(",", ":"))
+
     embedded_script = f"""
+    <script>
+        // Bundle index - generated by embed_data.py --bundle
+        window.EMBEDDED_BUNDLE = {index_text};
+    </script>
+    """
+    head, tail = split_template(viewer_path.read_text())
+    if data_dir.exists():
+        old = bundle_dir / ".data.old"
+        if old.exists():
+            shutil.rmtree(old)
+        os.replace(data_dir, old)
+        os.replace(staging, data_dir)
+        shutil.rmtree(old)
+    else:
+        os.replace(staging, data_dir)
+    (bundle_dir / "index.html").write_text(f"{NOTICE}{head}{embedded_script}\n{tail}")
+
+    chunk_sizes = [(bundle_dir / m["chunk"]).stat().st_size for m in modules]
+    print(f"✓ Created report bundle: {bundle_dir}")
+    print(f"  - index.html with {len(modules)} modules ({len(index_text) / 1024:.1f}KB index)")
+    print(f"  - {len(chunk_sizes)} module chunks, largest {max(chunk_sizes, default=0) / 1024:.1f}KB, "
+          f"total {sum(chunk_sizes) / 1024:.1f}KB")
+    for key in files:
+        print(f"  - {files[key]}")
+    if logs_copied:
+        print(f"  - data/log-store ({logs_copied} checker logs)")
+    print(f"\nServe the directory from any static host (browsers do not fetch chunks over file://), e.g.:")
+    print(f"  python -m http.server -d {bundle_dir}")
+
+
+def write_payloads(out: IO[str], payloads: Dict[str, Tuple[str, Iterable[str], bool]], compress: bool) -> int:
+    """
+    Write the window.EMBEDDED_* assignments, streaming each payload.
+
+    Returns the number of characters of compressed data written (0 without `compress`).
+    """
+    names = ["EMBEDDED_DEPGRAPH", "EMBEDDED_REPORT", "EMBEDDED_DOT", "EMBEDDED_SVG", "EMBEDDED_LAYOUT",
+             "EMBEDDED_GRAPH_INDEX", "EMBEDDED_SEARCH_INDEX"]
+    written = 0
+    if compress:
+        for name in names:
+            out.write(f"        window.{name} = null;\n")
+        out.write("        window.EMBEDDED_COMPRESSED = {")
+        for i, (key, (_, chunks, _)) in enumerate(payloads.items()):
+            out.write(f'{", " if i else ""}"{key}": ')
+            for piece in gzip_base64_chunks(chunks):
+                written += len(piece)
+                out.write(piece)
+        out.write("};\n")
+        return written
+
+    by_name = {name: (chunks, is_json) for name, chunks, is_json in payloads.values()}
+    for name in names:
+        out.write(f"        window.{name} = ")
+        if name not in by_name:
+            out.write("null")
+        else:
+            chunks, is_json = by_name[name]
+            for piece in script_safe(chunks if is_json else js_string_chunks(chunks)):
+                out.write(piece)
+        out.write(";\n")
+    out.write("        window.EMBEDDED_COMPRESSED = null;\n")
+    return written
+
+
+def embed_data(viewer_path: Path, depgraph_path: Path, report_path: Path, dot_path: Path, svg_path: Path, output_path: Path,
+               layout_data: Optional[str] = None, compress: bool = False, graph_index: Optional[str] = None,
+               search_index: Optional[str] = None):
+    """
+    Create standalone HTML by embedding JSON, DOT, SVG, layout, graph index and search index data into the viewer.
+
+    The output is streamed to disk: inputs are copied in pieces and escaped on
+    the way, so memory use does not grow with the size of the inputs.
+
+    With `compress`, every payload is embedded gzipped and base64-encoded in
+    window.EMBEDDED_COMPRESSED, and the SVG preview is left out when a layout is
+    embedded (the viewer draws the preview from the layout).
+    """
+    head, tail = split_template(viewer_path.read_text())
+
+    has_report = bool(report_path and report_path.exists())
+    has_dot = bool(dot_path and dot_path.exists())
+    has_svg = bool(svg_path and svg_path.exists())
+    svg_skipped = compress and has_svg and layout_data is not None
+
+    # name -> (JS global, text pieces, is JSON) for every input present
+    payloads: Dict[str, Tuple[str, Iterable[str], bool]] = {}
+    if depgraph_path.exists():
+        payloads["depgraph"] = ("EMBEDDED_DEPGRAPH", read_chunks(depgraph_path), True)
+    if has_report:
+        payloads["report"] = ("EMBEDDED_REPORT", report_chunks(report_path), True)
+    if has_dot:
+        payloads["dot"] = ("EMBEDDED_DOT", read_chunks(dot_path), False)
+    if has_svg and not svg_skipped:
+        payloads["svg"] = ("EMBEDDED_SVG", read_chunks(svg_path), False)
+    if layout_data:
+        payloads["layout"] = ("EMBEDDED_LAYOUT", [layout_data], True)
+    if graph_index:
+        payloads["graphIndex"] = ("EMBEDDED_GRAPH_INDEX", [graph_index], True)
+    if search_index:
+        payloads["searchIndex"] = ("EMBEDDED_SEARCH_INDEX", [search_index], True)
+
+    with open(output_path, "w", encoding="utf-8") as out:
+        out.write(NOTICE)
+        out.write(head)
+        out.write("""
     <script>
         // Embedded data - generated by embed_data.py
-        window.EMBEDDED_DEPGRAPH = {depgraph_data};
-        window.EMBEDDED_REPORT = {report_data};
-        window.EMBEDDED_DOT = {dot_data};
-        window.EMBEDDED_SVG = {svg_data};
-        
+""")
+        compressed_size = write_payloads(out, payloads, compress)
+        if has_report:
+            # Log store paths in the report are relative to the report file
+            base = Path(os.path.relpath(report_path.resolve().parent, output_path.resolve().parent)).as_posix()
+            out.write(f"        window.EMBEDDED_REPORT_BASE = {json.dumps(base)};\n")
+        out.write("""        
         // Auto-load embedded data on page load
-        document.addEventListener('DOMContentLoaded', function() {{
-            if (window.EMBEDDED_DEPGRAPH) {{
+        document.addEventListener('DOMContentLoaded', function() {
+            if (window.EMBEDDED_DEPGRAPH) {
                 console.log('Loading embedded dependency graph...');
                 graphData = window.EMBEDDED_DEPGRAPH;
-            }}
-            if (window.EMBEDDED_REPORT) {{
+            }
+            if (window.EMBEDDED_REPORT) {
                 console.log('Loading embedded paranoia report...');
                 reportData = window.EMBEDDED_REPORT;
-            }}
-            if (window.EMBEDDED_DOT) {{
+            }
+            if (window.EMBEDDED_DOT) {
                 console.log('Loading embedded DOT data...');
                 dotData = window.EMBEDDED_DOT;
-            }}
-            if (window.EMBEDDED_DEPGRAPH) {{
+            }
+            if (window.EMBEDDED_DEPGRAPH) {
                 updateView();
-            }}
-        }});
+            }
+        });
     </script>
-    """
-    
-    # Insert embedded data script before library scripts (they must load last)
-    library_marker = '    <!-- Load d3-graphviz libraries at end of body'
-    if library_marker in viewer_html:
-        output_html = viewer_html.replace(library_marker, f'{embedded_script}\n    {library_marker}')
-    elif '</body>' in viewer_html:
-        # Fallback: insert before </body> if marker not found
-        output_html = viewer_html.replace('</body>', f'{embedded_script}\n</body>')
-    else:
-        output_html = viewer_html + embedded_script
-    
-    # Add notice at the top
-    notice = """<!--
-    Standalone LeanDepViz Report
-    Generated with embedded dependency graph and verification results.
-    
-    This file is self-contained and can be opened directly in a browser
-    or hosted on any static file server (GitHub Pages, Vercel, Netlify, etc.)
-    
-    No backend required - all processing happens client-side.
--->
-"""
-    output_html = notice + output_html
     
-    # Write output
-    output_path.write_text(output_html)
-    print(f"✓ Created standalone HTML: {output_path}")
+""")
+        out.write(tail)
+
+    print(f"✓ Created standalone HTML: {output_path} ({output_path.stat().st_size / 1024:.1f}KB)")
     print(f"  - Embedded dependency graph: {depgraph_path}")
-    if report_path and report_path.exists():
+    if has_report:
         print(f"  - Embedded paranoia report: {report_path}")
     else:
         print(f"  - No paranoia report (file not found)")
-    if dot_path and dot_path.exists():
+    if has_dot:
         print(f"  - Embedded DOT graph: {dot_path}")
     else:
         print(f"  - No DOT graph (file not found)")
-    if svg_path and svg_path.exists():
+    if svg_skipped:
+        print(f"  - SVG preview not embedded (drawn from the layout instead): {svg_path}")
+    elif has_svg:
         print(f"  - Embedded SVG preview: {svg_path}")
     else:
         print(f"  - No SVG preview (file not found)")
+    if layout_data:
+        print(f"  - Embedded precomputed layout ({len(layout_data) / 1024:.1f}KB)")
+    if graph_index:
+        print(f"  - Embedded adjacency/cone index ({len(graph_index) / 1024:.1f}KB)")
+    if search_index:
+        print(f"  - Embedded search index ({len(search_index) / 1024:.1f}KB)")
+    if compress:
+        print(f"  - Payloads gzip-compressed ({compressed_size / 1024:.1f}KB embedded)")
     print(f"\nYou can now:")
     print(f"  1. Open locally: open {output_path}")
     print(f"  2. Share the file directly")
@@ -138,7 +494,7 @@ def main():
     parser.add_argument(
         "--report",
         default="paranoia_report.json",
-        help="Path to paranoia report JSON file (optional)"
+        help="Path to paranoia report JSON file (optional; plain or compact, optionally .gz/.zst)"
     )
     parser.add_argument(
         "--dot",
@@ -150,13 +506,68 @@ def main():
         default="",
         help="Path to SVG preview file (optional, for large graphs)"
     )
+    parser.add_argument(
+        "--layout",
+        nargs="?",
+        const="auto",
+        default="",
+        help="Embed a precomputed layout: a graph_layout.py output file, or no value to lay out --dot now (requires Graphviz)"
+    )
+    parser.add_argument(
+        "--layout-cache",
+        default=DEFAULT_LAYOUT_CACHE,
+        help=f"Cache directory for computed layouts (default: {DEFAULT_LAYOUT_CACHE})"
+    )
+    parser.add_argument(
+        "--graph-index",
+        action="store_true",
+        default=None,
+        help="Embed the adjacency/cone index (graph_index.py); it needs the whole graph in memory "
+             "unless a depgraph_sidecar.py sidecar exists, so single-file output leaves it out by default"
+    )
+    parser.add_argument(
+        "--no-graph-index",
+        dest="graph_index",
+        action="store_false",
+        help="Do not write the adjacency/cone index into a --bundle (bundles include it by default)"
+    )
+    parser.add_argument(
+        "--search-index",
+        action="store_true",
+        default=None,
+        help="Embed the search/filter index (search_index.py); it needs the whole graph and report in memory, "
+             "so single-file output leaves it out by default and the viewer scans every name"
+    )
+    parser.add_argument(
+        "--no-search-index",
+        dest="search_index",
+        action="store_false",
+        help="Do not write the search/filter index into a --bundle (bundles include it by default)"
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Embed the data gzip-compressed; the viewer decodes it with DecompressionStream"
+    )
     parser.add_argument(
         "--output",
         default="standalone-report.html",
         help="Output path for standalone HTML file"
     )
+    parser.add_argument(
+        "--bundle",
+        default="",
+        help="Write a static multi-file bundle to this directory instead of one HTML file"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="With --bundle, replace an index.html and data/ that are not from a previous bundle"
+    )
 
     args = parser.parse_args()
+    if args.bundle and args.compress:
+        parser.error("--compress applies to single-file output; static hosts compress bundle files themselves")
 
     # Convert to Path objects
     viewer_path = Path(args.viewer)
@@ -175,8 +586,46 @@ def main():
         print(f"Error: Dependency graph not found: {depgraph_path}", file=sys.stderr)
         sys.exit(1)
     
+    layout_data = None
+    if args.layout:
+        if args.layout != "auto" and not Path(args.layout).exists():
+            print(f"Error: Layout file not found: {args.layout}", file=sys.stderr)
+            sys.exit(1)
+        layout_data = read_layout_json(args.layout, dot_path, Path(args.layout_cache))
+
+    # write_bundle holds the whole graph and report anyway; the single-file writer streams them
+    if args.graph_index is None:
+        args.graph_index = bool(args.bundle)
+    if args.search_index is None:
+        args.search_index = bool(args.bundle)
+
+    graph = DepGraph.load(depgraph_path) if args.graph_index or args.search_index else None
+    graph_index = None
+    if args.graph_index:
+        # Bundles have no full node list in the browser, so their index carries the names
+        graph_index = build_graph_index(graph, names=bool(args.bundle))
+    search_index = None
+    if args.search_index:
+        report = load_report(report_path) if report_path and report_path.exists() else None
+        search_index = build_search_index(graph, report)
+
+    if args.bundle:
+        bundle_dir = Path(args.bundle)
+        existing = [name for name in ("index.html", "data") if (bundle_dir / name).exists()]
+        if existing and not args.force and not is_bundle(bundle_dir):
+            print(f"Error: {bundle_dir} already has {' and '.join(existing)} that are not from a previous bundle; "
+                  "use --force to replace them", file=sys.stderr)
+            sys.exit(1)
+        bundle_dir.mkdir(parents=True, exist_ok=True)
+        write_bundle(viewer_path, depgraph_path, report_path, dot_path, svg_path, bundle_dir, layout_data,
+                     graph_index, search_index)
+        return
+
     # Generate standalone HTML
-    embed_data(viewer_path, depgraph_path, report_path, dot_path, svg_path, output_path)
+    embed_data(viewer_path, depgraph_path, report_path, dot_path, svg_path, output_path, layout_data,
+               compress=args.compress,
+               graph_index=json.dumps(graph_index, separators=(",", ":")) if graph_index else None,
+               search_index=json.dumps(search_index, separators=(",", ":")) if search_index else None)
 
 
 if __name__ == "__main__":
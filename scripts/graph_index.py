@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Precomputed adjacency and cone indices for the viewer.
+
+The viewer answers "what does this use", "what uses this" and "how much
+depends on it" from this index instead of scanning the edge list. It holds the
+forward and reverse CSR adjacency of DepGraph plus per-vertex topological ranks
+and cone sizes, with every array stored as base64 little-endian uint32 (uint8
+for edge kinds) so the browser can wrap it in a typed array without parsing:
+
+    {
+        "format": "leandepviz-graph-index",
+        "version": 1,
+        "nodeCount": 1129,          # vertex IDs 0..nodeCount-1 are the depgraph nodes in order
+        "vertexCount": 1131,        # IDs after that are edge endpoints that are not nodes
+        "extraNames": ["Foo.bar", ...],
+        "edgeKinds": ["type", "value"],
+        "outOffsets": "...", "outTargets": "...", "outKinds": "...",   # dependents of v
+        "inOffsets": "...",  "inSources": "...",  "inKinds": "...",    # dependencies of v
+        "rank": "...",              # SCC index in topological order (dependencies first)
+        "ancestors": "...",         # size of the ancestor cone, v itself excluded
+        "descendants": "..."        # size of the descendant cone, v itself excluded
+    }
+
+With names=True the index also lists every vertex name under "names", for
+viewers that do not have the full node list. Static bundles (embed_data.py
+--bundle) use that and add "moduleOf", each vertex's position in the bundle's
+module list, so the viewer knows which chunk to fetch for a declaration.
+
+embed_data.py embeds this index with --graph-index; bundles (--bundle) include
+it by default, unless --no-graph-index is given.
+
+Usage:
+    python scripts/graph_index.py depgraph.json --out graph-index.json [--names]
+"""
+
+import argparse
+import base64
+import json
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict
+
+from depgraph_core import DepGraph
+
+FORMAT_NAME = "leandepviz-graph-index"
+FORMAT_VERSION = 1
+
+
+def encode_array(values: array) -> str:
+    """Array contents as base64, little-endian."""
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode("ascii")
+
+
+def build_graph_index(graph: DepGraph, names: bool = False) -> Dict[str, Any]:
+    """Index of `graph` in the format described in the module docstring."""
+    comp_of, _, _ = graph.condensation()
+    ancestors, descendants = graph.cone_sizes()
+    n = graph.vertex_count
+
+    index: Dict[str, Any] = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "nodeCount": graph.node_count,
+        "vertexCount": n,
+        "extraNames": list(graph.full_names[graph.node_count:n]),
+        "edgeKinds": list(graph.edge_kinds),
+    }
+    if names:
+        index["names"] = list(graph.full_names[:n])
+    columns = {
+        "outOffsets": graph.out_offsets[:n + 1],
+        "outTargets": graph.out_targets,
+        "outKinds": graph.out_kinds,
+        "inOffsets": graph.in_offsets[:n + 1],
+        "inSources": graph.in_sources,
+        "inKinds": graph.in_kinds,
+        "rank": comp_of,
+        "ancestors": ancestors,
+        "descendants": descendants,
+    }
+    for key, values in columns.items():
+        index[key] = encode_array(values if isinstance(values, array) else array("I", values))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute adjacency and cone indices for the viewer")
+    parser.add_argument("depgraph", help="Path to dependency graph JSON")
+    parser.add_argument("--out", required=True, help="Output index JSON path")
+    parser.add_argument("--names", action="store_true", help="Include every vertex name")
+
+    args = parser.parse_args()
+
+    depgraph_path = Path(args.depgraph)
+    if not depgraph_path.exists():
+        print(f"Error: Dependency graph not found: {depgraph_path}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    graph = DepGraph.load(depgraph_path)
+    index = build_graph_index(graph, names=args.names)
+    with open(args.out, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    print(f"✓ Graph index written to {args.out} ({Path(args.out).stat().st_size / 1024:.1f}KB)")
+    print(f"  {graph.vertex_count} vertices, {graph.edge_count} edges")
+    print(f"  Time: {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
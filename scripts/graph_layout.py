@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Offline Graphviz layout in a compact form the viewer can draw directly.
+
+The viewer normally lays out the embedded DOT in the browser with d3-graphviz
+(Graphviz compiled to WASM), which freezes the tab for large graphs. This script
+runs the layout once with the native `dot -Tjson0` and keeps only what is needed
+to draw it:
+
+    {
+        "format": "leandepviz-layout",
+        "version": 1,
+        "width": 1234.5, "height": 678.9,           # points, y axis pointing down
+        "colors": ["#bbbbbb", "#e6972b", ...],
+        "nodes": {
+            "names":    ["Foo.bar", ...],
+            "labels":   ["bar\\nUSES AXIOM", ...],
+            "color":    [0, 1, ...],                  # index into colors
+            "geometry": [x, y, w, h, x, y, w, h, ...] # centre and size per node
+        },
+        "edges": {
+            "ends":    [tail, head, tail, head, ...], # node indices
+            "dashed":  [0, 1, ...],                   # 1 for type edges
+            "splines": [[x0, y0, x1, y1, ...], ...],  # cubic Bezier control points
+            "tips":    [[x, y], null, ...]            # arrowhead tip, if any
+        }
+    }
+
+Layouts are cached under --cache-dir by a hash of the DOT text and the Graphviz
+version, so rebuilding a page for an unchanged graph does not re-run Graphviz.
+embed_data.py --layout uses this module to embed the layout.
+
+Usage:
+    python scripts/graph_layout.py depgraph.dot --out layout.json [--cache-dir .layout-cache]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from render_svg import graphviz_version
+
+FORMAT_NAME = "leandepviz-layout"
+FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = ".layout-cache"
+POINTS_PER_INCH = 72
+
+
+def _point(text: str, height: float) -> List[float]:
+    """Graphviz "x,y" (origin bottom-left) as [x, y] with the y axis flipped."""
+    x, y = text.split(",")[:2]
+    return [round(float(x), 1), round(height - float(y), 1)]
+
+
+def compact_layout(graphviz_json: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert `dot -Tjson0` output to the compact layout format."""
+    x0, y0, x1, y1 = (float(c) for c in graphviz_json["bb"].split(","))
+    height = y1
+
+    colors: List[str] = []
+    color_ids: Dict[str, int] = {}
+    names, labels, node_colors, geometry = [], [], [], []
+    index_of: Dict[int, int] = {}
+    for obj in graphviz_json.get("objects", []):
+        if "pos" not in obj:
+            continue  # subgraphs
+        index_of[obj["_gvid"]] = len(names)
+        names.append(obj["name"])
+        labels.append(obj.get("label", obj["name"]).replace("\\n", "\n"))
+        color = obj.get("fillcolor") or obj.get("color") or "#bbbbbb"
+        if color not in color_ids:
+            color_ids[color] = len(colors)
+            colors.append(color)
+        node_colors.append(color_ids[color])
+        geometry.extend(_point(obj["pos"], height))
+        geometry.append(round(float(obj.get("width", 0.75)) * POINTS_PER_INCH, 1))
+        geometry.append(round(float(obj.get("height", 0.5)) * POINTS_PER_INCH, 1))
+
+    ends, dashed, splines, tips = [], [], [], []
+    for edge in graphviz_json.get("edges", []):
+        if edge["tail"] not in index_of or edge["head"] not in index_of or "pos" not in edge:
+            continue
+        ends.extend((index_of[edge["tail"]], index_of[edge["head"]]))
+        dashed.append(1 if "dashed" in edge.get("style", "") else 0)
+        tip: Optional[List[float]] = None
+        points: List[float] = []
+        for token in edge["pos"].split():
+            if token.startswith("e,"):
+                tip = _point(token[2:], height)
+            elif token.startswith("s,"):
+                continue
+            else:
+                points.extend(_point(token, height))
+        splines.append(points)
+        tips.append(tip)
+
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "width": round(x1 - x0, 1),
+        "height": round(y1 - y0, 1),
+        "colors": colors,
+        "nodes": {"names": names, "labels": labels, "color": node_colors, "geometry": geometry},
+        "edges": {"ends": ends, "dashed": dashed, "splines": splines, "tips": tips},
+    }
+
+
+def compute_layout(dot_text: str, engine: str = "dot", cache_dir: Optional[Path] = None,
+                   timeout: int = 1800) -> Dict[str, Any]:
+    """
+    Lay out DOT text and return the compact layout, using the cache when possible.
+
+    Raises RuntimeError if Graphviz is not installed, and
+    subprocess.CalledProcessError / TimeoutExpired if the layout fails.
+    """
+    if shutil.which(engine) is None:
+        raise RuntimeError(f"Graphviz '{engine}' not found in PATH")
+
+    cached = None
+    if cache_dir is not None:
+        key = hashlib.sha256(f"{engine}\0{graphviz_version(engine)}\0{dot_text}".encode()).hexdigest()
+        cached = Path(cache_dir) / f"{key}.json"
+        if cached.exists():
+            return json.loads(cached.read_text())
+
+    result = subprocess.run([engine, "-Tjson0"], input=dot_text, capture_output=True,
+                            text=True, timeout=timeout, check=True)
+    layout = compact_layout(json.loads(result.stdout))
+
+    if cached is not None:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_name(f"{cached.stem}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(layout, separators=(",", ":")))
+        os.replace(tmp, cached)
+    return layout
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute a compact Graphviz layout for the viewer")
+    parser.add_argument("dot", help="DOT file to lay out")
+    parser.add_argument("--out", required=True, help="Output layout JSON path")
+    parser.add_argument("--engine", default="dot", help="Graphviz layout program (default: dot)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Layout cache directory (default: {DEFAULT_CACHE_DIR})")
+
+    args = parser.parse_args()
+
+    dot_path = Path(args.dot)
+    if not dot_path.exists():
+        print(f"Error: DOT file not found: {dot_path}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    try:
+        layout = compute_layout(dot_path.read_text(), args.engine, Path(args.cache_dir))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except subprocess.CalledProcessError as e:
+        print(f"Error: {args.engine} failed: {e.stderr.strip()}", file=sys.stderr)
+        return 1
+
+    with open(args.out, "w") as f:
+        json.dump(layout, f, separators=(",", ":"))
+
+    print(f"✓ Layout written to {args.out} ({Path(args.out).stat().st_size / 1024:.1f}KB)")
+    print(f"  {len(layout['nodes']['names'])} nodes, {len(layout['edges']['dashed'])} edges, "
+          f"{layout['width']:.0f}x{layout['height']:.0f}pt")
+    print(f"  Time: {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Run checker executables directly instead of through `lake exe`.
+
+Every `lake exe paranoia ...` call loads the workspace, checks whether the
+executable is up to date and takes Lake's build lock before it starts the
+binary. Over thousands of declarations that adds up, and concurrent calls
+queue on the lock. Instead the executables are built and resolved once:
+
+    python scripts/lake_exec.py paranoia lean4checker safe_verify --out checkers.json
+
+This runs `lake build` for the executables and finds their binaries under
+.lake/build/bin or a dependency's build directory. It captures the environment
+that `lake env` sets up (LEAN_PATH, LEAN_SYSROOT, library paths, ...) and
+writes both to a manifest:
+
+    {
+        "format": "leandepviz-checkers",
+        "version": 1,
+        "cwd": "/path/to/project",
+        "executables": {"paranoia": "/path/to/project/.lake/packages/paranoia/.lake/build/bin/paranoia", ...},
+        "stamps": {"paranoia": [size, mtime_ns], ...},
+        "env": {"LEAN_PATH": "...", ...}   # only what lake env changes
+    }
+
+The adapters take it with --direct checkers.json. (Without a manifest,
+--direct resolves the adapter's executable itself at startup.) They then
+rewrite `lake exe NAME ARGS` to `BINARY ARGS` with that environment. If a
+binary is rebuilt or removed after the manifest is written, the stale
+executable falls back to `lake exe`.
+
+--measure N starts every executable N times both ways (with --help) and
+prints the launch overhead per call.
+
+Usage:
+    python scripts/lake_exec.py paranoia lean4checker --out checkers.json
+    python scripts/lake_exec.py paranoia --no-build --measure 20
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+FORMAT_NAME = "leandepviz-checkers"
+FORMAT_VERSION = 1
+
+# Prints the environment as JSON; run under `lake env` to see what Lake sets
+ENV_PROBE = [sys.executable, "-c", "import json, os; print(json.dumps(dict(os.environ)))"]
+
+
+class LakeError(Exception):
+    pass
+
+
+def find_executable(cwd: Path, name: str) -> Optional[Path]:
+    """The built binary for a `lake exe` target, in the workspace or one of its packages."""
+    names = [name, name + ".exe"] if os.name == "nt" else [name]
+    roots = [cwd] + sorted((cwd / ".lake" / "packages").glob("*"))
+    for root in roots:
+        for candidate in names:
+            path = root / ".lake" / "build" / "bin" / candidate
+            if path.is_file() and os.access(path, os.X_OK):
+                return path
+    return None
+
+
+def lake_environment(cwd: Path) -> Dict[str, str]:
+    """The variables `lake env` adds or changes."""
+    p = subprocess.run(["lake", "env", *ENV_PROBE], cwd=cwd, capture_output=True, text=True)
+    if p.returncode != 0:
+        raise LakeError(f"lake env failed: {p.stderr.strip()[-500:]}")
+    try:
+        lake_env = json.loads(p.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        raise LakeError("could not read the environment from lake env")
+    return {k: v for k, v in lake_env.items() if os.environ.get(k) != v}
+
+
+def _stamp(path: Path) -> List[int]:
+    st = path.stat()
+    return [st.st_size, st.st_mtime_ns]
+
+
+def resolve(cwd: Path, names: Iterable[str], build: bool = True) -> Dict:
+    """Build (optionally) and resolve the executables; the manifest described in the module docstring."""
+    cwd = Path(cwd).resolve()
+    names = list(dict.fromkeys(names))
+    if build and names:
+        p = subprocess.run(["lake", "build", *names], cwd=cwd, capture_output=True, text=True)
+        if p.returncode != 0:
+            raise LakeError(f"lake build {' '.join(names)} failed: {(p.stderr or p.stdout).strip()[-500:]}")
+    executables = {}
+    for name in names:
+        path = find_executable(cwd, name)
+        if path is None:
+            raise LakeError(f"executable {name} not found under {cwd / '.lake'} (is it a lean_exe target?)")
+        executables[name] = str(path)
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "cwd": str(cwd),
+        "executables": executables,
+        "stamps": {name: _stamp(Path(path)) for name, path in executables.items()},
+        "env": lake_environment(cwd),
+    }
+
+
+class DirectLauncher:
+    """Rewrites `lake exe NAME ...` commands to the resolved binaries of a manifest."""
+
+    def __init__(self, manifest: Dict):
+        if manifest.get("format") != FORMAT_NAME:
+            raise LakeError("not a checker manifest (see lake_exec.py)")
+        self.manifest = manifest
+        self.env = dict(os.environ, **manifest["env"])
+        # Binaries changed since the manifest was written go through lake exe again
+        self.executables = {
+            name: path for name, path in manifest["executables"].items()
+            if Path(path).is_file() and _stamp(Path(path)) == manifest["stamps"].get(name)
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> "DirectLauncher":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def rewrite(self, cmd: List[str]) -> Tuple[List[str], Optional[Dict[str, str]]]:
+        """The command and environment to run instead of `cmd` (unchanged unless it is a known `lake exe`)."""
+        if len(cmd) >= 3 and cmd[0] == "lake" and cmd[1] == "exe" and cmd[2] in self.executables:
+            return [self.executables[cmd[2]], *cmd[3:]], self.env
+        return cmd, None
+
+    def stale(self) -> List[str]:
+        return sorted(set(self.manifest["executables"]) - set(self.executables))
+
+
+def measure_launch(cwd: Path, launcher: DirectLauncher, name: str, runs: int) -> Tuple[float, float]:
+    """Mean seconds per `NAME --help` through lake exe and directly."""
+    timings = []
+    for cmd in (["lake", "exe", name, "--help"], launcher.rewrite(["lake", "exe", name, "--help"])[0]):
+        env = launcher.env if cmd[0] != "lake" else None
+        start = time.perf_counter()
+        for _ in range(runs):
+            subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - start) / runs)
+    return timings[0], timings[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build checker executables once and resolve them for direct runs")
+    parser.add_argument("executables", nargs="+", help="lean_exe targets, e.g. paranoia lean4checker safe_verify")
+    parser.add_argument("--cwd", default=".", help="Lean project directory (default: .)")
+    parser.add_argument("--out", help="Write the manifest here (for the adapters' --direct)")
+    parser.add_argument("--no-build", action="store_true", help="Resolve already built executables only")
+    parser.add_argument("--measure", type=int, metavar="N", help="Time N launches per executable both ways")
+
+    args = parser.parse_args()
+
+    cwd = Path(args.cwd)
+    if not cwd.is_dir():
+        print(f"Error: Project directory not found: {cwd}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    try:
+        manifest = resolve(cwd, args.executables, build=not args.no_build)
+    except (LakeError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"✓ Resolved {len(manifest['executables'])} executable(s) in {time.perf_counter() - start:.1f}s")
+    for name, path in manifest["executables"].items():
+        print(f"  {name}: {path}")
+    print(f"  Environment from lake env: {', '.join(sorted(manifest['env'])) or '(none)'}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(manifest, f, indent=2)
+        print(f"✓ Manifest written to {args.out}")
+
+    if args.measure:
+        launcher = DirectLauncher(manifest)
+        print(f"\nLaunch overhead ({args.measure} runs of --help each):")
+        print(f"  {'Executable':<16}{'lake exe':>12}{'direct':>12}{'saved':>12}")
+        for name in manifest["executables"]:
+            via_lake, direct = measure_launch(cwd, launcher, name, args.measure)
+            print(f"  {name:<16}{via_lake * 1000:>10.1f}ms{direct * 1000:>10.1f}ms{(via_lake - direct) * 1000:>10.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
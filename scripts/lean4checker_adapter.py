@@ -7,61 +7,64 @@ It can catch environment hacking and other kernel-level issues.
 
 Usage:
     python lean4checker_adapter.py --depgraph depgraph.json --out kernel_report.json [--fresh]
+    python lean4checker_adapter.py ... --jobs 4 --cache .lake/lean4checker-cache.json
+
+Modules are checked --jobs at a time by checker_runtime.py. With --cache, a
+module whose .olean is unchanged since a cached run is not replayed again.
 """
 
-import json
-import subprocess
-import shlex
 import argparse
+import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
-def run_module_check(module: str, fresh: bool = False, cwd: Path = Path.cwd()) -> Dict[str, Any]:
-    """Run lean4checker on a module."""
-    cmd = ["lake", "exe", "lean4checker"]
-    if fresh:
-        cmd.append("--fresh")
-    cmd.append(module)
-    
-    try:
-        p = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minute timeout
-            cwd=cwd
-        )
-        
-        ok = (p.returncode == 0)
-        
-        return {
-            "module": module,
-            "ok": ok,
-            "cmd": " ".join(shlex.quote(c) for c in cmd),
-            "stdout": p.stdout[-8000:] if p.stdout else "",
-            "stderr": p.stderr[-8000:] if p.stderr else "",
-            "returncode": p.returncode
-        }
-    except subprocess.TimeoutExpired:
-        return {
-            "module": module,
-            "ok": False,
-            "cmd": " ".join(shlex.quote(c) for c in cmd),
-            "stdout": "",
-            "stderr": "TIMEOUT: lean4checker took longer than 5 minutes",
-            "returncode": -1
-        }
-    except Exception as e:
+from depgraph_core import DepGraph
+from log_store import summarize
+from checker_runtime import (CheckerAdapter, CheckResult, add_runtime_arguments, describe_timeout, file_digest,
+                             runtime_from_args, unified_report, write_report)
+
+class Lean4CheckerAdapter(CheckerAdapter):
+    """Runs lean4checker on a module; items are module names."""
+
+    tool = "lean4checker"
+    executable = "lean4checker"
+    timeout = 300  # 5 minute timeout
+    output_limit = 8000
+
+    def __init__(self, fresh: bool = False, cwd: Path = Path.cwd()):
+        super().__init__(cwd=cwd)
+        self.fresh = fresh
+
+    def command(self, module: str) -> List[str]:
+        cmd = ["lake", "exe", "lean4checker"]
+        if self.fresh:
+            cmd.append("--fresh")
+        cmd.append(module)
+        return cmd
+
+    def cache_key(self, module: str) -> Optional[str]:
+        # Replay checks what is in the module's .olean; Lake rebuilds it when the module or its imports change
+        olean = Path(self.cwd, ".lake", "build", "lib", *module.split(".")).with_suffix(".olean")
+        return file_digest(olean) if olean.exists() else None
+
+    def parse(self, module: str, p: CheckResult) -> Dict[str, Any]:
+        if p.timed_out:
+            stderr = f"TIMEOUT: lean4checker took longer than {describe_timeout(self.timeout)}"
+        elif p.error is not None:
+            stderr = f"ERROR: {p.error}"
+        else:
+            stderr = p.stderr
         return {
             "module": module,
-            "ok": False,
-            "cmd": " ".join(shlex.quote(c) for c in cmd),
-            "stdout": "",
-            "stderr": f"ERROR: {str(e)}",
-            "returncode": -1
+            "ok": p.ok,
+            "cmd": p.command,
+            "stdout": p.stdout,
+            "stderr": stderr,
+            "returncode": p.exit,
+            "log": {} if p.ok else p.logs  # passing modules' logs are not kept
         }
 
-def attach_to_declarations(depgraph: Dict[str, Any], module_results: List[Dict[str, Any]], fresh: bool) -> List[Dict[str, Any]]:
+def attach_to_declarations(graph: DepGraph, module_results: List[Dict[str, Any]], fresh: bool) -> List[Dict[str, Any]]:
     """
     Map module-level results to declaration-level reports.
     
@@ -69,14 +72,15 @@ def attach_to_declarations(depgraph: Dict[str, Any], module_results: List[Dict[s
     """
     by_module = {r["module"]: r for r in module_results}
     
+    # Only nodes of checked modules, in depgraph order
+    node_ids = sorted(v for module in by_module for v in graph.by_module.get(module, ()))
+    
     reports = []
-    for node in depgraph.get("nodes", []):
-        module = node.get("module")
-        decl_name = node.get("fullName", node.get("name"))
-        
-        result = by_module.get(module)
-        if not result:
-            continue
+    for v in node_ids:
+        module = graph.module(v)
+        decl_name = graph.full_names[v]
+        result = by_module[module]
+        zone = graph.extra(v).get("zone", "unknown")
         
         tool_name = "lean4checker" + ("-fresh" if fresh else "")
         
@@ -86,7 +90,7 @@ def attach_to_declarations(depgraph: Dict[str, Any], module_results: List[Dict[s
                 "decl": decl_name,
                 "module": module,
                 "tool": tool_name,
-                "zone": node.get("zone", "unknown"),
+                "zone": zone,
                 "ok": True,
                 "checks": ["kernel-replay"],
                 "notes": "Kernel replay successful",
@@ -97,16 +101,25 @@ def attach_to_declarations(depgraph: Dict[str, Any], module_results: List[Dict[s
             # Module failed - check if this specific decl is mentioned in output
             output = result["stdout"] + result["stderr"]
             decl_mentioned = decl_name in output
+            module_error = f"Module {module} kernel replay failed"
+            
+            if result.get("log"):
+                # The output is in the log store: every declaration of the module shares one reference
+                error = (summarize(result["stderr"]) or module_error) if decl_mentioned else module_error
+                details = {"log": result["log"]}
+            else:
+                error = result["stderr"] if decl_mentioned else module_error
+                details = {"notes": result["stdout"][:500] if result["stdout"] else ""}
             
             reports.append({
                 "decl": decl_name,
                 "module": module,
                 "tool": tool_name,
-                "zone": node.get("zone", "unknown"),
+                "zone": zone,
                 "ok": False,
                 "checks": ["kernel-replay"],
-                "error": result["stderr"] if decl_mentioned else f"Module {module} kernel replay failed",
-                "notes": result["stdout"][:500] if result["stdout"] else "",
+                "error": error,
+                **details,
                 "cmd": result["cmd"],
                 "exit": result["returncode"]
             })
@@ -120,53 +133,48 @@ def main():
     parser.add_argument("--fresh", action="store_true", help="Use --fresh mode (thorough, slower)")
     parser.add_argument("--cwd", help="Working directory for lake commands", default=".")
     parser.add_argument("--modules", nargs="+", help="Specific modules to check (default: all from depgraph)")
+    add_runtime_arguments(parser, "lean4checker", jobs=os.cpu_count() or 4, timeout=Lean4CheckerAdapter.timeout)
     
     args = parser.parse_args()
     
     # Load dependency graph
-    with open(args.depgraph) as f:
-        depgraph = json.load(f)
+    # Prefers the binary sidecar (depgraph_sidecar.py) when it is present and fresh
+    graph = DepGraph.load(args.depgraph)
     
     # Determine which modules to check
     if args.modules:
         modules = args.modules
     else:
         # Extract unique modules from depgraph
-        modules = sorted(set(node["module"] for node in depgraph.get("nodes", []) if node.get("module")))
+        modules = sorted(m for m in graph.modules if m)
     
     print(f"Running lean4checker{' --fresh' if args.fresh else ''} on {len(modules)} modules...")
     
-    # Run checker on each module
-    module_results = []
-    for i, module in enumerate(modules, 1):
-        print(f"  [{i}/{len(modules)}] Checking {module}...", end=" ", flush=True)
-        result = run_module_check(module, fresh=args.fresh, cwd=Path(args.cwd))
-        module_results.append(result)
-        
+    # Run checker on each module, --jobs at a time
+    runtime = runtime_from_args(Lean4CheckerAdapter(fresh=args.fresh, cwd=Path(args.cwd)), args, Path(args.out))
+    done = 0
+    
+    def on_result(module, result):
+        nonlocal done
+        done += 1
         status = "✓" if result["ok"] else "✗"
-        print(status)
+        print(f"  [{done}/{len(modules)}] {status} {module}", flush=True)
+    
+    module_results = runtime.run(modules, on_result)
+    print(f"  {runtime.describe()}")
     
     # Map to declaration-level reports
     print("Mapping results to declarations...")
-    reports = attach_to_declarations(depgraph, module_results, args.fresh)
+    reports = attach_to_declarations(graph, module_results, args.fresh)
     
     # Write output
-    output = {
-        "tool": "lean4checker" + ("-fresh" if args.fresh else ""),
-        "version": "0.1.0",
-        "timestamp": subprocess.run(["date", "-Iseconds"], capture_output=True, text=True).stdout.strip(),
-        "modules_checked": len(modules),
-        "modules_passed": sum(1 for r in module_results if r["ok"]),
-        "declarations": reports,
-        "summary": {
-            "total": len(reports),
-            "passed": sum(1 for r in reports if r["ok"]),
-            "failed": sum(1 for r in reports if not r["ok"])
-        }
-    }
-    
-    with open(args.out, "w") as f:
-        json.dump(output, f, indent=2)
+    output = unified_report(
+        "lean4checker" + ("-fresh" if args.fresh else ""),
+        reports,
+        modules_checked=len(modules),
+        modules_passed=sum(1 for r in module_results if r["ok"]),
+    )
+    write_report(output, args.out, runtime.log_store)
     
     print(f"\n✓ Report written to {args.out}")
     print(f"  Modules: {output['modules_passed']}/{output['modules_checked']} passed")
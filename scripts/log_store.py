@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Content-addressed store for the full output of checker processes.
+
+The adapters used to copy (truncated) stdout and stderr into every report row,
+and a module that fails lean4checker or SafeVerify repeated the same output on
+each of its declarations. With a log store the runtime streams each output
+stream, compressed, into a file named after the SHA-256 of its content:
+
+    log-store/ab/ab3f...e1.gz       one gzip file per distinct stream content
+    log-store/tmp/                  streams still being written
+
+Identical output (the same failure seen by all declarations of a module, a
+re-run that prints the same thing, Lake's build chatter) is stored once. Failed
+report rows keep a short error summary and a reference per stream:
+
+    {"decl": "Foo.bar", "ok": false, "error": "first line of the error",
+     "log": {"stdout": "ab3f...e1", "stderr": "9c0d...77"}}
+
+and the report records where its store is, relative to the report file:
+
+    {"tool": "lean4checker", "log_store": "log-store", "declarations": [...]}
+
+merge_reports.py keeps the references and collects the stores under
+"log_stores" (per tool). Nothing reads a log until someone asks for it: the
+viewer's "Show log" button fetches and decompresses the file, and the `show`
+command below prints it.
+
+Usage:
+    # Print a log by reference
+    python scripts/log_store.py show ab3f...e1 --store out/log-store
+
+    # Print the logs of a declaration, resolving the store from the report
+    python scripts/log_store.py show --report out/unified_report.json --decl Foo.bar [--tool lean4checker]
+
+    # Size of a store, and removal of logs no report (or adapter --cache file) refers to
+    python scripts/log_store.py stats --store out/log-store
+    python scripts/log_store.py gc --store out/log-store --keep out/*_report.json --cache out/cache/*.json
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from compact_report import load_report
+
+DEFAULT_STORE = "log-store"
+COMPRESS_LEVEL = 6
+SUMMARY_LIMIT = 300
+
+REF_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Lines of Lake's build output that say nothing about the failure
+NOISE_PREFIXES = ("✔", "✖", "⚠", "info:", "trace:")
+
+
+def summarize(text: str, limit: int = SUMMARY_LIMIT) -> str:
+    """The first meaningful line of checker output, for a report row."""
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith(NOISE_PREFIXES) and "Building" not in line and "Built" not in line:
+            return line[:limit]
+    return ""
+
+
+class LogWriter:
+    """
+    One stream being written to a LogStore; close() returns its reference.
+
+    close() is finish() and commit() in one. A caller that only keeps the
+    logs someone refers to calls finish() for the reference, then commit() or
+    abort() once it knows.
+    """
+
+    def __init__(self, store: "LogStore"):
+        self.store = store
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.ref: Optional[str] = None
+        (store.root / "tmp").mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=store.root / "tmp", suffix=".gz")
+        self.tmp = Path(tmp)
+        self.file = gzip.GzipFile(filename="", mode="wb", fileobj=os.fdopen(fd, "wb"),
+                                  compresslevel=COMPRESS_LEVEL, mtime=0)
+
+    def write(self, data: bytes) -> None:
+        self.digest.update(data)
+        self.size += len(data)
+        self.file.write(data)
+
+    def close(self) -> Optional[str]:
+        """The reference of the stored content, or None for an empty stream."""
+        ref = self.finish()
+        self.commit()
+        return ref
+
+    def finish(self) -> Optional[str]:
+        """Stop writing; the reference the content will have, or None for an empty stream (nothing to commit)."""
+        self._finish()
+        if self.size == 0:
+            self.abort()
+            return None
+        self.ref = self.digest.hexdigest()
+        return self.ref
+
+    def commit(self) -> None:
+        """Move finished content into the store under its reference."""
+        if self.ref is None:
+            return
+        path = self.store.path(self.ref)
+        if path.exists():
+            self.tmp.unlink()  # already stored
+        else:
+            path.parent.mkdir(exist_ok=True)
+            os.replace(self.tmp, path)
+
+    def abort(self) -> None:
+        self._finish()
+        try:
+            self.tmp.unlink()
+        except FileNotFoundError:
+            pass
+
+    def _finish(self) -> None:
+        fileobj = self.file.fileobj
+        if fileobj is None:
+            return  # already finished
+        self.file.close()
+        fileobj.close()
+
+
+class LogStore:
+    """Logs by the SHA-256 of their content, gzip-compressed under `root`."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path(self, ref: str) -> Path:
+        if not REF_PATTERN.match(ref):
+            raise ValueError(f"not a log reference: {ref!r}")
+        return self.root / ref[:2] / f"{ref}.gz"
+
+    def writer(self) -> LogWriter:
+        return LogWriter(self)
+
+    def put(self, data: bytes) -> Optional[str]:
+        writer = self.writer()
+        writer.write(data)
+        return writer.close()
+
+    def read(self, ref: str) -> str:
+        with gzip.open(self.path(ref), "rb") as f:
+            return f.read().decode("utf-8", errors="replace")
+
+    def refs(self) -> Iterator[str]:
+        for path in self.root.glob("??/*.gz"):
+            yield path.name[:-3]
+
+
+def row_results(report: Dict[str, Any], row: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """The per-tool results of a report row (the row itself in a per-tool report)."""
+    if report.get("merged_report"):
+        return row.get("tools", {})
+    return {report.get("tool", "checker"): row}
+
+
+def report_refs(report: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """(tool, reference) for every log reference in a per-tool or unified report."""
+    for row in report.get("declarations", []):
+        for tool, result in row_results(report, row).items():
+            for ref in (result.get("log") or {}).values():
+                yield tool, ref
+
+
+def value_refs(value: Any) -> Iterator[str]:
+    """Every log reference in a JSON value (the values of its "log" fields, at any depth)."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key == "log" and isinstance(item, dict):
+                yield from (ref for ref in item.values() if isinstance(ref, str) and REF_PATTERN.match(ref))
+            else:
+                yield from value_refs(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from value_refs(item)
+
+
+def report_stores(report_path: Path, report: Dict[str, Any]) -> Dict[str, Path]:
+    """The log store of each tool in a report, resolved against the report's directory."""
+    base = Path(report_path).parent
+    if report.get("merged_report"):
+        return {tool: base / store for tool, store in report.get("log_stores", {}).items()}
+    if report.get("log_store"):
+        return {report.get("tool", "checker"): base / report["log_store"]}
+    return {}
+
+
+def declaration_logs(report_path: Path, decl: str, tool: Optional[str] = None) -> List[Dict[str, str]]:
+    """The logs of one declaration in a report: [{"tool", "stream", "ref", "text"}, ...]."""
+    report = load_report(Path(report_path))
+    stores = report_stores(report_path, report)
+    row = next((r for r in report.get("declarations", []) if r["decl"] == decl), None)
+    if row is None:
+        raise KeyError(f"{decl} is not in {report_path}")
+    logs = []
+    for name, result in row_results(report, row).items():
+        if tool and name != tool or not result.get("log"):
+            continue
+        if name not in stores:
+            raise KeyError(f"{report_path} does not say where the {name} logs are")
+        store = LogStore(stores[name])
+        for stream, ref in result["log"].items():
+            logs.append({"tool": name, "stream": stream, "ref": ref, "text": store.read(ref)})
+    return logs
+
+
+def copy_logs(report_path: Path, report: Dict[str, Any], dest: "LogStore") -> int:
+    """Copy the logs a report refers to into `dest` (e.g. for a bundle); the number copied."""
+    stores = {tool: LogStore(path) for tool, path in report_stores(report_path, report).items()}
+    copied = 0
+    for tool, ref in report_refs(report):
+        target = dest.path(ref)
+        source = stores[tool].path(ref) if tool in stores else None
+        if target.exists() or source is None or not source.exists():
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, target)
+        copied += 1
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read and maintain the checker log store")
+    parser.add_argument("command", choices=["show", "stats", "gc"])
+    parser.add_argument("ref", nargs="?", help="Log reference for show")
+    parser.add_argument("--store", default=DEFAULT_STORE, help=f"Store directory (default: {DEFAULT_STORE})")
+    parser.add_argument("--report", help="For show: report to look the declaration up in")
+    parser.add_argument("--decl", help="For show: declaration whose logs to print")
+    parser.add_argument("--tool", help="For show: only this tool's logs")
+    parser.add_argument("--keep", nargs="+", default=[], metavar="REPORT",
+                        help="For gc: reports whose logs are kept")
+    parser.add_argument("--cache", nargs="+", default=[], metavar="FILE",
+                        help="For gc: adapter --cache files whose logs are kept, so cached results stay usable")
+
+    args = parser.parse_args()
+
+    if args.command == "show":
+        try:
+            if args.report and args.decl:
+                logs = declaration_logs(Path(args.report), args.decl, args.tool)
+                if not logs:
+                    print(f"No logs for {args.decl}", file=sys.stderr)
+                for log in logs:
+                    print(f"=== {log['tool']} {log['stream']} ({log['ref'][:12]}) ===")
+                    print(log["text"], end="" if log["text"].endswith("\n") else "\n")
+            elif args.ref:
+                sys.stdout.write(LogStore(Path(args.store)).read(args.ref))
+            else:
+                parser.error("show needs a reference or --report and --decl")
+        except (KeyError, ValueError, OSError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    store_dir = Path(args.store)
+    if not store_dir.is_dir():
+        print(f"Error: Log store not found: {store_dir}", file=sys.stderr)
+        return 1
+    store = LogStore(store_dir)
+
+    if args.command == "stats":
+        count = size = 0
+        for ref in store.refs():
+            count += 1
+            size += store.path(ref).stat().st_size
+        print(f"{store.root}: {count} log(s), {size / 1024:.1f}KB compressed")
+        return 0
+
+    if not args.keep:
+        parser.error("gc needs --keep with the reports whose logs are still wanted")
+    keep: Set[str] = set()
+    for report_path in args.keep:
+        keep.update(ref for _, ref in report_refs(load_report(Path(report_path))))
+    for cache_path in args.cache:
+        try:
+            keep.update(value_refs(json.loads(Path(cache_path).read_text())))
+        except (OSError, ValueError) as e:
+            print(f"Error: Cannot read cache {cache_path}: {e}", file=sys.stderr)
+            return 1
+    removed = 0
+    for ref in list(store.refs()):
+        if ref not in keep:
+            store.path(ref).unlink()
+            removed += 1
+    print(f"✓ Removed {removed} log(s), kept {len(keep)}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
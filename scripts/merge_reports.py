@@ -2,6 +2,13 @@
 """
 Merge verification reports from multiple checkers into a unified format.
 
+Input reports may be plain or compact (see compact_report.py), optionally
+gzip/zstd-compressed.
+
+Log references (see log_store.py) are carried over as they are; the logs
+themselves are never read here. The unified report lists each tool's log store
+under "log_stores", relative to the unified report.
+
 Supports:
 - LeanParanoia (paranoia_report.json)
 - lean4checker (kernel_report.json)
@@ -10,18 +17,18 @@ Supports:
 
 Usage:
     python merge_reports.py --reports paranoia_report.json kernel_report.json safeverify_report.json --out unified_report.json
+
+    # Re-run of a single checker: replace only its column in an existing unified report
+    python merge_reports.py --update unified_report.json --reports kernel_report.json
 """
 
-import json
 import argparse
+import os
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from collections import defaultdict
 
-def load_report(path: Path) -> Dict[str, Any]:
-    """Load a verification report JSON file."""
-    with open(path) as f:
-        return json.load(f)
+from compact_report import load_report, dump_report
 
 def normalize_paranoia_report(report: Dict[str, Any]) -> List[Dict[str, Any]]:
     """
@@ -67,6 +74,8 @@ def normalize_paranoia_report(report: Dict[str, Any]) -> List[Dict[str, Any]]:
             "kind": decl.get("kind"),
             "exit": decl.get("exit", 0)
         })
+        if decl.get("log"):
+            normalized[-1]["log"] = decl["log"]
     
     return normalized
 
@@ -85,6 +94,50 @@ def normalize_checker_report(report: Dict[str, Any]) -> List[Dict[str, Any]]:
     # Already in unified format, just extract declarations
     return report.get("declarations", [])
 
+def refresh_declaration(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Recompute the derived fields of a merged declaration from its per-tool results.
+
+    Updates `ok`, `checks`, `error` and `summary` in place and returns the record.
+    """
+    tools = record["tools"]
+    all_checks = []
+    all_errors = []
+    
+    for tool, result in tools.items():
+        all_checks.extend(result.get("checks", []))
+        if result.get("error"):
+            all_errors.append(f"[{tool}] {result['error']}")
+    
+    passed = sum(1 for r in tools.values() if r["ok"])
+    record["ok"] = passed == len(tools)
+    record["checks"] = list(set(all_checks))  # unique checks
+    record["error"] = "; ".join(all_errors) if all_errors else None
+    record["summary"] = {
+        "total_checks": len(tools),
+        "passed_checks": passed,
+        "failed_checks": len(tools) - passed,
+    }
+    return record
+
+def tool_result(rep: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the per-tool column stored in a merged declaration."""
+    result = {
+        "ok": rep["ok"],
+        "checks": rep.get("checks", []),
+        "error": rep.get("error"),
+        "notes": rep.get("notes")
+    }
+    if rep.get("log"):
+        result["log"] = rep["log"]  # log store references, resolved only when shown
+    return result
+
+def log_store_path(report_path: Path, report: Dict[str, Any], unified_path: Path) -> Optional[str]:
+    """A tool report's log store relative to the unified report, or None if its output is inline."""
+    if not report.get("log_store"):
+        return None
+    return os.path.relpath(report_path.parent / report["log_store"], unified_path.parent)
+
 def merge_declaration_reports(reports_by_decl: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
     """
     Merge multiple reports for the same declaration.
@@ -95,62 +148,172 @@ def merge_declaration_reports(reports_by_decl: Dict[str, List[Dict[str, Any]]])
     
     for decl_name, decl_reports in sorted(reports_by_decl.items()):
         # Use first report as base
-        base = decl_reports[0].copy()
-        
-        # Collect all tools and their results
-        tools = {}
-        all_checks = []
-        all_errors = []
-        overall_ok = True
-        
-        for rep in decl_reports:
-            tool = rep["tool"]
-            tools[tool] = {
-                "ok": rep["ok"],
-                "checks": rep.get("checks", []),
-                "error": rep.get("error"),
-                "notes": rep.get("notes")
-            }
-            
-            all_checks.extend(rep.get("checks", []))
-            if rep.get("error"):
-                all_errors.append(f"[{tool}] {rep['error']}")
-            
-            if not rep["ok"]:
-                overall_ok = False
+        base = decl_reports[0]
         
         # Build merged report
-        merged.append({
+        merged.append(refresh_declaration({
             "decl": decl_name,
             "module": base.get("module", ""),
             "zone": base.get("zone", "unknown"),
             "kind": base.get("kind"),
-            "ok": overall_ok,
-            "tools": tools,
-            "checks": list(set(all_checks)),  # unique checks
-            "error": "; ".join(all_errors) if all_errors else None,
-            "summary": {
-                "total_checks": len(decl_reports),
-                "passed_checks": sum(1 for r in decl_reports if r["ok"]),
-                "failed_checks": sum(1 for r in decl_reports if not r["ok"]),
-            }
-        })
+            "tools": {rep["tool"]: tool_result(rep) for rep in decl_reports},
+        }))
     
     return merged
 
+def normalize_report(path: Path, report: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Normalize a tool report to unified declaration records based on its tool."""
+    tool_name = report.get("tool", path.stem)
+    if tool_name.startswith("paranoia") or "paranoia" in path.stem:
+        return normalize_paranoia_report(report)
+    return normalize_checker_report(report)
+
+def update_unified_report(unified: Dict[str, Any], tool_name: str, tool_summary: Dict[str, Any],
+                          normalized: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Fold one re-run tool report into an existing unified report in place.
+    
+    Only the `tool_name` column of each declaration is replaced; declarations the
+    tool no longer reports lose that column, and declarations left without any
+    tool results are dropped. The top-level summary is adjusted by the delta of
+    each touched record instead of being recomputed from scratch.
+    
+    Returns counts of updated, added and removed declarations.
+    """
+    declarations = unified["declarations"]
+    summary = unified["summary"]
+    by_name = {d["decl"]: d for d in declarations}
+    fresh = {rep["decl"]: rep for rep in normalized}
+    stats = {"updated": 0, "added": 0, "removed": 0}
+    
+    def account(record: Dict[str, Any], sign: int) -> None:
+        summary["total_declarations"] += sign
+        if record["ok"]:
+            summary["passed_all"] += sign
+        else:
+            summary["failed_any"] += sign
+    
+    # Drop stale results for declarations the tool no longer reports
+    removed = set()
+    for name, record in by_name.items():
+        if name in fresh or tool_name not in record["tools"]:
+            continue
+        account(record, -1)
+        del record["tools"][tool_name]
+        if record["tools"]:
+            account(refresh_declaration(record), 1)
+            stats["updated"] += 1
+        else:
+            removed.add(name)
+            stats["removed"] += 1
+    
+    added = []
+    for name, rep in fresh.items():
+        record = by_name.get(name)
+        if record is None:
+            record = {
+                "decl": name,
+                "module": rep.get("module", ""),
+                "zone": rep.get("zone", "unknown"),
+                "kind": rep.get("kind"),
+                "tools": {},
+            }
+            added.append(record)
+            stats["added"] += 1
+        else:
+            account(record, -1)
+            stats["updated"] += 1
+        record["tools"][tool_name] = tool_result(rep)
+        account(refresh_declaration(record), 1)
+    
+    if removed:
+        declarations[:] = [d for d in declarations if d["decl"] not in removed]
+    if added:
+        declarations.extend(added)
+        declarations.sort(key=lambda d: d["decl"])
+    
+    summary["by_tool"][tool_name] = tool_summary
+    if tool_name not in unified["tools"]:
+        unified["tools"].append(tool_name)
+    
+    return stats
+
+def update_main(args) -> int:
+    """Apply re-run tool reports to an existing unified report (--update mode)."""
+    unified_path = Path(args.update)
+    if not unified_path.exists():
+        print(f"Error: Unified report not found: {unified_path}")
+        return 1
+    
+    unified = load_report(unified_path)
+    if not unified.get("merged_report") or "declarations" not in unified:
+        print(f"Error: {unified_path} is not a full unified report (was it written with --summary-only?)")
+        return 1
+    
+    print(f"Updating {unified_path.name} ({len(unified['declarations'])} declarations) "
+          f"with {len(args.reports)} report(s)...")
+    
+    out_path = args.out or args.update
+    # Log store paths are relative to the unified report, which --out may move
+    log_stores = {tool: os.path.relpath(unified_path.parent / store, Path(out_path).parent)
+                  for tool, store in unified.pop("log_stores", {}).items()}
+    
+    for report_path in args.reports:
+        path = Path(report_path)
+        if not path.exists():
+            print(f"  ⚠ Skipping missing report: {path}")
+            continue
+        
+        print(f"  Loading {path.name}...", end=" ")
+        report = load_report(path)
+        normalized = normalize_report(path, report)
+        # Normalized records carry the canonical tool name (e.g. "paranoia")
+        tool_name = normalized[0]["tool"] if normalized else report.get("tool", path.stem)
+        
+        stats = update_unified_report(unified, tool_name, report.get("summary", {}), normalized)
+        log_stores.pop(tool_name, None)
+        store = log_store_path(path, report, Path(out_path))
+        if store:
+            log_stores[tool_name] = store
+        print(f"✓ {tool_name}: {stats['updated']} updated, {stats['added']} added, {stats['removed']} removed")
+    
+    if log_stores:
+        unified["log_stores"] = log_stores
+    dump_report(unified, Path(out_path), compact=args.compact)
+    
+    summary = unified["summary"]
+    print(f"\n✓ Unified report written to {out_path}")
+    print(f"  Declarations: {summary['passed_all']}/{summary['total_declarations']} passed all checks")
+    print(f"  Failed any check: {summary['failed_any']}")
+    print(f"  Tools included: {', '.join(unified['tools'])}")
+    
+    if summary['failed_any'] > 0:
+        return 1
+    return 0
+
 def main():
     parser = argparse.ArgumentParser(description="Merge verification reports from multiple checkers")
     parser.add_argument("--reports", nargs="+", required=True, help="Verification report JSON files")
-    parser.add_argument("--out", required=True, help="Output unified report JSON")
+    parser.add_argument("--out", help="Output unified report JSON (defaults to the --update file)")
     parser.add_argument("--summary-only", action="store_true", help="Only output summary, not full declarations")
+    parser.add_argument("--compact", action="store_true",
+                        help="Write the compact dictionary-encoded format (see compact_report.py)")
+    parser.add_argument("--update", metavar="UNIFIED",
+                        help="Existing unified report to update in place with the given tool reports")
     
     args = parser.parse_args()
     
+    if args.update:
+        return update_main(args)
+    if not args.out:
+        parser.error("--out is required unless --update is given")
+    
     print(f"Merging {len(args.reports)} verification reports...")
     
     # Load and normalize all reports
     all_declarations = []
     tool_summaries = {}
+    log_stores = {}
     
     for report_path in args.reports:
         path = Path(report_path)
@@ -163,15 +326,15 @@ def main():
         tool_name = report.get("tool", path.stem)
         
         # Normalize based on tool
-        if tool_name.startswith("paranoia") or "paranoia" in path.stem:
-            normalized = normalize_paranoia_report(report)
-        else:
-            normalized = normalize_checker_report(report)
+        normalized = normalize_report(path, report)
         
         all_declarations.extend(normalized)
         
         # Store tool summary
         tool_summaries[tool_name] = report.get("summary", {})
+        store = log_store_path(path, report, Path(args.out))
+        if store:
+            log_stores[tool_name] = store
         print(f"✓ ({len(normalized)} declarations)")
     
     # Group by declaration name
@@ -199,13 +362,14 @@ def main():
         "tools": list(tool_summaries.keys()),
         "summary": summary,
     }
+    if log_stores:
+        output["log_stores"] = log_stores
     
     if not args.summary_only:
         output["declarations"] = merged_declarations
     
     # Write output
-    with open(args.out, "w") as f:
-        json.dump(output, f, indent=2)
+    dump_report(output, Path(args.out), compact=args.compact)
     
     print(f"\n✓ Unified report written to {args.out}")
     print(f"  Declarations: {summary['passed_all']}/{summary['total_declarations']} passed all checks")
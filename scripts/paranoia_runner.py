@@ -11,19 +11,27 @@ Usage:
         --policy depviz-policy.yaml \
         --out paranoia_report.json \
         --jobs 8
+
+With --journal PATH each result is also appended to a JSON Lines journal as
+soon as it completes (see result_journal.py), which `serve.py --journal PATH`
+streams to the viewer during the run.
+
+Processes are run by checker_runtime.py, which provides --jobs, --timeout,
+--retries, --verbose and the shared resource broker (--broker).
 """
 
 import argparse
 import json
-import subprocess
 import sys
-import fnmatch
 import os
-import shlex
-import concurrent.futures
 from typing import List, Dict, Any, Set
 from pathlib import Path
 
+from depgraph_core import DepGraph
+from checker_runtime import (CheckerAdapter, CheckResult, add_runtime_arguments, describe_timeout,
+                             runtime_from_args, unified_report, write_report)
+from result_journal import ResultJournal
+
 try:
     import yaml
 except ImportError:
@@ -31,112 +39,123 @@ except ImportError:
     sys.exit(1)
 
 
-def match_any(globs: List[str], s: str) -> bool:
-    """Check if string matches any of the glob patterns."""
-    return any(fnmatch.fnmatch(s, g) for g in globs)
-
-
-def decls_for_zone(depgraph: Dict[str, Any], include: List[str], exclude: List[str]) -> List[Dict[str, Any]]:
+def decls_for_zone(graph: DepGraph, include: List[str], exclude: List[str]) -> List[Dict[str, Any]]:
     """
     Extract declarations matching zone patterns.
     Returns list of dicts with 'fullName', 'kind', 'module' for matching nodes.
     """
     decls = []
-    for n in depgraph.get("nodes", []):
-        kind = n.get("kind", "")
-        # Focus on theorems and definitions (skip constructors, inductives, etc.)
-        if kind in ("theorem", "thm", "def"):
-            mod = n.get("module", "")
-            if match_any(include, mod) and not match_any(exclude or [], mod):
+    # Globs are matched once per module, then the module's nodes are taken from the index
+    for mod in graph.modules_matching(include, exclude):
+        for v in graph.by_module[mod]:
+            kind = graph.kind(v)
+            # Focus on theorems and definitions (skip constructors, inductives, etc.)
+            if kind in ("theorem", "thm", "def"):
                 decls.append({
-                    "fullName": n.get("fullName", ""),
+                    "fullName": graph.full_names[v],
                     "kind": kind,
                     "module": mod,
-                    "hasSorry": n.get("hasSorry", False),
-                    "isUnsafe": n.get("isUnsafe", False),
-                    "axioms": n.get("axioms", [])
+                    "hasSorry": graph.has_sorry(v),
+                    "isUnsafe": graph.is_unsafe(v),
+                    "axioms": graph.axioms(v)
                 })
     return sorted(decls, key=lambda x: x["fullName"])
 
 
-def run_one(decl: Dict[str, Any], zone: Dict[str, Any], project_root: Path, summary_only: bool = False) -> Dict[str, Any]:
+class ParanoiaAdapter(CheckerAdapter):
     """
-    Run LeanParanoia on a single declaration with zone-specific flags.
-    
-    Args:
-        decl: Declaration info
-        zone: Policy zone
-        project_root: Project directory
-        summary_only: If True, only capture first error line (much smaller output)
-    
-    Returns status dict with 'ok', error summary, etc.
+    Runs LeanParanoia on a single declaration with zone-specific flags.
+
+    Items are (decl, zone) pairs: declaration info from decls_for_zone and a
+    policy zone. With summary_only, only the first error line is kept (much
+    smaller output).
     """
-    full_name = decl["fullName"]
-    allowed = zone.get("allowed_axioms", ["propext", "Quot.sound", "Classical.choice"])
-    forbid = set(zone.get("forbid", []))
-    trusted = zone.get("trust_modules", [])
-    
-    # Build command
-    cmd = ["lake", "exe", "paranoia", full_name]
-    
-    # Set allowed axioms
-    if allowed:
-        cmd += ["--allowed-axioms", ",".join(allowed)]
-    
-    # Set trusted modules (skip verification of dependencies)
-    if trusted:
-        cmd += ["--trust-modules", ",".join(trusted)]
-    
-    # IMPORTANT: LeanParanoia's --no-* flags DISABLE checks
-    # We only add them when we want to ALLOW that feature (i.e., NOT in forbid list)
-    
-    # Build the disable flags for things NOT in forbid list
-    # If something is not forbidden, we may want to disable its check
-    # But we need to be careful: we want to CHECK things that ARE forbidden
-    
-    # Actually, let's think about this differently:
-    # - If "sorry" is in forbid list, we WANT to check for sorry (don't add --no-sorry)
-    # - If "sorry" is NOT in forbid list, we DON'T care about sorry (add --no-sorry)
-    
-    # Available checks in LeanParanoia:
-    # --no-sorry, --no-metavariables, --no-unsafe, --no-axioms, --no-extern, --no-opaque
-    
-    # Actually, reading the LeanParanoia code more carefully:
-    # By default, all checks are ON. The --no-* flags turn them OFF.
-    # So we should ONLY add --no-* flags for things NOT in the forbid list.
-    
-    # Let's be explicit about what we're checking:
-    check_sorry = "sorry" in forbid
-    check_metavariables = "metavariables" in forbid
-    check_unsafe = "unsafe" in forbid
-    check_extern = "extern" in forbid
-    
-    # Disable checks for things NOT forbidden
-    if not check_sorry:
-        cmd.append("--no-sorry")
-    if not check_metavariables:
-        cmd.append("--no-metavariables")
-    if not check_unsafe:
-        cmd.append("--no-unsafe")
-    if not check_extern:
-        cmd.append("--no-extern")
-    
-    # Fail fast for efficiency
-    cmd.append("--fail-fast")
-    
-    try:
-        # Run in project directory
-        p = subprocess.run(
-            cmd,
-            cwd=project_root,
-            capture_output=True,
-            text=True,
-            check=False,
-            timeout=300  # 5 minute timeout per declaration
-        )
-        
-        ok = (p.returncode == 0)
-        
+
+    tool = "paranoia"
+    executable = "paranoia"
+    timeout = 300  # 5 minute timeout per declaration
+    output_limit = 8 * 1024 * 1024  # stdout is LeanParanoia's JSON result; keep all of it
+
+    def __init__(self, project_root: Path, summary_only: bool = False):
+        super().__init__(cwd=project_root)  # run in project directory
+        self.summary_only = summary_only
+
+    def command(self, item) -> List[str]:
+        decl, zone = item
+        full_name = decl["fullName"]
+        allowed = zone.get("allowed_axioms", ["propext", "Quot.sound", "Classical.choice"])
+        forbid = set(zone.get("forbid", []))
+        trusted = zone.get("trust_modules", [])
+
+        # Build command
+        cmd = ["lake", "exe", "paranoia", full_name]
+
+        # Set allowed axioms
+        if allowed:
+            cmd += ["--allowed-axioms", ",".join(allowed)]
+
+        # Set trusted modules (skip verification of dependencies)
+        if trusted:
+            cmd += ["--trust-modules", ",".join(trusted)]
+
+        # IMPORTANT: LeanParanoia's --no-* flags DISABLE checks
+        # We only add them when we want to ALLOW that feature (i.e., NOT in forbid list)
+
+        # Build the disable flags for things NOT in forbid list
+        # If something is not forbidden, we may want to disable its check
+        # But we need to be careful: we want to CHECK things that ARE forbidden
+
+        # Actually, let's think about this differently:
+        # - If "sorry" is in forbid list, we WANT to check for sorry (don't add --no-sorry)
+        # - If "sorry" is NOT in forbid list, we DON'T care about sorry (add --no-sorry)
+
+        # Available checks in LeanParanoia:
+        # --no-sorry, --no-metavariables, --no-unsafe, --no-axioms, --no-extern, --no-opaque
+
+        # Actually, reading the LeanParanoia code more carefully:
+        # By default, all checks are ON. The --no-* flags turn them OFF.
+        # So we should ONLY add --no-* flags for things NOT in the forbid list.
+
+        # Let's be explicit about what we're checking:
+        check_sorry = "sorry" in forbid
+        check_metavariables = "metavariables" in forbid
+        check_unsafe = "unsafe" in forbid
+        check_extern = "extern" in forbid
+
+        # Disable checks for things NOT forbidden
+        if not check_sorry:
+            cmd.append("--no-sorry")
+        if not check_metavariables:
+            cmd.append("--no-metavariables")
+        if not check_unsafe:
+            cmd.append("--no-unsafe")
+        if not check_extern:
+            cmd.append("--no-extern")
+
+        # Fail fast for efficiency
+        cmd.append("--fail-fast")
+
+        return cmd
+
+    def parse(self, item, p: CheckResult) -> Dict[str, Any]:
+        """Status dict with 'ok', error summary, etc."""
+        decl, zone = item
+        full_name = decl["fullName"]
+        if p.timed_out or p.error is not None:
+            result = {
+                "decl": full_name,
+                "zone": zone["name"],
+                "ok": False,
+                "error": f"timeout (>{describe_timeout(self.timeout)})" if p.timed_out else p.error,
+                "kind": decl["kind"],
+                "module": decl["module"]
+            }
+            if p.logs:
+                result["log"] = p.logs
+            return result
+
+        ok = p.ok
+
         # Parse JSON output from paranoia (stdout contains JSON, stderr has build info)
         error_summary = ""
         paranoia_json = None
@@ -189,13 +208,13 @@ def run_one(decl: Dict[str, Any], zone: Dict[str, Any], project_root: Path, summ
         }
         
         # Add detailed output only if not in summary mode
-        if not summary_only:
-            result["cmd"] = " ".join(shlex.quote(c) for c in cmd)
+        if not self.summary_only:
+            result["cmd"] = p.command
             # Store parsed JSON if available
             if paranoia_json:
                 result["paranoia_result"] = paranoia_json
-            else:
-                # Fallback: store raw output
+            elif not p.logs:
+                # Fallback: store raw output (it is in the log store otherwise)
                 result["stdout"] = p.stdout.strip()[:1000] if p.stdout else ""
                 result["stderr"] = p.stderr.strip()[:1000] if p.stderr else ""
         
@@ -203,25 +222,11 @@ def run_one(decl: Dict[str, Any], zone: Dict[str, Any], project_root: Path, summ
         if not ok and error_summary:
             result["error"] = error_summary
         
+        # Failed checks refer to their full output in the log store (log_store.py)
+        if not ok and p.logs:
+            result["log"] = p.logs
+        
         return result
-    except subprocess.TimeoutExpired:
-        return {
-            "decl": full_name,
-            "zone": zone["name"],
-            "ok": False,
-            "error": "timeout (>5 minutes)",
-            "kind": decl["kind"],
-            "module": decl["module"]
-        }
-    except Exception as e:
-        return {
-            "decl": full_name,
-            "zone": zone["name"],
-            "ok": False,
-            "error": str(e),
-            "kind": decl["kind"],
-            "module": decl["module"]
-        }
 
 
 def main():
@@ -234,12 +239,13 @@ def main():
                     help="Path to policy YAML file")
     ap.add_argument("--out", default="paranoia_report.json",
                     help="Output path for report JSON")
-    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 4,
-                    help="Number of parallel jobs")
     ap.add_argument("--project-root", default=".",
                     help="Project root directory (where lakefile.lean lives)")
     ap.add_argument("--summary-only", action="store_true",
                     help="Only capture error summaries (much smaller output, recommended for large projects)")
+    ap.add_argument("--journal",
+                    help="Append each result to this JSON Lines journal as it completes (see result_journal.py)")
+    add_runtime_arguments(ap, "paranoia", jobs=os.cpu_count() or 4, timeout=ParanoiaAdapter.timeout)
     args = ap.parse_args()
     
     # Resolve paths
@@ -254,8 +260,8 @@ def main():
         print("Run: lake env depviz --roots YourProject --json-out depgraph.json", file=sys.stderr)
         sys.exit(1)
     
-    with open(depgraph_path) as f:
-        depgraph = json.load(f)
+    # Prefers the binary sidecar (depgraph_sidecar.py) when it is present and fresh
+    graph = DepGraph.load(depgraph_path)
     
     # Load policy
     if not policy_path.exists():
@@ -270,52 +276,42 @@ def main():
         print("Warning: No zones defined in policy file", file=sys.stderr)
         sys.exit(0)
     
-    print(f"Loaded {len(depgraph.get('nodes', []))} nodes from {depgraph_path}")
+    print(f"Loaded {len(graph)} nodes from {depgraph_path}")
     print(f"Checking {len(zones)} zone(s) with {args.jobs} parallel jobs")
     
     # Collect all work items
-    results = []
-    total_decls = 0
+    work = []
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
-        futures = []
-        
-        for zone in zones:
-            decls = decls_for_zone(depgraph, zone["include"], zone.get("exclude", []))
-            print(f"Zone '{zone['name']}': {len(decls)} declarations")
-            total_decls += len(decls)
-            
-            for decl in decls:
-                future = executor.submit(run_one, decl, zone, project_root, args.summary_only)
-                futures.append(future)
-        
-        # Collect results with progress
-        print(f"\nRunning checks on {total_decls} declarations...")
-        completed = 0
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            results.append(result)
-            completed += 1
-            if completed % 10 == 0 or completed == total_decls:
-                print(f"  Progress: {completed}/{total_decls}", end="\r")
-        print()  # newline after progress
+    for zone in zones:
+        decls = decls_for_zone(graph, zone["include"], zone.get("exclude", []))
+        print(f"Zone '{zone['name']}': {len(decls)} declarations")
+        work.extend((decl, zone) for decl in decls)
+    total_decls = len(work)
     
-    # Write report in unified format
-    report = {
-        "tool": "paranoia",
-        "version": "0.1.0",
-        "timestamp": subprocess.run(["date", "-Iseconds"], capture_output=True, text=True).stdout.strip(),
-        "declarations": results,  # Changed from "results" to "declarations"
-        "summary": {
-            "total": len(results),
-            "passed": sum(1 for r in results if r.get("ok", False)),
-            "failed": sum(1 for r in results if not r.get("ok", False)),
-            "mode": "summary" if args.summary_only else "detailed"
-        }
-    }
+    runtime = runtime_from_args(ParanoiaAdapter(project_root, args.summary_only), args, out_path)
+    journal = ResultJournal(project_root / args.journal, "paranoia", total_decls) if args.journal else None
+    
+    # Collect results with progress
+    print(f"\nRunning checks on {total_decls} declarations...")
+    completed = 0
     
-    with open(out_path, "w") as f:
-        json.dump(report, f, indent=2)
+    def on_result(item, result):
+        nonlocal completed
+        if journal:
+            journal.add(result)
+        completed += 1
+        if completed % 10 == 0 or completed == total_decls:
+            print(f"  Progress: {completed}/{total_decls}", end="\r")
+    
+    results = runtime.run(work, on_result)
+    print()  # newline after progress
+    print(runtime.describe())
+    
+    # Write report in unified format
+    report = unified_report("paranoia", results, summary={"mode": "summary" if args.summary_only else "detailed"})
+    write_report(report, out_path, runtime.log_store)
+    if journal:
+        journal.close(report["summary"])
     
     # Report file size
     file_size = out_path.stat().st_size
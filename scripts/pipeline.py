@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Run the whole verification flow as one command, make-style.
+
+The multi-checker flow (see examples/multi-checker-example.sh) is a set of
+separate commands. This script runs them as a DAG of stages:
+
+    depgraph ──► sidecar ──┬──► paranoia ─────┐
+                           ├──► lean4checker ─┼──► merge ──► validate
+    checkers ──────────────┴──► safeverify ───┘        └───► embed
+
+Each stage is one of the existing scripts (or `lake exe depviz`) with
+declared input and output files. A stage depends on the stages that write its
+inputs. Independent stages, such as the checkers, run at the same time (up
+to --parallel). Stage output goes to --out-dir/logs/STAGE.log.
+
+A stage is skipped when its command and the content hashes of its inputs
+match the last successful run and its outputs are unchanged since then.
+Depviz and the checkers also take the project's Lean sources as an input.
+File hashes are cached by size and mtime, so an unchanged tree is not re-read.
+The sidecar stage writes depgraph.json.idx (depgraph_sidecar.py) once, and
+every later stage maps it instead of parsing the JSON again. The checkers
+stage builds the checker executables once (lake_exec.py), and the checkers
+then start the binaries directly instead of going through `lake exe` for
+every declaration (--no-direct turns this off). State is kept
+in --out-dir/.pipeline-state.json. At the end a timing breakdown per stage
+is printed.
+
+Checkers and merge exit 1 when declarations fail. That counts as success if
+their report was written; the failures are in the report.
+
+Usage:
+    python scripts/pipeline.py --roots MyProject --policy policy.yaml --out-dir verify
+    python scripts/pipeline.py --depgraph depgraph.json --no-lean4checker --policy policy.yaml
+    python scripts/pipeline.py --roots MyProject --safeverify-target /tmp/target_build --safeverify-submit .lake/build
+    python scripts/pipeline.py ... --cpu 8 --mem 16G  # checkers share one budget (resource_broker.py)
+    python scripts/pipeline.py ... --dry-run          # show what would run
+    python scripts/pipeline.py ... --force paranoia   # re-run a stage (and what depends on it)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from depgraph_sidecar import open_sidecar, sidecar_path
+from lake_exec import DirectLauncher
+from resource_broker import ResourceBroker, parse_mem
+
+SCRIPTS = Path(__file__).resolve().parent
+STATE_VERSION = 1
+STATE_FILE = ".pipeline-state.json"
+HASH_CHUNK = 1 << 20
+
+# Files besides *.lean whose changes change what the checkers see
+PROJECT_FILES = ("lakefile.lean", "lakefile.toml", "lean-toolchain", "lake-manifest.json")
+SOURCES = "<lean sources>"  # pseudo-input standing for the project's Lean sources
+
+
+class Stage:
+    """One command of the pipeline, with the files it reads and writes."""
+
+    def __init__(self, name: str, cmd: Sequence[str], inputs: Iterable = (), outputs: Iterable[Path] = (),
+                 cwd: Optional[Path] = None, ok_exit: Tuple[int, ...] = (0,),
+                 fresh: Optional[Callable[[], bool]] = None, tuning: Sequence[str] = ()):
+        self.name = name
+        self.cmd = [str(c) for c in cmd]
+        self.tuning = [str(c) for c in tuning]  # options that do not change the outputs (not hashed)
+        self.inputs = list(inputs)  # Paths (files or directories) or SOURCES
+        self.outputs = [Path(p) for p in outputs]
+        self.cwd = cwd
+        self.ok_exit = ok_exit
+        self.fresh = fresh  # extra up-to-date check besides the output hashes
+        self.deps: List[str] = []
+
+
+class FileHashes:
+    """Content hashes of files and directories, cached by (size, mtime)."""
+
+    def __init__(self, cache: Dict[str, list]):
+        self.cache = cache
+        self.lock = threading.Lock()
+
+    def file(self, path: Path) -> Optional[str]:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return None
+        key = str(path.resolve())
+        with self.lock:
+            cached = self.cache.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+        with self.lock:
+            self.cache[key] = [st.st_size, st.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def files(self, paths: Iterable[Path], root: Path) -> str:
+        """One hash over relative names and content hashes."""
+        digest = hashlib.sha256()
+        for path in sorted(paths):
+            digest.update(f"{path.relative_to(root)}\0{self.file(path)}\n".encode())
+        return digest.hexdigest()
+
+    def path(self, path: Path) -> Optional[str]:
+        if path.is_dir():
+            return self.files((p for p in path.rglob("*") if p.is_file()), path)
+        return self.file(path)
+
+
+def lean_sources(project_root: Path, skip: Iterable[Path] = ()) -> List[Path]:
+    """The project's .lean files (outside .lake and hidden directories) and Lake configuration."""
+    skip = {p.resolve() for p in skip}
+    found = [project_root / name for name in PROJECT_FILES if (project_root / name).is_file()]
+    for dirpath, dirnames, filenames in os.walk(project_root):
+        dirnames[:] = [d for d in dirnames
+                       if not d.startswith(".") and Path(dirpath, d).resolve() not in skip]
+        found.extend(Path(dirpath, f) for f in filenames if f.endswith(".lean"))
+    return found
+
+
+def link_stages(stages: List[Stage]) -> None:
+    """Make each stage depend on the stages that write its inputs (in list order)."""
+    writers: Dict[Path, str] = {}
+    for stage in stages:
+        stage.deps = sorted({writers[p.resolve()] for p in stage.inputs
+                             if isinstance(p, Path) and p.resolve() in writers})
+        for p in stage.outputs:
+            writers[p.resolve()] = stage.name
+
+
+def dependents_of(stages: List[Stage], names: Iterable[str]) -> set:
+    """The named stages and every stage downstream of them."""
+    found = set(names)
+    for stage in stages:  # stages are in dependency order
+        if found.intersection(stage.deps):
+            found.add(stage.name)
+    return found
+
+
+class Pipeline:
+    """Runs linked stages concurrently, skipping the ones that are up to date."""
+
+    def __init__(self, stages: List[Stage], out_dir: Path, project_root: Path, parallel: int,
+                 force: Iterable[str] = (), dry_run: bool = False):
+        self.stages = {s.name: s for s in stages}
+        self.order = [s.name for s in stages]
+        self.out_dir = out_dir
+        self.project_root = project_root
+        self.parallel = parallel
+        self.force = dependents_of(stages, force)
+        self.dry_run = dry_run
+
+        self.state_path = out_dir / STATE_FILE
+        state = {}
+        if self.state_path.exists():
+            try:
+                state = json.loads(self.state_path.read_text())
+            except ValueError:
+                state = {}
+        if state.get("version") != STATE_VERSION:
+            state = {"version": STATE_VERSION, "files": {}, "stages": {}}
+        self.state = state
+        self.hashes = FileHashes(state["files"])
+        self.state_lock = threading.Lock()
+        self._sources: Optional[str] = None
+        self.results: Dict[str, Dict] = {}
+
+    def sources_hash(self) -> str:
+        if self._sources is None:
+            self._sources = self.hashes.files(lean_sources(self.project_root, skip=[self.out_dir]),
+                                              self.project_root)
+        return self._sources
+
+    def stage_key(self, stage: Stage) -> str:
+        """Hash of the command and the content of every input."""
+        digest = hashlib.sha256(json.dumps(stage.cmd).encode())
+        for item in stage.inputs:
+            value = self.sources_hash() if item == SOURCES else self.hashes.path(Path(item))
+            digest.update(f"\n{item}\0{value}".encode())
+        return digest.hexdigest()
+
+    def up_to_date(self, stage: Stage, key: str) -> bool:
+        if stage.name in self.force:
+            return False
+        previous = self.state["stages"].get(stage.name)
+        if not previous or previous.get("key") != key:
+            return False
+        for path in stage.outputs:
+            if self.hashes.file(path) != previous["outputs"].get(str(path)):
+                return False
+        return stage.fresh is None or stage.fresh()
+
+    def run_stage(self, stage: Stage) -> Dict:
+        start = time.perf_counter()
+        key = self.stage_key(stage)
+        if self.up_to_date(stage, key):
+            return {"status": "up to date", "seconds": time.perf_counter() - start}
+        if self.dry_run:
+            return {"status": "would run", "seconds": 0.0}
+
+        with self.state_lock:
+            print(f"▶ {stage.name}: {' '.join(shlex.quote(c) for c in stage.cmd + stage.tuning)}", flush=True)
+        log_path = self.out_dir / "logs" / f"{stage.name}.log"
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(log_path, "w") as log:
+            try:
+                code = subprocess.run(stage.cmd + stage.tuning, cwd=stage.cwd, stdout=log, stderr=subprocess.STDOUT).returncode
+            except OSError as e:
+                log.write(f"{e}\n")
+                code = 127
+        seconds = time.perf_counter() - start
+        missing = [str(p) for p in stage.outputs if not p.exists()]
+        if code not in stage.ok_exit or missing:
+            reason = f"exit {code}" + (f", missing {', '.join(missing)}" if missing else "")
+            return {"status": "failed", "seconds": seconds, "exit": code, "reason": reason, "log": str(log_path)}
+
+        with self.state_lock:
+            self.state["stages"][stage.name] = {
+                "key": key,
+                "outputs": {str(p): self.hashes.file(p) for p in stage.outputs},
+                "exit": code,
+                "seconds": round(seconds, 3),
+            }
+            self.save_state()
+        return {"status": "ran", "seconds": seconds, "exit": code, "log": str(log_path)}
+
+    def save_state(self) -> None:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+        tmp.write_text(json.dumps(self.state, indent=1))
+        os.replace(tmp, self.state_path)
+
+    def run(self) -> bool:
+        """Run every stage whose dependencies succeeded; True if all stages did."""
+        pending = list(self.order)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            while pending or running:
+                for name in list(pending):
+                    deps = [self.results.get(d) for d in self.stages[name].deps]
+                    if any(r is None for r in deps):
+                        continue
+                    pending.remove(name)
+                    if any(r["status"] in ("failed", "blocked") for r in deps):
+                        self.results[name] = {"status": "blocked", "seconds": 0.0}
+                        print(f"✗ {name}: skipped, a stage it needs failed", flush=True)
+                        continue
+                    if self.dry_run and any(r["status"] == "would run" for r in deps):
+                        self.results[name] = {"status": "would run", "seconds": 0.0}
+                        print(f"· {name}: would run", flush=True)
+                        continue
+                    running[pool.submit(self.run_stage, self.stages[name])] = name
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    self.results[name] = result
+                    if result["status"] == "ran":
+                        note = f" (exit {result['exit']}, failures in report)" if result["exit"] else ""
+                        print(f"✓ {name}: {result['seconds']:.1f}s{note}", flush=True)
+                    elif result["status"] == "failed":
+                        print(f"✗ {name}: {result['reason']}; see {result['log']}", flush=True)
+                    else:
+                        print(f"· {name}: {result['status']}", flush=True)
+        return all(r["status"] in ("ran", "up to date", "would run") for r in self.results.values())
+
+    def print_timings(self, wall: float) -> None:
+        print(f"\n{'='*60}")
+        print(f"{'Stage':<16}{'Status':<16}{'Time':>10}")
+        print(f"{'-'*60}")
+        for name in self.order:
+            r = self.results[name]
+            print(f"{name:<16}{r['status']:<16}{r['seconds']:>9.1f}s")
+        print(f"{'-'*60}")
+        busy = sum(r["seconds"] for r in self.results.values())
+        print(f"{'Wall time':<32}{wall:>9.1f}s")
+        if busy > wall + 0.05:
+            print(f"{'Sum of stage times':<32}{busy:>9.1f}s (concurrent stages saved {busy - wall:.1f}s)")
+
+
+def build_stages(args, project_root: Path, out_dir: Path) -> List[Stage]:
+    """The stages selected by the command-line options, in dependency order."""
+    py = sys.executable
+    stages: List[Stage] = []
+
+    if args.depgraph:
+        depgraph = Path(args.depgraph).resolve()
+        dot = Path(args.dot).resolve() if args.dot else None
+    else:
+        depgraph = out_dir / "depgraph.json"
+        dot = out_dir / "depgraph.dot"
+        stages.append(Stage(
+            "depgraph",
+            ["lake", "exe", "depviz", "--roots", args.roots, "--json-out", depgraph, "--dot-out", dot],
+            inputs=[SOURCES], outputs=[depgraph, dot], cwd=project_root))
+
+    # Later stages map the sidecar instead of parsing the JSON
+    stages.append(Stage(
+        "sidecar", [py, SCRIPTS / "depgraph_sidecar.py", depgraph],
+        inputs=[depgraph], outputs=[sidecar_path(depgraph)],
+        fresh=lambda: open_sidecar(depgraph) is not None))
+    graph_inputs = [depgraph, sidecar_path(depgraph)]
+
+    # Checkers share the machine through the resource broker (its budget is set in main)
+    tuning = ["--broker", args.broker] if args.broker is not None else []
+    if args.jobs:
+        tuning += ["--jobs", args.jobs]
+    cache_dir = out_dir / "checker-cache"  # module results reused while their .olean files are unchanged
+
+    # Build the checker executables once; the checkers then run the binaries without lake exe
+    executables = ([] if not args.policy else ["paranoia"]) + ([] if args.no_lean4checker else ["lean4checker"]) \
+        + (["safe_verify"] if args.safeverify_target else [])
+    checker_inputs = graph_inputs + [SOURCES]
+    if executables and not args.no_direct:
+        manifest = out_dir / "checkers.json"
+        stages.append(Stage(
+            "checkers",
+            [py, SCRIPTS / "lake_exec.py", *executables, "--cwd", project_root, "--out", manifest],
+            inputs=[project_root / name for name in PROJECT_FILES if (project_root / name).is_file()],
+            outputs=[manifest],
+            fresh=lambda: not DirectLauncher.load(manifest).stale()))
+        tuning += ["--direct", manifest]
+        checker_inputs.append(manifest)
+
+    reports = []
+    if args.policy:
+        out = out_dir / "paranoia_report.json"
+        cmd = [py, SCRIPTS / "paranoia_runner.py", "--project-root", project_root,
+               "--depgraph", depgraph, "--policy", Path(args.policy).resolve(), "--out", out]
+        if args.summary_only:
+            cmd.append("--summary-only")
+        if args.journal:
+            cmd += ["--journal", out_dir / "paranoia.jsonl"]
+        stages.append(Stage("paranoia", cmd, inputs=checker_inputs + [Path(args.policy).resolve()],
+                            outputs=[out], ok_exit=(0, 1),
+                            tuning=tuning))
+        reports.append(out)
+    if not args.no_lean4checker:
+        out = out_dir / "kernel_report.json"
+        cmd = [py, SCRIPTS / "lean4checker_adapter.py", "--depgraph", depgraph, "--out", out, "--cwd", project_root]
+        if args.fresh:
+            cmd.append("--fresh")
+        stages.append(Stage("lean4checker", cmd, inputs=checker_inputs, outputs=[out], ok_exit=(0, 1),
+                            tuning=tuning + ["--cache", cache_dir / "lean4checker.json"]))
+        reports.append(out)
+    if args.safeverify_target:
+        out = out_dir / "safeverify_report.json"
+        target = Path(args.safeverify_target).resolve()
+        submit = project_root / args.safeverify_submit
+        stages.append(Stage(
+            "safeverify",
+            [py, SCRIPTS / "safeverify_adapter.py", "--depgraph", depgraph, "--target-dir", target,
+             "--submit-dir", submit, "--out", out, "--cwd", project_root],
+            inputs=checker_inputs + [target, submit], outputs=[out], ok_exit=(0, 1),
+            tuning=tuning + ["--cache", cache_dir / "safeverify.json"]))
+        reports.append(out)
+
+    report = None
+    if reports:
+        report = out_dir / "unified_report.json"
+        stages.append(Stage("merge", [py, SCRIPTS / "merge_reports.py", "--reports", *reports, "--out", report],
+                            inputs=reports, outputs=[report], ok_exit=(0, 1)))
+        stages.append(Stage("validate", [py, SCRIPTS / "validate_unified_report.py", "--report", report],
+                            inputs=[report]))
+
+    html = out_dir / "report.html"
+    viewer = SCRIPTS.parent / "viewer" / "paranoia-viewer.html"
+    cmd = [py, SCRIPTS / "embed_data.py", "--viewer", viewer, "--depgraph", depgraph, "--output", html]
+    inputs = graph_inputs + [viewer]
+    if report:
+        cmd += ["--report", report]
+        inputs.append(report)
+    if dot:
+        cmd += ["--dot", dot]
+        inputs.append(dot)
+    stages.append(Stage("embed", cmd, inputs=inputs, outputs=[html]))
+
+    link_stages(stages)
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run depviz, the checkers, merge, validate and embed as one pipeline")
+    parser.add_argument("--roots", help="Project root name(s) for depviz (required unless --depgraph is given)")
+    parser.add_argument("--depgraph", help="Use this dependency graph instead of running depviz")
+    parser.add_argument("--dot", help="DOT file to embed with --depgraph (optional)")
+    parser.add_argument("--policy", help="Policy YAML; runs LeanParanoia when given")
+    parser.add_argument("--no-lean4checker", action="store_true", help="Do not run lean4checker")
+    parser.add_argument("--fresh", action="store_true", help="Run lean4checker in --fresh mode")
+    parser.add_argument("--safeverify-target", help="Reference build directory; runs SafeVerify when given")
+    parser.add_argument("--safeverify-submit", default=".lake/build",
+                        help="Submission build directory for SafeVerify (default: .lake/build)")
+    parser.add_argument("--summary-only", action="store_true", help="Pass --summary-only to the paranoia runner")
+    parser.add_argument("--no-direct", action="store_true",
+                        help="Run checkers through lake exe instead of resolving their binaries once (lake_exec.py)")
+    parser.add_argument("--journal", action="store_true",
+                        help="Have the paranoia runner write OUT_DIR/paranoia.jsonl (see result_journal.py)")
+    parser.add_argument("--jobs", type=int, help="Checker processes at a time for each checker")
+    parser.add_argument("--project-root", default=".", help="Lean project directory (default: .)")
+    parser.add_argument("--out-dir", default="verification", help="Where reports, logs and state go (default: verification)")
+    parser.add_argument("--broker", nargs="?", const="", metavar="DIR",
+                        help="Have the checkers share a resource broker (see resource_broker.py)")
+    parser.add_argument("--cpu", type=int, help="Broker CPU budget for all checkers (implies --broker)")
+    parser.add_argument("--mem", help="Broker memory budget for all checkers, e.g. 16G (implies --broker)")
+    parser.add_argument("--parallel", type=int, default=4, help="Stages run at the same time (default: 4)")
+    parser.add_argument("--force", nargs="*", metavar="STAGE",
+                        help="Re-run these stages and everything after them (no names: all stages)")
+    parser.add_argument("--dry-run", action="store_true", help="Only show which stages would run")
+
+    args = parser.parse_args()
+
+    if not args.depgraph and not args.roots:
+        parser.error("--roots is required unless --depgraph is given")
+    if args.dot and not args.depgraph:
+        parser.error("--dot goes with --depgraph")
+    for path in (args.depgraph, args.dot, args.policy, args.safeverify_target):
+        if path and not Path(path).exists():
+            print(f"Error: Not found: {path}", file=sys.stderr)
+            return 1
+
+    project_root = Path(args.project_root).resolve()
+    out_dir = Path(args.out_dir).resolve()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if (args.cpu or args.mem) and args.broker is None:
+        args.broker = ""
+    if args.broker is not None:
+        broker = ResourceBroker(args.broker or None)
+        budget = broker.budget()
+        if args.cpu or args.mem:
+            broker.set_budget(args.cpu or budget["cpu"], parse_mem(args.mem) if args.mem else budget["mem_mb"])
+            budget = broker.budget()
+        print(f"Broker: {broker.directory} ({budget['cpu']} CPUs, {budget['mem_mb']}MB)")
+    stages = build_stages(args, project_root, out_dir)
+
+    names = [s.name for s in stages]
+    force = names if args.force == [] else args.force or []
+    unknown = [name for name in force if name not in names]
+    if unknown:
+        parser.error(f"unknown stage(s) {', '.join(unknown)}; stages: {', '.join(names)}")
+
+    print(f"Pipeline: {' → '.join(names)}")
+    print(f"Output: {out_dir}\n")
+    pipeline = Pipeline(stages, out_dir, project_root, max(1, args.parallel), force, args.dry_run)
+    start = time.perf_counter()
+    ok = pipeline.run()
+    pipeline.print_timings(time.perf_counter() - start)
+    pipeline.save_state()  # keeps the file hash cache
+
+    if not ok:
+        print("\n✗ Pipeline failed")
+        return 1
+    if not args.dry_run:
+        print(f"\n✓ Report: {out_dir / 'report.html'}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Render a dependency graph to SVG in parallel, with a per-part layout cache.
+
+Laying out a large graph in one Graphviz process is slow and starts from
+scratch on every change. This script instead:
+
+1. splits the graph into weakly connected components; a component that fits
+   in --max-part-nodes stays whole (small ones share parts, grouped by
+   module), and a larger one is split into one part per module (a module
+   above the bound is cut by dependency depth within the module)
+2. writes each part as DOT and lays it out with `dot -Tsvg`, up to --jobs
+   Graphviz processes at a time
+3. caches every fragment under --cache-dir by a hash of its DOT text (and the
+   Graphviz version), so after a small edit only the parts that changed are
+   laid out again
+4. packs the fragments into one SVG document (shelf packing, largest first),
+   prefixing element IDs per fragment so they stay unique
+
+Edges between parts of a split component are drawn as straight arrows over the
+packed fragments. The result can be passed to embed_data.py --svg.
+
+Usage:
+    python scripts/render_svg.py --depgraph depgraph.json --out depgraph.svg \
+        [--jobs 8] [--max-part-nodes 1500] [--cache-dir .render-cache] [--engine dot]
+"""
+
+import argparse
+import hashlib
+import html
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from depgraph_core import DepGraph, depgraph_to_dot
+
+DEFAULT_MAX_PART_NODES = 1500
+DEFAULT_CACHE_DIR = ".render-cache"
+GAP = 24  # points between packed fragments
+PACK_BOUNDARY = 8  # small components start a new shared part at about one module in this many
+
+SVG_ROOT = re.compile(r'<svg\b[^>]*?\bwidth="([\d.]+)pt"\s+height="([\d.]+)pt"[^>]*>', re.S)
+VIEWBOX = re.compile(r'viewBox="([^"]*)"')
+GRAPH_TRANSFORM = re.compile(r'class="graph" transform="scale\(([-\d.]+)(?: ([-\d.]+))?\) rotate\(0\) '
+                             r'translate\(([-\d.]+) ([-\d.]+)\)"')
+NODE_SHAPE = re.compile(r'<g id="[^"]*" class="node">\s*<title>(.*?)</title>\s*'
+                        r'(?:<(?:g|a)\b[^>]*>\s*)*(<(?:ellipse|polygon)\b[^>]*>)', re.S)
+ELLIPSE_CENTER = re.compile(r'\bcx="([-\d.]+)" cy="([-\d.]+)"')
+POINTS = re.compile(r'\bpoints="([^"]*)"')
+
+
+def weak_components(graph: DepGraph) -> List[List[int]]:
+    """Weakly connected components (union-find), each sorted, ordered by first vertex."""
+    parent = list(range(graph.vertex_count))
+
+    def find(v: int) -> int:
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    for v in range(graph.vertex_count):
+        for w in graph.dependents(v):
+            a, b = find(v), find(w)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+
+    groups: Dict[int, List[int]] = {}
+    for v in range(graph.vertex_count):
+        groups.setdefault(find(v), []).append(v)
+    return list(groups.values())
+
+
+def split_parts(graph: DepGraph, max_nodes: int) -> List[List[int]]:
+    """
+    Partition the vertices into layout parts of at most `max_nodes` (where possible).
+
+    Components that fit are kept whole, so none of their edges is cut: larger
+    ones get a part of their own and small ones (a quarter of the bound or
+    less) share parts with others (see pack_small). Only a component above
+    the bound is split, into one part per module. Both groupings are keyed by
+    module, so an edit changes few parts and the cached layouts of the others
+    stay valid.
+    """
+    components = weak_components(graph)
+    if graph.vertex_count <= max_nodes:
+        return [list(range(graph.vertex_count))] if graph.vertex_count else []
+
+    parts: List[List[int]] = []
+    small: Dict[str, List[List[int]]] = {}
+    loose: Dict[str, List[int]] = {}
+    names = graph.full_names
+    for comp in components:
+        if len(comp) > max_nodes:
+            for v in comp:
+                loose.setdefault(graph.module(v), []).append(v)
+        elif len(comp) * 4 > max_nodes:
+            parts.append(comp)
+        else:
+            # Grouped under the module of the component's first name, which an edit elsewhere does not move
+            small.setdefault(graph.module(min(comp, key=names.__getitem__)), []).append(comp)
+    parts.extend(pack_small(small, max_nodes))
+
+    for module in sorted(loose):
+        members = loose[module]
+        if len(members) <= max_nodes:
+            parts.append(members)
+            continue
+        rank = module_rank(graph, members)
+        members.sort(key=rank.__getitem__)
+        for i in range(0, len(members), max_nodes):
+            parts.append(members[i:i + max_nodes])
+    return parts
+
+
+def pack_small(small: Dict[str, List[List[int]]], max_nodes: int) -> List[List[int]]:
+    """
+    Pack small components, grouped by module, into shared parts.
+
+    Modules are taken in name order. A part ends when the next module would
+    overflow it, or before a module whose name hashes to a boundary (about
+    one in PACK_BOUNDARY). Those boundaries depend only on module names, so a
+    component that grows or shrinks moves at most the boundaries up to the
+    next hashed one, not every later part.
+    """
+    parts: List[List[int]] = []
+    current: List[int] = []
+    for module in sorted(small):
+        comps = small[module]
+        size = sum(len(comp) for comp in comps)
+        boundary = int(hashlib.sha256(module.encode()).hexdigest()[:8], 16) % PACK_BOUNDARY == 0
+        if current and (boundary or len(current) + size > max_nodes):
+            parts.append(current)
+            current = []
+        for comp in comps:
+            if current and len(current) + len(comp) > max_nodes:
+                parts.append(current)
+                current = []
+            current.extend(comp)
+    if current:
+        parts.append(current)
+    return parts
+
+
+def module_rank(graph: DepGraph, members: List[int]) -> Dict[int, Tuple[int, str]]:
+    """
+    Sort key for cutting an oversized module: (depth, name).
+
+    The depth is the longest dependency path inside the module, so it does
+    not depend on anything outside the module; declarations on a cycle come
+    last.
+    """
+    inside = set(members)
+    waiting = {v: sum(1 for u in graph.dependencies(v) if u in inside) for v in members}
+    depth = {v: 0 for v in members if waiting[v] == 0}
+    ready = list(depth)
+    for v in ready:
+        for w in graph.dependents(v):
+            if w in inside:
+                depth[w] = max(depth.get(w, 0), depth[v] + 1)
+                waiting[w] -= 1
+                if waiting[w] == 0:
+                    ready.append(w)
+    last = len(members)
+    return {v: (depth[v] if waiting[v] == 0 else last, graph.full_names[v]) for v in members}
+
+
+def graphviz_version(engine: str) -> str:
+    result = subprocess.run([engine, "-V"], capture_output=True, text=True)
+    return (result.stderr or result.stdout).strip()
+
+
+def render_part(dot_text: str, engine: str, version: str, cache_dir: Path,
+                timeout: int) -> Tuple[str, bool]:
+    """SVG for one DOT part, from the cache if possible; returns (svg, cache hit)."""
+    key = hashlib.sha256(f"{engine}\0{version}\0{dot_text}".encode()).hexdigest()
+    cached = cache_dir / f"{key}.svg"
+    if cached.exists():
+        return cached.read_text(), True
+
+    result = subprocess.run([engine, "-Tsvg"], input=dot_text, capture_output=True,
+                            text=True, timeout=timeout, check=True)
+    tmp = cached.with_name(f"{key}.{os.getpid()}.tmp")
+    tmp.write_text(result.stdout)
+    os.replace(tmp, cached)
+    return result.stdout, False
+
+
+def node_centers(svg: str) -> Dict[str, Tuple[float, float]]:
+    """Centre of every node of a Graphviz SVG fragment by name, in the fragment's viewBox units."""
+    m = GRAPH_TRANSFORM.search(svg)
+    sx, sy, tx, ty = (1.0, 1.0, 0.0, 0.0) if m is None else (
+        float(m.group(1)), float(m.group(2) or m.group(1)), float(m.group(3)), float(m.group(4)))
+    centers = {}
+    for m in NODE_SHAPE.finditer(svg):
+        name, shape = html.unescape(m.group(1)), m.group(2)
+        ellipse = ELLIPSE_CENTER.search(shape)
+        if ellipse:
+            x, y = float(ellipse.group(1)), float(ellipse.group(2))
+        else:
+            points = [tuple(map(float, p.split(","))) for p in POINTS.search(shape).group(1).split()]
+            if len(points) > 1 and points[0] == points[-1]:
+                points.pop()  # Graphviz closes polygons by repeating the first point
+            x = sum(p[0] for p in points) / len(points)
+            y = sum(p[1] for p in points) / len(points)
+        # Graphviz's transform="scale(s) rotate(0) translate(t)" maps p to s * (p + t)
+        centers[name] = (sx * (x + tx), sy * (y + ty))
+    return centers
+
+
+def pack_fragments(fragments: List[str], links: Iterable[Tuple[int, str, int, str]] = ()) -> str:
+    """
+    Place SVG fragments on shelves (tallest first) in one SVG document.
+
+    `links` are edges between fragments as (fragment, node name, fragment,
+    node name); each is drawn as a straight arrow between the node centres.
+    """
+    boxes = []
+    for k, svg in enumerate(fragments):
+        m = SVG_ROOT.search(svg)
+        if m is None:
+            raise ValueError(f"Fragment {k} has no sized <svg> root")
+        width, height = float(m.group(1)), float(m.group(2))
+        viewbox = VIEWBOX.search(m.group(0))
+        body = svg[m.end():svg.rindex("</svg>")]
+        # Graphviz numbers IDs per document (node1, edge1, ...); keep them unique
+        body = re.sub(r'\bid="', f'id="p{k}_', body)
+        body = body.replace('href="#', f'href="#p{k}_').replace("url(#", f"url(#p{k}_")
+        boxes.append((width, height, viewbox.group(1) if viewbox else f"0 0 {width} {height}", body))
+
+    total_area = sum((w + GAP) * (h + GAP) for w, h, _, _ in boxes)
+    shelf_width = max([math.sqrt(total_area) * 1.3] + [w for w, _, _, _ in boxes])
+
+    placed = []
+    origin: Dict[int, Tuple[float, float]] = {}
+    x = y = shelf_height = 0.0
+    doc_width = 0.0
+    for k in sorted(range(len(boxes)), key=lambda k: -boxes[k][1]):
+        width, height, viewbox, body = boxes[k]
+        if x > 0 and x + width > shelf_width:
+            x, y = 0.0, y + shelf_height + GAP
+            shelf_height = 0.0
+        placed.append(f'<svg x="{x:.2f}" y="{y:.2f}" width="{width:.2f}" height="{height:.2f}" '
+                      f'viewBox="{viewbox}">{body}</svg>')
+        origin[k] = (x, y)
+        x += width + GAP
+        shelf_height = max(shelf_height, height)
+        doc_width = max(doc_width, x - GAP)
+    doc_height = y + shelf_height
+
+    lines = []
+    centers: Dict[int, Dict[str, Tuple[float, float]]] = {}
+
+    def locate(k: int, name: str) -> Optional[Tuple[float, float]]:
+        if k not in centers:
+            centers[k] = node_centers(fragments[k])
+        center = centers[k].get(name)
+        if center is None:
+            return None
+        width, height, viewbox, _ = boxes[k]
+        vx, vy, vw, vh = (float(c) for c in viewbox.replace(",", " ").split())
+        return (origin[k][0] + (center[0] - vx) * width / (vw or 1),
+                origin[k][1] + (center[1] - vy) * height / (vh or 1))
+
+    for a, source, b, target in links:
+        start, end = locate(a, source), locate(b, target)
+        if start and end:
+            lines.append(f'<line x1="{start[0]:.2f}" y1="{start[1]:.2f}" x2="{end[0]:.2f}" y2="{end[1]:.2f}"/>')
+    links_group = []
+    if lines:
+        links_group = [
+            '<defs><marker id="cut-arrow" viewBox="0 0 10 10" refX="10" refY="5" markerWidth="6" markerHeight="6" '
+            'orient="auto"><path d="M0,0L10,5L0,10z" fill="#888"/></marker></defs>',
+            '<g class="cut-edges" stroke="#888" stroke-opacity="0.6" stroke-width="0.8" '
+            'marker-end="url(#cut-arrow)">',
+            *lines,
+            "</g>",
+        ]
+
+    return "\n".join([
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+        f'<svg width="{doc_width:.0f}pt" height="{doc_height:.0f}pt" viewBox="0 0 {doc_width:.2f} {doc_height:.2f}" '
+        'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">',
+        *placed,
+        *links_group,
+        "</svg>",
+        "",
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a dependency graph to SVG in parallel parts with caching")
+    parser.add_argument("--depgraph", required=True, help="Path to dependency graph JSON")
+    parser.add_argument("--out", required=True, help="Output SVG path")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Graphviz processes to run at once (default: CPU count)")
+    parser.add_argument("--max-part-nodes", type=int, default=DEFAULT_MAX_PART_NODES,
+                        help=f"Split larger components into parts of this size (default: {DEFAULT_MAX_PART_NODES})")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Directory for cached SVG fragments (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--engine", default="dot", help="Graphviz layout program (default: dot)")
+    parser.add_argument("--timeout", type=int, default=600, help="Timeout in seconds per part (default: 600)")
+
+    args = parser.parse_args()
+
+    depgraph_path = Path(args.depgraph)
+    if not depgraph_path.exists():
+        print(f"Error: Dependency graph not found: {depgraph_path}", file=sys.stderr)
+        return 1
+    if shutil.which(args.engine) is None:
+        print(f"Error: Graphviz '{args.engine}' not found in PATH", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    graph = DepGraph.load(depgraph_path)
+    parts = split_parts(graph, args.max_part_nodes)
+    part_of = {}
+    for k, part in enumerate(parts):
+        for v in part:
+            part_of[v] = k
+    names = graph.full_names
+    links = [(part_of[v], names[v], part_of[w], names[w])
+             for v in range(graph.vertex_count) for w in graph.dependents(v) if part_of[v] != part_of[w]]
+    dots = [depgraph_to_dot(graph.subgraph(part)) for part in parts]
+
+    cache_dir = Path(args.cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    version = graphviz_version(args.engine)
+
+    # Graphviz does the work in its own processes; threads only wait on them
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+            results = list(pool.map(
+                lambda dot: render_part(dot, args.engine, version, cache_dir, args.timeout), dots))
+    except subprocess.CalledProcessError as e:
+        print(f"Error: {args.engine} failed: {e.stderr.strip()}", file=sys.stderr)
+        return 1
+    except subprocess.TimeoutExpired:
+        print(f"Error: {args.engine} timed out after {args.timeout}s on a part", file=sys.stderr)
+        return 1
+
+    svg = pack_fragments([svg for svg, _ in results], links)
+    Path(args.out).write_text(svg)
+    elapsed = time.perf_counter() - start
+
+    hits = sum(1 for _, hit in results if hit)
+    print(f"✓ SVG written to {args.out} ({len(svg) / 1024:.1f}KB)")
+    print(f"  Parts: {len(parts)} ({hits} cached, {len(parts) - hits} laid out with {args.jobs} jobs)")
+    print(f"  Largest part: {max((len(p) for p in parts), default=0)} nodes")
+    if links:
+        print(f"  {len(links)} edges between parts of split components drawn as straight connectors")
+    print(f"  Time: {elapsed:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
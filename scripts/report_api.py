@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+JSON query API over a dependency graph and verification report.
+
+`serve.py --api depgraph.json --report report.json` loads both once and
+answers these requests, so a client fetches only what it displays instead of
+a whole embedded page:
+
+    GET /api/summary
+        totals, tools, zones and per-module rollups (declarations, checked,
+        passed, failed, sorry, axioms, unsafe)
+    GET /api/rows?module=M&status=failed&zone=Z&tool=T&check=C&q=text&offset=0&limit=100
+        one page of table rows (node fields plus "status", the report row),
+        failures first and otherwise in graph order; every filter is optional
+        and "status" takes the viewer's values (all, failed, passed, sorry, axiom)
+    GET /api/search?q=text&limit=20
+        declarations whose full name or module contains the text, exact and
+        prefix matches of the short name first
+    GET /api/decl?name=Foo.bar
+        the node, its report row with every tool's result, its direct
+        dependencies and dependents, and the sizes of its cones
+    GET /api/cone?name=Foo.bar&direction=ancestors&depth=2&format=dot
+        the subgraph around a declaration (ancestors, descendants, or both
+        ways within depth hops, default 1) as depgraph JSON or DOT
+
+Names may be full names or unambiguous short names. The graph is a DepGraph
+(loaded from a depgraph_sidecar.py sidecar when fresh); search uses the
+trigram postings of search_index.py. Responses are cached in an LRU keyed by
+path and sorted query string.
+
+Usage:
+    python serve.py --api depgraph.json --report report.json
+    python scripts/report_api.py depgraph.json --report report.json '/api/decl?name=Foo.bar'
+"""
+
+import argparse
+import functools
+import gzip
+import hashlib
+import json
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from compact_report import load_report
+from depgraph_core import DepGraph, depgraph_to_dot
+from depgraph_query import QueryError, resolve
+from search_index import failures_first, report_facets, search_text, trigram_postings, trigrams
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 5000
+DEFAULT_CONE_LIMIT = 5000
+STATUS_FILTERS = ("all", "failed", "passed", "sorry", "axiom")
+
+
+class APIError(Exception):
+    """A request that cannot be answered; `status` is the HTTP status to send."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    """An encoded API response; the gzip body is made on first use."""
+
+    def __init__(self, status: int, content_type: str, body: bytes):
+        self.status = status
+        self.content_type = content_type
+        self.body = body
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self._gzipped: Optional[bytes] = None
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6, mtime=0)
+        return self._gzipped
+
+
+class ReportAPI:
+    """Indexed in-memory graph and report, answering the requests in the module docstring."""
+
+    def __init__(self, graph: DepGraph, report: Optional[Dict[str, Any]] = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE):
+        self.graph = graph
+        self.report = report
+
+        # Report row of each node; as in search_index.py, rows match by exact name
+        rows = report.get("declarations", report.get("results", [])) if report else []
+        self.status: Dict[int, Dict[str, Any]] = {}
+        for row in rows:
+            v = graph.id_of(row.get("decl", ""))
+            if v is not None and v < graph.node_count and graph.full_names[v] == row.get("decl"):
+                self.status[v] = row
+        self.tools = (report.get("tools") or [report.get("tool", "paranoia" if "results" in report else "checker")]
+                      if report else [])
+
+        self.order = failures_first(graph, report)
+        self.facets = {name: {value: frozenset(ids) for value, ids in groups.items()}
+                       for name, groups in report_facets(graph, report).items()}
+        self.postings = {gram: array("I", ids) for gram, ids in trigram_postings(graph).items()}
+        self.search_texts = [search_text(graph.full_names[v], graph.module(v)) for v in range(graph.node_count)]
+        self.summary = self._summary()
+
+        self.respond = functools.lru_cache(maxsize=cache_size)(self._respond)
+
+    @classmethod
+    def load(cls, depgraph_path: Path, report_path: Optional[Path] = None,
+             cache_size: int = DEFAULT_CACHE_SIZE) -> "ReportAPI":
+        report = load_report(report_path) if report_path else None
+        return cls(DepGraph.load(depgraph_path), report, cache_size)
+
+    # Requests
+
+    def get(self, url: str) -> Response:
+        """Response for a request path with query string (cached)."""
+        parts = urlsplit(url)
+        query = tuple(sorted((k, tuple(v)) for k, v in parse_qs(parts.query).items()))
+        return self.respond(parts.path.rstrip("/"), query)
+
+    def _respond(self, path: str, query: Tuple[Tuple[str, Tuple[str, ...]], ...]) -> Response:
+        params = {k: v[-1] for k, v in query}
+        handlers = {
+            "/api/summary": self.get_summary,
+            "/api/rows": self.get_rows,
+            "/api/search": self.get_search,
+            "/api/decl": self.get_decl,
+            "/api/cone": self.get_cone,
+        }
+        try:
+            if path not in handlers:
+                raise APIError(404, f"Unknown endpoint: {path} (try {', '.join(handlers)})")
+            result = handlers[path](params)
+        except APIError as e:
+            return self._json(e.status, {"error": str(e)})
+        if isinstance(result, str):
+            return Response(200, "text/vnd.graphviz; charset=utf-8", result.encode())
+        return self._json(200, result)
+
+    @staticmethod
+    def _json(status: int, data: Any) -> Response:
+        return Response(status, "application/json", json.dumps(data, separators=(",", ":")).encode())
+
+    def get_summary(self, params: Dict[str, str]) -> Dict[str, Any]:
+        return self.summary
+
+    def get_rows(self, params: Dict[str, str]) -> Dict[str, Any]:
+        offset = self._int(params, "offset", 0)
+        limit = min(self._int(params, "limit", DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE)
+        selected = self.select(params)
+        return {
+            "total": len(selected),
+            "offset": offset,
+            "rows": [self.row(v) for v in selected[offset:offset + limit]],
+        }
+
+    def get_search(self, params: Dict[str, str]) -> Dict[str, Any]:
+        text = params.get("q", "").lower()
+        limit = min(self._int(params, "limit", 20), MAX_PAGE_SIZE)
+        if not text:
+            raise APIError(400, "Missing search text (q)")
+        matches = sorted(self.matching(text), key=lambda v: self._search_rank(v, text))
+        return {
+            "total": len(matches),
+            "matches": [{"fullName": self.graph.full_names[v], "module": self.graph.module(v),
+                         "kind": self.graph.kind(v), "ok": self.status[v].get("ok") if v in self.status else None}
+                        for v in matches[:limit]],
+        }
+
+    def get_decl(self, params: Dict[str, str]) -> Dict[str, Any]:
+        graph = self.graph
+        v = self.resolve(params)
+        dependencies = sorted(set(graph.dependencies(v)))
+        dependents = sorted(set(graph.dependents(v)))
+        return {
+            "node": graph.node(v),
+            "status": self.status.get(v),
+            "dependencies": [graph.full_names[w] for w in dependencies],
+            "dependents": [graph.full_names[w] for w in dependents],
+            "ancestors": len(graph.cone([v], "ancestors")) - 1,
+            "descendants": len(graph.cone([v], "descendants")) - 1,
+        }
+
+    def get_cone(self, params: Dict[str, str]):
+        v = self.resolve(params)
+        direction = params.get("direction", "both")
+        if direction not in ("ancestors", "descendants", "both"):
+            raise APIError(400, f"Unknown direction: {direction} (ancestors, descendants or both)")
+        depth = self._int(params, "depth", 1) if "depth" in params or direction == "both" else None
+        limit = self._int(params, "limit", DEFAULT_CONE_LIMIT)
+        selected = self.graph.cone([v], direction, max_depth=depth)
+        if len(selected) > limit:
+            raise APIError(413, f"The cone has {len(selected)} declarations (limit {limit}); "
+                                f"lower depth or raise limit")
+        subgraph = self.graph.subgraph(selected)
+        if params.get("format", "json") == "dot":
+            return depgraph_to_dot(subgraph)
+        return subgraph
+
+    # Queries
+
+    def select(self, params: Dict[str, str]) -> List[int]:
+        """Node IDs passing the row filters, failures first and otherwise in graph order."""
+        graph = self.graph
+        status_filter = params.get("status", "all")
+        if status_filter not in STATUS_FILTERS:
+            raise APIError(400, f"Unknown status filter: {status_filter} ({', '.join(STATUS_FILTERS)})")
+
+        allowed: Optional[frozenset] = None
+        for name in ("zone", "tool", "check"):
+            if params.get(name, "all") != "all":
+                ids = self.facets[name].get(params[name], frozenset())
+                allowed = ids if allowed is None else allowed & ids
+        text = params.get("q", "").lower()
+        if text:
+            ids = frozenset(self.matching(text))
+            allowed = ids if allowed is None else allowed & ids
+        if "module" in params:
+            ids = frozenset(graph.by_module.get(params["module"], ()))
+            allowed = ids if allowed is None else allowed & ids
+
+        selected = []
+        for v in self.order:
+            if allowed is not None and v not in allowed:
+                continue
+            row = self.status.get(v)
+            if status_filter == "failed" and (row is None or row.get("ok")):
+                continue
+            if status_filter == "passed" and (row is None or not row.get("ok")):
+                continue
+            if status_filter == "sorry" and not graph.has_sorry(v):
+                continue
+            if status_filter == "axiom" and not graph.axioms(v):
+                continue
+            selected.append(v)
+        return selected
+
+    def matching(self, text: str) -> Iterable[int]:
+        """Ascending IDs of the nodes whose full name or module contains `text` (lowercase)."""
+        candidates: Iterable[int] = range(self.graph.node_count)
+        lists = sorted((self.postings.get(gram, array("I")) for gram in trigrams(text)), key=len)
+        if lists:
+            narrowed = set(lists[0])
+            for ids in lists[1:]:
+                narrowed.intersection_update(ids)
+            candidates = sorted(narrowed)
+        return [v for v in candidates if text in self.search_texts[v]]
+
+    def _search_rank(self, v: int, text: str) -> Tuple[int, int, int]:
+        short = self.graph.short_names[v].lower()
+        full = self.graph.full_names[v].lower()
+        exact = 0 if text in (short, full) else 1 if short.startswith(text) or full.startswith(text) else 2
+        return exact, len(full), v
+
+    def row(self, v: int) -> Dict[str, Any]:
+        return {**self.graph.node(v), "status": self.status.get(v)}
+
+    def resolve(self, params: Dict[str, str]) -> int:
+        if not params.get("name"):
+            raise APIError(400, "Missing declaration name (name)")
+        try:
+            v = resolve(self.graph, params["name"])
+        except QueryError as e:
+            raise APIError(404, str(e))
+        return v
+
+    @staticmethod
+    def _int(params: Dict[str, str], key: str, default: int) -> int:
+        try:
+            value = int(params.get(key, default))
+        except ValueError:
+            raise APIError(400, f"{key} must be an integer")
+        if value < 0:
+            raise APIError(400, f"{key} must be non-negative")
+        return value
+
+    def _summary(self) -> Dict[str, Any]:
+        graph = self.graph
+        modules = []
+        for name, ids in sorted(graph.by_module.items()):
+            rows = [self.status[v] for v in ids if v in self.status]
+            modules.append({
+                "name": name,
+                "declarations": len(ids),
+                "checked": len(rows),
+                "passed": sum(1 for r in rows if r.get("ok")),
+                "failed": sum(1 for r in rows if not r.get("ok")),
+                "sorry": sum(1 for v in ids if graph.has_sorry(v)),
+                "axioms": sum(1 for v in ids if graph.axioms(v)),
+                "unsafe": sum(1 for v in ids if graph.is_unsafe(v)),
+            })
+        passed = sum(1 for r in self.status.values() if r.get("ok"))
+        return {
+            "declarations": graph.node_count,
+            "edges": graph.edge_count,
+            "checked": len(self.status),
+            "passed": passed,
+            "failed": len(self.status) - passed,
+            "tools": self.tools,
+            "zones": sorted(self.facets["zone"]),
+            "failingTools": sorted(self.facets["tool"]),
+            "failingChecks": sorted(self.facets["check"]),
+            "modules": modules,
+            # Report metadata (summary, timestamp, ...) without its rows
+            "report": {k: v for k, v in self.report.items() if k not in ("declarations", "results")}
+            if self.report else None,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer report API requests from the command line")
+    parser.add_argument("depgraph", help="Path to dependency graph JSON")
+    parser.add_argument("--report", help="Verification report (plain or compact)")
+    parser.add_argument("requests", nargs="+", help="Request paths, e.g. '/api/decl?name=Foo.bar'")
+
+    args = parser.parse_args()
+
+    depgraph_path = Path(args.depgraph)
+    if not depgraph_path.exists():
+        print(f"Error: Dependency graph not found: {depgraph_path}", file=sys.stderr)
+        return 1
+    if args.report and not Path(args.report).exists():
+        print(f"Error: Report not found: {args.report}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    api = ReportAPI.load(depgraph_path, Path(args.report) if args.report else None)
+    print(f"Loaded in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    for url in args.requests:
+        start = time.perf_counter()
+        response = api.get(url)
+        print(f"{url}: HTTP {response.status}, {len(response.body)} bytes, "
+              f"{(time.perf_counter() - start) * 1000:.1f}ms", file=sys.stderr)
+        print(response.body.decode())
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Machine-wide CPU and memory budget shared by the checker adapters.
+
+paranoia_runner.py, lean4checker_adapter.py and safeverify_adapter.py each
+decide on their own how many checker processes to run. When they run side by
+side (as in pipeline.py), the machine ends up oversubscribed. With --broker
+each adapter takes a slot from a shared pool before it starts a checker
+process and gives it back when the process exits. A slot holds one CPU and a
+memory estimate. The pool is a directory of lock files:
+
+    BROKER_DIR/budget.json     {"cpu": 8, "mem_mb": 16384}
+    BROKER_DIR/cpu.0 ...       one file per CPU
+    BROKER_DIR/mem.0 ...       one file per MEM_UNIT_MB of memory
+    BROKER_DIR/waiting/...     one file per waiting job (its priority and PID)
+
+A job holds an exclusive flock on one CPU file and on as many memory files as
+its estimate needs, and it holds them until it finishes. The kernel releases
+the locks when a process dies, so a crashed adapter never leaks its slots.
+There is no server process to start.
+
+Jobs with a higher priority go first. A waiting job registers itself under
+waiting/, and jobs with a lower priority do not take free slots while a live
+higher-priority waiter exists. By default paranoia has priority 2, SafeVerify 1
+and lean4checker 0, so policy checks are not held up by background kernel
+replay. Use --priority to change this, e.g. for a paranoia run on changed
+declarations only.
+
+Locks use fcntl.flock, so the broker needs a POSIX system (Linux or macOS).
+
+Usage:
+    # Set the budget (default: all CPUs and all physical memory)
+    python scripts/resource_broker.py init --cpu 8 --mem 16G
+
+    # Show the budget, the slots in use and the waiting jobs
+    python scripts/resource_broker.py status
+
+    # Adapters take slots with --broker (default directory, or --broker DIR)
+    python scripts/paranoia_runner.py --broker --jobs 16 ...
+    python scripts/lean4checker_adapter.py --broker --priority 0 ...
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+MEM_UNIT_MB = 256
+DEFAULT_JOB_MEM_MB = 1024
+POLL_SECONDS = 0.1
+
+# Default priorities per tool (higher goes first)
+TOOL_PRIORITY = {"paranoia": 2, "safeverify": 1, "lean4checker": 0}
+
+
+def default_broker_dir() -> Path:
+    """$LEANDEPVIZ_BROKER, or a per-user directory in the system temp directory."""
+    if os.environ.get("LEANDEPVIZ_BROKER"):
+        return Path(os.environ["LEANDEPVIZ_BROKER"])
+    return Path(tempfile.gettempdir()) / f"leandepviz-broker-{os.getuid()}"
+
+
+def physical_memory_mb() -> int:
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 8192
+
+
+def parse_mem(text: str) -> int:
+    """Megabytes from "512M", "16G" or a plain number of megabytes."""
+    text = text.strip().upper().rstrip("B")
+    factor = {"K": 1 / 1024, "M": 1, "G": 1024, "T": 1024 * 1024}.get(text[-1:], None)
+    if factor is None:
+        return int(text)
+    return int(float(text[:-1]) * factor)
+
+
+def _try_lock(path: Path) -> Optional[int]:
+    """Open `path` and take an exclusive flock without blocking; the fd or None."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _release(fds: List[int]) -> None:
+    for fd in fds:
+        os.close(fd)  # closing the fd drops its flock
+
+
+class ResourceBroker:
+    """Slots from the pool in `directory`; `slot()` is used around each checker process."""
+
+    def __init__(self, directory: Optional[Path] = None, priority: int = 0,
+                 job_mem_mb: int = DEFAULT_JOB_MEM_MB, label: str = ""):
+        if fcntl is None:
+            raise RuntimeError("the resource broker needs fcntl.flock (Linux or macOS)")
+        self.directory = Path(directory) if directory else default_broker_dir()
+        self.priority = priority
+        self.job_mem_mb = job_mem_mb
+        self.label = label or f"pid {os.getpid()}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / "waiting").mkdir(exist_ok=True)
+        if not (self.directory / "budget.json").exists():
+            self.set_budget(os.cpu_count() or 4, physical_memory_mb())
+
+    def budget(self) -> Dict[str, int]:
+        with open(self.directory / "budget.json") as f:
+            return json.load(f)
+
+    def set_budget(self, cpu: int, mem_mb: int) -> None:
+        tmp = self.directory / f"budget.json.{os.getpid()}"
+        tmp.write_text(json.dumps({"cpu": max(1, cpu), "mem_mb": max(MEM_UNIT_MB, mem_mb)}))
+        os.replace(tmp, self.directory / "budget.json")
+
+    def waiters(self) -> List[Dict[str, Any]]:
+        """Live waiting jobs; files left behind by dead processes are removed."""
+        found = []
+        for path in (self.directory / "waiting").iterdir():
+            fd = _try_lock(path)
+            if fd is not None:  # nobody holds it: its owner is gone
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+                _release([fd])
+                continue
+            priority, pid = path.name.split(".")[:2]
+            found.append({"priority": int(priority), "pid": int(pid), "file": path.name})
+        return found
+
+    def _take(self, cpu: int, mem_units: int) -> Optional[List[int]]:
+        """Lock `cpu` CPU files and `mem_units` memory files, or none at all."""
+        budget = self.budget()
+        wanted = [("cpu", min(cpu, budget["cpu"]), budget["cpu"]),
+                  ("mem", min(mem_units, budget["mem_mb"] // MEM_UNIT_MB), budget["mem_mb"] // MEM_UNIT_MB)]
+        held: List[int] = []
+        for kind, count, size in wanted:
+            got = 0
+            # Start at a random file so concurrent jobs do not all try the same ones
+            first = random.randrange(size)
+            for i in range(size):
+                if got == count:
+                    break
+                fd = _try_lock(self.directory / f"{kind}.{(first + i) % size}")
+                if fd is not None:
+                    held.append(fd)
+                    got += 1
+            if got < count:
+                _release(held)
+                return None
+        return held
+
+    def request(self, cpu: int = 1, mem_mb: Optional[int] = None) -> "SlotRequest":
+        """A request for a slot; poll() it until it is granted, then release() it."""
+        mem_units = -(-(self.job_mem_mb if mem_mb is None else mem_mb) // MEM_UNIT_MB)
+        return SlotRequest(self, cpu, mem_units)
+
+    @contextmanager
+    def slot(self, cpu: int = 1, mem_mb: Optional[int] = None) -> Iterator[None]:
+        """Block until the slot is free and hold it for the duration of the `with` block."""
+        request = self.request(cpu, mem_mb)
+        try:
+            while not request.poll():
+                time.sleep(POLL_SECONDS * (0.5 + random.random()))
+            yield
+        finally:
+            request.release()
+
+    def status(self) -> Dict[str, Any]:
+        """Budget, the holders of the CPU slots in use, and the waiting jobs."""
+        budget = self.budget()
+        in_use = []
+        for i in range(budget["cpu"]):
+            path = self.directory / f"cpu.{i}"
+            fd = _try_lock(path)
+            if fd is None:
+                in_use.append(path.read_text().strip() or "?")
+            else:
+                _release([fd])
+        mem_used = 0
+        for i in range(budget["mem_mb"] // MEM_UNIT_MB):
+            fd = _try_lock(self.directory / f"mem.{i}")
+            if fd is None:
+                mem_used += MEM_UNIT_MB
+            else:
+                _release([fd])
+        return {"budget": budget, "cpu_in_use": in_use, "mem_in_use_mb": mem_used, "waiting": self.waiters()}
+
+
+class SlotRequest:
+    """A job waiting for (and then holding) a slot of a ResourceBroker."""
+
+    def __init__(self, broker: ResourceBroker, cpu: int, mem_units: int):
+        self.broker = broker
+        self.cpu = cpu
+        self.mem_units = mem_units
+        name = f"{broker.priority}.{os.getpid()}.{threading.get_ident()}.{random.getrandbits(32):08x}"
+        self.waiting = broker.directory / "waiting" / name
+        self.wait_fd: Optional[int] = None
+        self.held: Optional[List[int]] = None
+
+    def poll(self) -> bool:
+        """Try to take the slot; True once it is held. Registers as a waiter otherwise."""
+        if self.held is not None:
+            return True
+        if not any(w["priority"] > self.broker.priority for w in self.broker.waiters()):
+            self.held = self.broker._take(self.cpu, self.mem_units)
+            if self.held is not None:
+                os.write(self.held[0], f"{self.broker.label}\n".encode())
+                self._stop_waiting()
+                return True
+        if self.wait_fd is not None and not self.waiting.exists():
+            # Removed by a waiters() scan (it should not be, see _register); register again
+            _release([self.wait_fd])
+            self.wait_fd = None
+        if self.wait_fd is None:
+            self.wait_fd = self._register()
+        return False
+
+    def _register(self) -> Optional[int]:
+        """
+        Create the waiting/ file, already locked; the fd or None.
+
+        The file is locked under a temporary name outside waiting/ and then
+        renamed into place, so a waiters() scan never sees it unlocked and
+        takes it for a dead job's file.
+        """
+        tmp = self.broker.directory / f".{self.waiting.name}.tmp"
+        fd = _try_lock(tmp)
+        if fd is None:
+            return None
+        try:
+            os.rename(tmp, self.waiting)
+        except OSError:
+            _release([fd])
+            return None
+        return fd
+
+    def release(self) -> None:
+        self._stop_waiting()
+        if self.held:
+            os.ftruncate(self.held[0], 0)
+            _release(self.held)
+        self.held = None
+
+    def _stop_waiting(self) -> None:
+        if self.wait_fd is not None:
+            try:
+                self.waiting.unlink()
+            except FileNotFoundError:
+                pass
+            _release([self.wait_fd])
+            self.wait_fd = None
+
+
+def add_broker_arguments(parser: argparse.ArgumentParser, tool: str) -> None:
+    """The adapters' --broker, --priority and --job-mem options."""
+    parser.add_argument("--broker", nargs="?", const="", metavar="DIR",
+                        help="Take a slot from the shared resource broker for each checker process "
+                             "(see resource_broker.py; default directory without DIR)")
+    parser.add_argument("--priority", type=int, default=TOOL_PRIORITY.get(tool, 0),
+                        help=f"Broker priority, higher goes first (default: {TOOL_PRIORITY.get(tool, 0)})")
+    parser.add_argument("--job-mem", default=f"{DEFAULT_JOB_MEM_MB}M",
+                        help=f"Broker memory estimate per checker process (default: {DEFAULT_JOB_MEM_MB}M)")
+
+
+def broker_from_args(args: argparse.Namespace, tool: str) -> Optional[ResourceBroker]:
+    if args.broker is None:
+        return None
+    return ResourceBroker(args.broker or None, priority=args.priority,
+                          job_mem_mb=parse_mem(args.job_mem), label=f"{tool} (pid {os.getpid()})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared CPU and memory budget for the checker adapters")
+    parser.add_argument("command", choices=["init", "status"])
+    parser.add_argument("--dir", help=f"Broker directory (default: {default_broker_dir()})")
+    parser.add_argument("--cpu", type=int, help="CPU budget for init (default: all CPUs)")
+    parser.add_argument("--mem", help="Memory budget for init, e.g. 16G (default: all physical memory)")
+
+    args = parser.parse_args()
+
+    if fcntl is None:
+        print("Error: the resource broker needs fcntl.flock (Linux or macOS)", file=sys.stderr)
+        return 1
+    broker = ResourceBroker(args.dir)
+
+    if args.command == "init":
+        broker.set_budget(args.cpu or os.cpu_count() or 4, parse_mem(args.mem) if args.mem else physical_memory_mb())
+        budget = broker.budget()
+        print(f"✓ Budget in {broker.directory}: {budget['cpu']} CPUs, {budget['mem_mb']}MB")
+        return 0
+
+    status = broker.status()
+    budget = status["budget"]
+    print(f"Broker: {broker.directory}")
+    print(f"  CPU:    {len(status['cpu_in_use'])}/{budget['cpu']} in use")
+    print(f"  Memory: {status['mem_in_use_mb']}/{budget['mem_mb']}MB in use")
+    for holder, count in sorted({h: status["cpu_in_use"].count(h) for h in status["cpu_in_use"]}.items()):
+        print(f"    {holder}: {count}")
+    print(f"  Waiting: {len(status['waiting'])}")
+    for w in sorted(status["waiting"], key=lambda w: -w["priority"]):
+        print(f"    pid {w['pid']} (priority {w['priority']})")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Journal of verification results as they complete.
+
+paranoia_runner.py --journal appends one JSON line per finished declaration,
+so a long run can be watched while it goes (serve.py --journal streams the
+journal to the viewer) and a run that dies still leaves its results behind:
+
+    {"type": "start", "format": "leandepviz-journal", "version": 1, "run": "3f2a9c...",
+     "tool": "paranoia", "total": 4210, "timestamp": "2025-01-01T12:00:00+00:00"}
+    {"type": "result", "row": {"decl": "Foo.bar", "zone": "Core", "ok": false, ...}}
+    ...
+    {"type": "end", "summary": {"total": 4210, "passed": 4190, "failed": 20}}
+
+Rows are report rows as the runner writes them to its report. Every line is
+flushed as it is written. Readers take complete lines only, so a line still
+being written is picked up by the next read. A new run truncates the journal
+and starts with a new "run" ID.
+
+Usage:
+    # Progress of a run
+    python scripts/result_journal.py journal.jsonl
+
+    # Report from the results so far
+    python scripts/result_journal.py journal.jsonl --out partial_report.json
+"""
+
+import argparse
+import json
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from compact_report import dump_report
+
+FORMAT_NAME = "leandepviz-journal"
+FORMAT_VERSION = 1
+
+MAX_HEADER_BYTES = 4096
+
+
+class ResultJournal:
+    """Writer of a journal; use as a context manager around a run."""
+
+    def __init__(self, path: Path, tool: str, total: int):
+        self.path = Path(path)
+        self.run = uuid.uuid4().hex
+        self._f = open(self.path, "w")
+        self._write({
+            "type": "start",
+            "format": FORMAT_NAME,
+            "version": FORMAT_VERSION,
+            "run": self.run,
+            "tool": tool,
+            "total": total,
+            "timestamp": datetime.now().astimezone().isoformat(timespec="seconds"),
+        })
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self._write({"type": "result", "row": row})
+
+    def close(self, summary: Optional[Dict[str, Any]] = None) -> None:
+        if self._f.closed:
+            return
+        if summary is not None:
+            self._write({"type": "end", "summary": summary})
+        self._f.close()
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        self._f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._f.flush()
+
+    def __enter__(self) -> "ResultJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def journal_run(path: Path) -> Optional[str]:
+    """Run ID from the journal's start line, or None if there is none yet."""
+    try:
+        with open(path, "rb") as f:
+            line = f.readline(MAX_HEADER_BYTES)
+    except FileNotFoundError:
+        return None
+    if not line.endswith(b"\n"):
+        return None
+    try:
+        return json.loads(line).get("run")
+    except (ValueError, AttributeError):
+        return None
+
+
+def read_lines(path: Path, offset: int = 0, max_bytes: Optional[int] = None) -> Tuple[List[bytes], int]:
+    """
+    Complete lines after byte `offset` (without newlines), and the offset after the last one.
+
+    At most about `max_bytes` are read, but always at least one line if there is one.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read() if max_bytes is None else f.read(max_bytes)
+        end = data.rfind(b"\n")
+        if end < 0 and max_bytes is not None and len(data) == max_bytes:
+            # A line longer than max_bytes: read to its end
+            data += f.readline()
+            end = data.rfind(b"\n")
+    if end < 0:
+        return [], offset
+    return data[:end].split(b"\n"), offset + end + 1
+
+
+def read_journal(path: Path) -> List[Dict[str, Any]]:
+    """All complete entries of a journal."""
+    lines, _ = read_lines(path)
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def journal_report(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Report (in the runner's format) from the results of the last run in a journal."""
+    start: Dict[str, Any] = {}
+    rows: Dict[str, Dict[str, Any]] = {}
+    finished = False
+    for entry in entries:
+        if entry.get("type") == "start":
+            start, rows, finished = entry, {}, False
+        elif entry.get("type") == "result":
+            rows[entry["row"]["decl"]] = entry["row"]
+        elif entry.get("type") == "end":
+            finished = True
+    results = list(rows.values())
+    passed = sum(1 for r in results if r.get("ok", False))
+    return {
+        "tool": start.get("tool", "paranoia"),
+        "version": "0.1.0",
+        "timestamp": start.get("timestamp"),
+        "declarations": results,
+        "summary": {
+            "total": len(results),
+            "passed": passed,
+            "failed": len(results) - passed,
+            "planned": start.get("total"),
+            "complete": finished,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or recover the results in a result journal")
+    parser.add_argument("journal", help="Journal written by paranoia_runner.py --journal")
+    parser.add_argument("--out", help="Write a report of the results so far (.gz/.zst suffix compresses)")
+    parser.add_argument("--compact", action="store_true", help="Write --out in the compact format")
+
+    args = parser.parse_args()
+
+    journal_path = Path(args.journal)
+    if not journal_path.exists():
+        print(f"Error: Journal not found: {journal_path}", file=sys.stderr)
+        return 1
+
+    report = journal_report(read_journal(journal_path))
+    summary = report["summary"]
+    planned = f"/{summary['planned']}" if summary["planned"] is not None else ""
+    state = "finished" if summary["complete"] else "in progress or interrupted"
+    print(f"{report['tool']} run started {report['timestamp']}: {summary['total']}{planned} results ({state})")
+    print(f"  Passed: {summary['passed']} ✓")
+    print(f"  Failed: {summary['failed']} ✗")
+
+    if args.out:
+        dump_report(report, Path(args.out), compact=args.compact)
+        print(f"✓ Report written to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -10,15 +10,22 @@ SafeVerify compares two .olean files (target/spec and submission/impl) to ensure
 
 Usage:
     python safeverify_adapter.py --depgraph depgraph.json --target-dir target/.lake/build --submit-dir .lake/build --out safeverify_report.json
+
+Module pairs are compared --jobs at a time by checker_runtime.py. With
+--cache FILE, a pair of .olean files that was compared before is not
+compared again.
 """
 
-import json
-import subprocess
-import shlex
 import argparse
+import os
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+from depgraph_core import DepGraph
+from log_store import summarize
+from checker_runtime import (CheckerAdapter, CheckerRuntime, CheckResult, add_runtime_arguments, describe_timeout,
+                             file_digest, runtime_from_args, unified_report, write_report)
+
 def find_olean_file(module: str, build_dir: Path) -> Optional[Path]:
     """Find .olean file for a module in build directory."""
     # Convert module name to path: My.Module -> My/Module.olean
@@ -37,21 +44,35 @@ def find_olean_file(module: str, build_dir: Path) -> Optional[Path]:
     
     return None
 
-def run_safeverify(target_olean: Path, submit_olean: Path, cwd: Path = Path.cwd()) -> Dict[str, Any]:
-    """Run SafeVerify on a pair of .olean files."""
-    cmd = ["lake", "exe", "safe_verify", str(target_olean), str(submit_olean)]
-    
-    try:
-        p = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=60,
-            cwd=cwd
-        )
-        
-        ok = (p.returncode == 0)
-        
+class SafeVerifyAdapter(CheckerAdapter):
+    """Runs SafeVerify on a pair of .olean files; items are (module, target_olean, submit_olean)."""
+
+    tool = "safeverify"
+    executable = "safe_verify"
+    timeout = 60
+    output_limit = 8000
+
+    def command(self, item) -> List[str]:
+        module, target_olean, submit_olean = item
+        return ["lake", "exe", "safe_verify", str(target_olean), str(submit_olean)]
+
+    def cache_key(self, item) -> Optional[str]:
+        module, target_olean, submit_olean = item
+        return f"{file_digest(target_olean)}:{file_digest(submit_olean)}"
+
+    def parse(self, item, p: CheckResult) -> Dict[str, Any]:
+        if p.timed_out or p.error is not None:
+            return {
+                "ok": False,
+                "checks_failed": ["timeout"] if p.timed_out else ["error"],
+                "cmd": p.command,
+                "stdout": "",
+                "stderr": f"TIMEOUT: SafeVerify took longer than {describe_timeout(self.timeout)}"
+                          if p.timed_out else f"ERROR: {p.error}",
+                "returncode": -1,
+                "log": p.logs
+            }
+
         # Parse SafeVerify output for specific failures
         checks_failed = []
         stdout = p.stdout.lower()
@@ -70,138 +91,123 @@ def run_safeverify(target_olean: Path, submit_olean: Path, cwd: Path = Path.cwd(
             checks_failed.append("sorry")
         
         return {
-            "ok": ok,
+            "ok": p.ok,
             "checks_failed": checks_failed,
-            "cmd": " ".join(shlex.quote(c) for c in cmd),
-            "stdout": p.stdout[-8000:] if p.stdout else "",
-            "stderr": p.stderr[-8000:] if p.stderr else "",
-            "returncode": p.returncode
-        }
-    except subprocess.TimeoutExpired:
-        return {
-            "ok": False,
-            "checks_failed": ["timeout"],
-            "cmd": " ".join(shlex.quote(c) for c in cmd),
-            "stdout": "",
-            "stderr": "TIMEOUT: SafeVerify took longer than 60 seconds",
-            "returncode": -1
-        }
-    except Exception as e:
-        return {
-            "ok": False,
-            "checks_failed": ["error"],
-            "cmd": " ".join(shlex.quote(c) for c in cmd),
-            "stdout": "",
-            "stderr": f"ERROR: {str(e)}",
-            "returncode": -1
+            "cmd": p.command,
+            "stdout": p.stdout,
+            "stderr": p.stderr,
+            "returncode": p.returncode,
+            "log": {} if p.ok else p.logs  # passing modules' logs are not kept
         }
 
 def process_changed_modules(
-    depgraph: Dict[str, Any],
+    graph: DepGraph,
     target_build_dir: Path,
     submit_build_dir: Path,
-    cwd: Path
+    runtime: CheckerRuntime
 ) -> List[Dict[str, Any]]:
     """
     Process modules and run SafeVerify for each.
     
     Returns list of declaration-level verification reports.
     """
-    # Group declarations by module
-    by_module = {}
-    for node in depgraph.get("nodes", []):
-        module = node.get("module")
-        if module:
-            by_module.setdefault(module, []).append(node)
-    
-    reports = []
-    modules_checked = 0
-    modules_passed = 0
+    rows_by_module: Dict[str, List[Dict[str, Any]]] = {}
+    pairs = []
     
-    for module, nodes in sorted(by_module.items()):
-        print(f"  Checking {module}...", end=" ", flush=True)
+    for module, node_ids in sorted(graph.by_module.items()):
+        if not module:
+            continue
         
         # Find .olean files
         target_olean = find_olean_file(module, target_build_dir)
         submit_olean = find_olean_file(module, submit_build_dir)
         
         if not target_olean:
-            print(f"⚠ target .olean not found")
-            for node in nodes:
-                reports.append({
-                    "decl": node["name"],
-                    "module": module,
-                    "tool": "safeverify",
-                    "zone": node.get("zone", "unknown"),
-                    "ok": False,
-                    "checks": ["missing-target"],
-                    "error": f"Target .olean not found in {target_build_dir}",
-                    "cmd": "",
-                    "exit": -1
-                })
+            print(f"  ⚠ {module}: target .olean not found")
+            rows_by_module[module] = [{
+                "decl": graph.short_names[v],
+                "module": module,
+                "tool": "safeverify",
+                "zone": graph.extra(v).get("zone", "unknown"),
+                "ok": False,
+                "checks": ["missing-target"],
+                "error": f"Target .olean not found in {target_build_dir}",
+                "cmd": "",
+                "exit": -1
+            } for v in node_ids]
             continue
         
         if not submit_olean:
-            print(f"⚠ submission .olean not found")
-            for node in nodes:
-                reports.append({
-                    "decl": node["name"],
-                    "module": module,
-                    "tool": "safeverify",
-                    "zone": node.get("zone", "unknown"),
-                    "ok": False,
-                    "checks": ["missing-submission"],
-                    "error": f"Submission .olean not found in {submit_build_dir}",
-                    "cmd": "",
-                    "exit": -1
-                })
+            print(f"  ⚠ {module}: submission .olean not found")
+            rows_by_module[module] = [{
+                "decl": graph.short_names[v],
+                "module": module,
+                "tool": "safeverify",
+                "zone": graph.extra(v).get("zone", "unknown"),
+                "ok": False,
+                "checks": ["missing-submission"],
+                "error": f"Submission .olean not found in {submit_build_dir}",
+                "cmd": "",
+                "exit": -1
+            } for v in node_ids]
             continue
         
-        # Run SafeVerify
-        result = run_safeverify(target_olean, submit_olean, cwd)
-        modules_checked += 1
-        
+        pairs.append((module, target_olean, submit_olean))
+    
+    # Run SafeVerify, --jobs modules at a time
+    def on_result(item, result):
+        print(f"  {'✓' if result['ok'] else '✗'} {item[0]}", flush=True)
+    
+    results = runtime.run(pairs, on_result)
+    print(f"  {runtime.describe()}")
+    
+    for (module, _, _), result in zip(pairs, results):
+        node_ids = graph.by_module[module]
         if result["ok"]:
-            modules_passed += 1
-            print("✓")
             # All declarations in module pass
-            for node in nodes:
-                reports.append({
-                    "decl": node["name"],
-                    "module": module,
-                    "tool": "safeverify",
-                    "zone": node.get("zone", "unknown"),
-                    "ok": True,
-                    "checks": ["ref-impl-match"],
-                    "notes": "Reference and implementation match",
-                    "cmd": result["cmd"],
-                    "exit": 0
-                })
+            rows_by_module[module] = [{
+                "decl": graph.short_names[v],
+                "module": module,
+                "tool": "safeverify",
+                "zone": graph.extra(v).get("zone", "unknown"),
+                "ok": True,
+                "checks": ["ref-impl-match"],
+                "notes": "Reference and implementation match",
+                "cmd": result["cmd"],
+                "exit": 0
+            } for v in node_ids]
         else:
-            print("✗")
             # Module failed - apply to all declarations
-            error_msg = result["stderr"] or "SafeVerify verification failed"
             checks = result["checks_failed"] or ["unknown-failure"]
+            if result.get("log"):
+                # The output is in the log store: every declaration of the module shares one reference
+                error_msg = summarize(result["stderr"]) or "SafeVerify verification failed"
+                details = {"log": result["log"]}
+            else:
+                error_msg = result["stderr"] or "SafeVerify verification failed"
+                details = {"notes": result["stdout"][:500] if result["stdout"] else ""}
+            output = result["stdout"] + result["stderr"]
             
-            for node in nodes:
+            rows = []
+            for v in node_ids:
                 # Check if this specific declaration is mentioned in output
-                output = result["stdout"] + result["stderr"]
-                decl_mentioned = node["name"] in output
+                decl_mentioned = graph.short_names[v] in output
                 
-                reports.append({
-                    "decl": node["name"],
+                rows.append({
+                    "decl": graph.short_names[v],
                     "module": module,
                     "tool": "safeverify",
-                    "zone": node.get("zone", "unknown"),
+                    "zone": graph.extra(v).get("zone", "unknown"),
                     "ok": False,
                     "checks": checks,
                     "error": error_msg if decl_mentioned else f"Module {module} verification failed: {', '.join(checks)}",
-                    "notes": result["stdout"][:500] if result["stdout"] else "",
+                    **details,
                     "cmd": result["cmd"],
                     "exit": result["returncode"]
                 })
+            rows_by_module[module] = rows
     
-    return reports
+    return [row for module in sorted(rows_by_module) for row in rows_by_module[module]]
 
 def main():
     parser = argparse.ArgumentParser(description="Run SafeVerify on changed modules")
@@ -210,6 +216,7 @@ def main():
     parser.add_argument("--submit-dir", required=True, help="Build directory for submission/implementation (.lake/build)")
     parser.add_argument("--out", required=True, help="Output report JSON path")
     parser.add_argument("--cwd", help="Working directory for lake commands", default=".")
+    add_runtime_arguments(parser, "safeverify", jobs=os.cpu_count() or 4, timeout=SafeVerifyAdapter.timeout)
     
     args = parser.parse_args()
     
@@ -226,33 +233,20 @@ def main():
         return 1
     
     # Load dependency graph
-    with open(args.depgraph) as f:
-        depgraph = json.load(f)
+    # Prefers the binary sidecar (depgraph_sidecar.py) when it is present and fresh
+    graph = DepGraph.load(args.depgraph)
     
     print(f"Running SafeVerify on modules...")
     print(f"  Target: {target_build}")
     print(f"  Submit: {submit_build}")
     
     # Process modules
-    reports = process_changed_modules(depgraph, target_build, submit_build, cwd)
+    runtime = runtime_from_args(SafeVerifyAdapter(cwd), args, Path(args.out))
+    reports = process_changed_modules(graph, target_build, submit_build, runtime)
     
     # Write output
-    output = {
-        "tool": "safeverify",
-        "version": "0.1.0",
-        "timestamp": subprocess.run(["date", "-Iseconds"], capture_output=True, text=True).stdout.strip(),
-        "target_dir": str(target_build),
-        "submit_dir": str(submit_build),
-        "declarations": reports,
-        "summary": {
-            "total": len(reports),
-            "passed": sum(1 for r in reports if r["ok"]),
-            "failed": sum(1 for r in reports if not r["ok"])
-        }
-    }
-    
-    with open(args.out, "w") as f:
-        json.dump(output, f, indent=2)
+    output = unified_report("safeverify", reports, target_dir=str(target_build), submit_dir=str(submit_build))
+    write_report(output, args.out, runtime.log_store)
     
     print(f"\n✓ Report written to {args.out}")
     print(f"  Declarations: {output['summary']['passed']}/{output['summary']['total']} passed")
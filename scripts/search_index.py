@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Prebuilt search index for the viewer.
+
+Typing in the viewer's search box matches declarations whose full name or
+module contains the text. Instead of scanning every name, the viewer looks up
+the trigrams (3-character substrings) of the query in this index, intersects
+their posting lists, and checks only the remaining candidates. Filters by zone,
+by failing tool and by failing check use precomputed ID lists as well, and the
+table's default failures-first order comes precomputed so it needs no sort.
+Pages without this index get that order from a counting pass in the viewer.
+
+    {
+        "format": "leandepviz-search-index",
+        "version": 1,
+        "nodeCount": 1129,
+        "trigrams": ["abc", "abd", ...],     # lowercased, code points
+        "offsets": "...",                    # base64 uint32: byte range of each trigram's postings
+        "postings": "...",                   # base64 varint deltas of ascending node IDs
+        "facets": {
+            "zone":  {"Core": "...", ...},   # base64 uint32 node IDs per zone
+            "tool":  {"paranoia": "...", ...},          # nodes failing that tool
+            "check": {"disallowed-axioms": "...", ...}  # nodes failing that check
+        },
+        "failuresFirst": "..."               # base64 uint32 node IDs: failed, unchecked, passed
+    }
+
+Node IDs are positions in the depgraph's node list (as in graph_index.py).
+Queries shorter than three characters are answered by scanning. Within each
+group of "failuresFirst" nodes keep their graph order, like the viewer's
+stable sort; report rows are matched to nodes by exact name, as in the viewer.
+
+embed_data.py embeds this index with --search-index; bundles (--bundle) include
+it by default, unless --no-search-index is given.
+
+Usage:
+    python scripts/search_index.py depgraph.json [--report report.json] --out search-index.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from compact_report import load_report
+from depgraph_core import DepGraph
+from graph_index import encode_array
+
+FORMAT_NAME = "leandepviz-search-index"
+FORMAT_VERSION = 1
+
+
+def search_text(full_name: str, module: str) -> str:
+    """What a query is matched against (the viewer builds the same string)."""
+    return f"{full_name}\n{module}".lower()
+
+
+def trigrams(text: str) -> Iterable[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def encode_postings(ids: List[int], out: bytearray) -> None:
+    """Append ascending IDs as LEB128 varints of the gaps between them."""
+    prev = 0
+    for v in ids:
+        gap = v - prev
+        prev = v
+        while gap >= 0x80:
+            out.append(gap & 0x7F | 0x80)
+            gap >>= 7
+        out.append(gap)
+
+
+def report_facets(graph: DepGraph, report: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, List[int]]]:
+    """Node IDs per zone, per failing tool and per failing check."""
+    facets: Dict[str, Dict[str, List[int]]] = {"zone": {}, "tool": {}, "check": {}}
+    if not report:
+        return facets
+    default_tool = report.get("tool", "paranoia" if "results" in report else "checker")
+    for row in report.get("declarations", report.get("results", [])):
+        v = graph.id_of(row.get("decl", ""))
+        if v is None or v >= graph.node_count:
+            continue
+        if row.get("zone"):
+            facets["zone"].setdefault(row["zone"], []).append(v)
+        if "tools" in row:
+            failing = [(tool, data) for tool, data in row["tools"].items() if data and not data.get("ok")]
+        else:
+            failing = [] if row.get("ok") else [(row.get("tool", default_tool), row)]
+        for tool, data in failing:
+            facets["tool"].setdefault(tool, []).append(v)
+            for check in data.get("checks") or []:
+                facets["check"].setdefault(check, []).append(v)
+    return facets
+
+
+def failures_first(graph: DepGraph, report: Optional[Dict[str, Any]]) -> array:
+    """Node IDs in the viewer's default table order: failed, then unchecked, then passed."""
+    ok_of: Dict[str, bool] = {}
+    if report:
+        for row in report.get("declarations", report.get("results", [])):
+            ok_of[row.get("decl", "")] = bool(row.get("ok"))
+    rank = bytearray(graph.node_count)
+    for v in range(graph.node_count):
+        ok = ok_of.get(graph.full_names[v])
+        rank[v] = 1 if ok is None else 2 if ok else 0
+    return array("I", sorted(range(graph.node_count), key=rank.__getitem__))
+
+
+def trigram_postings(graph: DepGraph) -> Dict[str, List[int]]:
+    """Trigram -> ascending IDs of the nodes whose search text contains it."""
+    postings: Dict[str, List[int]] = {}
+    for v in range(graph.node_count):
+        for gram in trigrams(search_text(graph.full_names[v], graph.module(v))):
+            postings.setdefault(gram, []).append(v)
+    return postings
+
+
+def build_search_index(graph: DepGraph, report: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Index of `graph` (and optionally a report) in the format described in the module docstring."""
+    postings = trigram_postings(graph)
+    keys = sorted(postings)
+    data = bytearray()
+    offsets = array("I", [0])
+    for gram in keys:
+        encode_postings(postings[gram], data)
+        offsets.append(len(data))
+
+    facets = {
+        name: {value: encode_array(array("I", sorted(set(ids)))) for value, ids in sorted(groups.items())}
+        for name, groups in report_facets(graph, report).items()
+    }
+    return {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "nodeCount": graph.node_count,
+        "trigrams": keys,
+        "offsets": encode_array(offsets),
+        "postings": encode_array(array("B", data)),
+        "facets": facets,
+        "failuresFirst": encode_array(failures_first(graph, report)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the viewer's search index")
+    parser.add_argument("depgraph", help="Path to dependency graph JSON")
+    parser.add_argument("--report", help="Report for the zone/tool/check filters (plain or compact)")
+    parser.add_argument("--out", required=True, help="Output index JSON path")
+
+    args = parser.parse_args()
+
+    depgraph_path = Path(args.depgraph)
+    if not depgraph_path.exists():
+        print(f"Error: Dependency graph not found: {depgraph_path}", file=sys.stderr)
+        return 1
+    if args.report and not Path(args.report).exists():
+        print(f"Error: Report not found: {args.report}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    graph = DepGraph.load(depgraph_path)
+    report = load_report(Path(args.report)) if args.report else None
+    index = build_search_index(graph, report)
+    with open(args.out, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+    print(f"✓ Search index written to {args.out} ({Path(args.out).stat().st_size / 1024:.1f}KB)")
+    print(f"  {graph.node_count} declarations, {len(index['trigrams'])} trigrams")
+    for name, groups in index["facets"].items():
+        if groups:
+            print(f"  {name}: {', '.join(groups)}")
+    print(f"  Time: {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
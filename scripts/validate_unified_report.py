@@ -19,6 +19,9 @@ import sys
 from pathlib import Path
 from typing import Dict, List, Any, Set
 
+from compact_report import load_report
+from log_store import REF_PATTERN
+
 
 class ValidationError(Exception):
     """Raised when validation fails."""
@@ -167,6 +170,16 @@ def validate_declarations(data: Dict[str, Any]) -> None:
                 raise ValidationError(
                     f"Declaration '{decl_name}' tool '{tool_name}' missing 'checks' field"
                 )
+            log = tool_result.get("log")
+            if log is not None:
+                if not isinstance(log, dict) or not all(isinstance(r, str) and REF_PATTERN.match(r) for r in log.values()):
+                    raise ValidationError(
+                        f"Declaration '{decl_name}' tool '{tool_name}' log must map streams to log store references"
+                    )
+                if tool_name not in data.get("log_stores", {}):
+                    raise ValidationError(
+                        f"Declaration '{decl_name}' tool '{tool_name}' has a log but the report has no log store for it"
+                    )
 
         # Validate summary
         decl_summary = decl["summary"]
@@ -336,7 +349,7 @@ def main():
     parser.add_argument(
         "--report",
         required=True,
-        help="Path to unified report JSON file"
+        help="Path to unified report JSON file (plain or compact, optionally .gz/.zst)"
     )
     parser.add_argument(
         "--expect-tests",
@@ -353,11 +366,13 @@ def main():
         return 1
 
     try:
-        with open(report_path) as f:
-            data = json.load(f)
+        data = load_report(report_path)
     except json.JSONDecodeError as e:
         print(f"ERROR: Invalid JSON in report: {e}", file=sys.stderr)
         return 1
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"ERROR: Could not read report: {e}", file=sys.stderr)
+        return 1
 
     print(f"Validating: {report_path}")
     print()
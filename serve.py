@@ -1,51 +1,432 @@
 #!/usr/bin/env python3
 """
-Simple HTTP server for testing LeanDepViz locally
+HTTP server for LeanDepViz reports
+
+Serves a directory (the repository by default) with one thread per
+connection, so a slow download does not hold up other clients, and:
+
+- sends brotli or gzip variants of text files to clients that accept them:
+  FILE.br / FILE.gz next to FILE when it is up to date, otherwise a variant
+  compressed on first request and kept in --cache-dir (brotli needs
+  `pip install brotli`; without it only existing .br files are served)
+- tags every response with a strong ETag (a hash of the bytes sent) and
+  answers If-None-Match / If-Modified-Since with 304 Not Modified
+- supports single byte ranges (Range / If-Range, 206 and 416)
+
+With --api DEPGRAPH [--report REPORT] it also loads the graph and report once
+and answers JSON queries under /api/ (subgraphs, pages of table rows,
+declaration details, search; see scripts/report_api.py), caching the
+responses in an LRU of --api-cache entries.
+
+With --journal JOURNAL it streams a result journal written during a run
+(paranoia_runner.py --journal, see scripts/result_journal.py) as Server-Sent
+Events at /events. Each event carries every line appended since the previous
+one, as a JSON array, so a client that falls behind gets fewer, larger events
+and nothing queues up on the server. The event ID is the run and byte offset,
+so a reconnecting EventSource resumes where it stopped. Open a report with
+?live in its URL to have the viewer follow the run.
 
 Usage:
-    python serve.py [port]
+    python serve.py [port] [--directory DIR] [--bind ADDRESS] [--cache-dir DIR] [--no-compress]
+                    [--api DEPGRAPH [--report REPORT] [--api-cache N]] [--journal JOURNAL]
 
 Default port: 8000
 
 Then open: http://localhost:8000/docs/
 """
 
+import argparse
+import email.utils
+import gzip
+import hashlib
 import http.server
-import socketserver
+import io
+import os
+import re
 import sys
+import threading
+import time
+from collections import OrderedDict
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
-# Default port
-PORT = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Serve from repo root
 DIRECTORY = Path(__file__).parent
+DEFAULT_CACHE_DIR = ".serve-cache"
+
+COMPRESSIBLE = {".html", ".htm", ".js", ".mjs", ".css", ".json", ".svg", ".dot", ".txt", ".md", ".xml", ".csv", ".map"}
+MIN_COMPRESS_SIZE = 1024
+COPY_CHUNK = 1 << 16
+ETAG_CACHE_SIZE = 4096  # file versions whose ETag is remembered
+RANGE = re.compile(r"bytes=(\d*)-(\d*)$")
+
+# Suffix of the precompressed file for each content coding, in order of preference
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]
+
+# Result journal streaming (/events)
+JOURNAL_POLL = 0.25  # seconds between looks at the journal
+JOURNAL_HEARTBEAT = 15  # seconds of silence before a keep-alive comment
+MAX_EVENT_BYTES = 1 << 20  # journal bytes per event
+
+
+def accepted_encodings(header: Optional[str]) -> List[str]:
+    """Content codings an Accept-Encoding header allows (q > 0)."""
+    accepted = []
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        q = re.search(r"q=([\d.]+)", params)
+        if name and not (q and float(q.group(1)) == 0):
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+def compress_file(source: Path, target: Path, encoding: str) -> None:
+    """Write an encoded copy of `source` to `target` atomically."""
+    data = source.read_bytes()
+    data = brotli.compress(data, quality=9) if encoding == "br" else gzip.compress(data, compresslevel=9, mtime=0)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+
+
+class ReportRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static files with precompressed variants, ETags and byte ranges."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive; every response has a Content-Length
+    cache_dir: Optional[Path] = Path(DEFAULT_CACHE_DIR)
+    api = None  # report_api.ReportAPI answering /api/ requests, if enabled
+    journal: Optional[Path] = None  # result journal streamed at /events, if enabled
+    extensions_map = {
+        **http.server.SimpleHTTPRequestHandler.extensions_map,
+        ".dot": "text/vnd.graphviz",
+        ".json": "application/json",
+        ".md": "text/markdown",
+    }
+
+    # (path, size, mtime) -> ETag, least recently used first; shared by all handler threads
+    _etags: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+    _etags_guard = threading.Lock()
+    # Cache file -> lock while it is being compressed
+    _locks: Dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
 
-class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, directory=str(DIRECTORY), **kwargs)
-    
+
     def end_headers(self):
         # Add CORS headers for local development
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', '*')
+        self.send_header('Access-Control-Expose-Headers', 'ETag, Content-Range, Content-Encoding')
         super().end_headers()
 
-with socketserver.TCPServer(("", PORT), MyHTTPRequestHandler) as httpd:
-    print(f"✨ LeanDepViz Server")
-    print(f"📡 Serving at: http://localhost:{PORT}/")
-    print(f"📂 Directory: {DIRECTORY}")
-    print(f"")
-    print(f"📄 Available pages:")
-    print(f"   http://localhost:{PORT}/docs/index.html")
-    print(f"   http://localhost:{PORT}/docs/example-exchangeability.html")
-    print(f"   http://localhost:{PORT}/docs/leanparanoia-test-demo.html")
-    print(f"   http://localhost:{PORT}/docs/leanparanoia-examples-all.html")
-    print(f"")
-    print(f"Press Ctrl+C to stop")
-    try:
-        httpd.serve_forever()
-    except KeyboardInterrupt:
-        print(f"\n👋 Server stopped")
-        sys.exit(0)
+    def send_head(self):
+        if self.api is not None and self.path.startswith("/api/"):
+            return self.send_api()
+        if self.journal is not None and self.path.split("?", 1)[0] == "/events":
+            return self.send_events()
+        path = Path(self.translate_path(self.path))
+        if path.is_dir():
+            if not self.path.split("?", 1)[0].split("#", 1)[0].endswith("/"):
+                return super().send_head()  # redirect to the slash URL
+            index = next((path / name for name in ("index.html", "index.htm") if (path / name).is_file()), None)
+            if index is None:
+                return super().send_head()  # directory listing
+            path = index
+        if not path.is_file() or self.path.split("?", 1)[0].endswith("/"):
+            return super().send_head()  # 404
+
+        source_stat = path.stat()
+        variant, encoding = self.select_variant(path, source_stat)
+        try:
+            f = open(variant, "rb")
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        size = os.fstat(f.fileno()).st_size
+        etag = self.etag(variant, encoding)
+        last_modified = self.date_time_string(int(source_stat.st_mtime))
+
+        if self.not_modified(etag, source_stat.st_mtime):
+            f.close()
+            self.send_response(304)
+            self.send_validators(etag, last_modified, path)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        start, end = 0, size - 1
+        byte_range = self.requested_range(etag, size)
+        if byte_range == "unsatisfiable":
+            f.close()
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        if byte_range:
+            start, end = byte_range
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", self.guess_type(str(path)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_validators(etag, last_modified, path)
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        f.seek(start)
+        self.remaining = end - start + 1
+        return f
+
+    def send_api(self):
+        response = self.api.get(self.path)
+        body, etag = response.body, response.etag
+        gzipped = len(body) >= MIN_COMPRESS_SIZE and "gzip" in accepted_encodings(self.headers.get("Accept-Encoding"))
+        if gzipped:
+            body, etag = response.gzipped, f'{etag[:-1]}-gzip"'
+        if response.status == 200 and self.not_modified(etag, 0):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        if gzipped:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.remaining = len(body)
+        return io.BytesIO(body)
+
+    def send_events(self):
+        """Stream the result journal as Server-Sent Events until the client goes away."""
+        from result_journal import journal_run, read_lines
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")  # no buffering in nginx and similar proxies
+        self.send_header("Connection", "close")  # the stream has no length
+        self.end_headers()
+        self.close_connection = True
+        if self.command != "GET":
+            return None
+
+        # Resume from "run:offset" if the client was following this run
+        run, _, offset = (self.headers.get("Last-Event-ID") or "").partition(":")
+        offset = int(offset) if offset.isdigit() else 0
+        seen_size = None
+        quiet_since = time.monotonic()
+        try:
+            self.wfile.write(b"retry: 2000\n\n")
+            while True:
+                try:
+                    size = self.journal.stat().st_size
+                except FileNotFoundError:
+                    size = None
+                if size is not None and size != seen_size:
+                    seen_size = size
+                    current = journal_run(self.journal)
+                    if current != run or size < offset:
+                        run, offset = current, 0  # a new run replaced the journal
+                    lines, offset = read_lines(self.journal, offset, MAX_EVENT_BYTES) if size > offset else ([], offset)
+                    if lines:
+                        data = b"[" + b",".join(line for line in lines if line.strip()) + b"]"
+                        self.wfile.write(f"id: {run or ''}:{offset}\ndata: ".encode() + data + b"\n\n")
+                        self.wfile.flush()
+                        quiet_since = time.monotonic()
+                        if offset < size:
+                            seen_size = None  # more to send: read again without waiting
+                            continue
+                if time.monotonic() - quiet_since > JOURNAL_HEARTBEAT:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    quiet_since = time.monotonic()
+                time.sleep(JOURNAL_POLL)
+        except (BrokenPipeError, ConnectionResetError):
+            return None
+
+    def copyfile(self, source, outputfile):
+        # Send only the selected range of the file
+        while self.remaining > 0:
+            chunk = source.read(min(COPY_CHUNK, self.remaining))
+            if not chunk:
+                break
+            outputfile.write(chunk)
+            self.remaining -= len(chunk)
+
+    def send_validators(self, etag: str, last_modified: str, path: Path) -> None:
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", last_modified)
+        self.send_header("Cache-Control", "no-cache")  # revalidate, usually with a cheap 304
+        self.send_header("Accept-Ranges", "bytes")
+        if path.suffix in COMPRESSIBLE:
+            self.send_header("Vary", "Accept-Encoding")
+
+    def select_variant(self, path: Path, source_stat: os.stat_result) -> Tuple[Path, Optional[str]]:
+        """The file to send for `path`: a precompressed variant if the client accepts one."""
+        if path.suffix not in COMPRESSIBLE or source_stat.st_size < MIN_COMPRESS_SIZE:
+            return path, None
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding"))
+        for encoding, suffix in ENCODINGS:
+            if encoding not in accepted:
+                continue
+            sibling = path.with_name(path.name + suffix)
+            if sibling.is_file() and sibling.stat().st_mtime >= source_stat.st_mtime:
+                return sibling, encoding
+            if self.cache_dir is None or (encoding == "br" and brotli is None):
+                continue
+            key = hashlib.sha256(f"{path.resolve()}\0{source_stat.st_size}\0{source_stat.st_mtime_ns}".encode()).hexdigest()
+            cached = self.cache_dir / f"{key}{suffix}"
+            if not cached.exists():
+                with self.lock_for(str(cached)):
+                    if not cached.exists():
+                        self.cache_dir.mkdir(parents=True, exist_ok=True)
+                        compress_file(path, cached, encoding)
+                    self.drop_lock(str(cached))  # later requests find the file
+            return cached, encoding
+        return path, None
+
+    @classmethod
+    def lock_for(cls, key: str) -> threading.Lock:
+        """One lock per cache file, so concurrent first requests compress it once."""
+        with cls._locks_guard:
+            return cls._locks.setdefault(key, threading.Lock())
+
+    @classmethod
+    def drop_lock(cls, key: str) -> None:
+        with cls._locks_guard:
+            cls._locks.pop(key, None)
+
+    @classmethod
+    def etag(cls, path: Path, encoding: Optional[str]) -> str:
+        """Strong ETag: a hash of the file's bytes, cached (LRU) while size and mtime are unchanged."""
+        st = path.stat()
+        key = (str(path), st.st_size, st.st_mtime_ns)
+        with cls._etags_guard:
+            etag = cls._etags.get(key)
+            if etag is not None:
+                cls._etags.move_to_end(key)
+                return etag
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(COPY_CHUNK), b""):
+                digest.update(chunk)
+        etag = f'"{digest.hexdigest()[:32]}{"-" + encoding if encoding else ""}"'
+        with cls._etags_guard:
+            cls._etags[key] = etag
+            while len(cls._etags) > ETAG_CACHE_SIZE:
+                cls._etags.popitem(last=False)
+        return etag
+
+    def not_modified(self, etag: str, mtime: float) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            # Weak comparison, as for If-None-Match
+            tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+            return "*" in tags or etag in tags
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def requested_range(self, etag: str, size: int):
+        """(first, last) byte of a satisfiable single Range, "unsatisfiable", or None for the whole file."""
+        header = self.headers.get("Range")
+        if not header or self.command != "GET":
+            return None
+        if_range = self.headers.get("If-Range")
+        if if_range and if_range.strip() != etag:
+            return None  # the client's copy is outdated: send everything
+        m = RANGE.match(header.strip())
+        if not m or (not m.group(1) and not m.group(2)):
+            return None  # multiple or malformed ranges: ignore, as RFC 9110 allows
+        if not m.group(1):
+            length = int(m.group(2))
+            if length == 0:
+                return "unsatisfiable"
+            return max(0, size - length), size - 1
+        start = int(m.group(1))
+        end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+        if start >= size or start > end:
+            return "unsatisfiable"
+        return start, end
+
+
+def main():
+    global DIRECTORY
+
+    parser = argparse.ArgumentParser(description="Serve LeanDepViz reports over HTTP")
+    parser.add_argument("port", nargs="?", type=int, default=8000, help="Port (default: 8000)")
+    parser.add_argument("--bind", default="", help="Address to listen on (default: all interfaces)")
+    parser.add_argument("--directory", default=str(DIRECTORY), help="Directory to serve (default: the repository)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help=f"Where compressed variants are kept (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="Do not compress files on request (existing .br/.gz files are still served)")
+    parser.add_argument("--api", metavar="DEPGRAPH", help="Answer /api/ queries about this dependency graph")
+    parser.add_argument("--report", help="Verification report for --api (plain or compact)")
+    parser.add_argument("--api-cache", type=int, default=1024,
+                        help="Number of API responses to keep (default: 1024)")
+    parser.add_argument("--journal", help="Stream this result journal at /events (paranoia_runner.py --journal)")
+
+    args = parser.parse_args()
+    DIRECTORY = Path(args.directory)
+    ReportRequestHandler.cache_dir = None if args.no_compress else Path(args.cache_dir)
+    if args.report and not args.api:
+        parser.error("--report needs --api")
+    for path in (args.api, args.report):
+        if path and not Path(path).exists():
+            parser.error(f"File not found: {path}")
+    if args.api or args.journal:
+        sys.path.insert(0, str(Path(__file__).parent / "scripts"))
+    if args.journal:
+        ReportRequestHandler.journal = Path(args.journal).resolve()
+    if args.api:
+        from report_api import ReportAPI
+        ReportRequestHandler.api = ReportAPI.load(Path(args.api), Path(args.report) if args.report else None,
+                                                  cache_size=args.api_cache)
+
+    with http.server.ThreadingHTTPServer((args.bind, args.port), ReportRequestHandler) as httpd:
+        port = httpd.server_address[1]
+        print(f"✨ LeanDepViz Server")
+        print(f"📡 Serving at: http://localhost:{port}/")
+        print(f"📂 Directory: {DIRECTORY}")
+        print(f"🗜  Compression: {'off' if args.no_compress else 'gzip' + (', brotli' if brotli else '')}")
+        if args.api:
+            print(f"🔎 API: http://localhost:{port}/api/summary ({args.api}{', ' + args.report if args.report else ''})")
+        if args.journal:
+            print(f"📺 Live results: http://localhost:{port}/events ({args.journal}); add ?live to a report's URL")
+        print(f"")
+        print(f"📄 Available pages:")
+        print(f"   http://localhost:{port}/docs/index.html")
+        print(f"   http://localhost:{port}/docs/example-exchangeability.html")
+        print(f"   http://localhost:{port}/docs/leanparanoia-test-demo.html")
+        print(f"   http://localhost:{port}/docs/leanparanoia-examples-all.html")
+        print(f"")
+        print(f"Press Ctrl+C to stop")
+        try:
+            httpd.serve_forever()
+        except KeyboardInterrupt:
+            print(f"\n👋 Server stopped")
+            sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""DepGraph.load must read the same graph with and without the binary sidecar."""
+
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from depgraph_core import DepGraph  # noqa: E402
+from depgraph_sidecar import open_sidecar, write_sidecar  # noqa: E402
+
+EXAMPLES = sorted(ROOT.glob("examples/**/*depgraph*.json"))
+
+
+def snapshot(graph: DepGraph):
+    return {
+        "nodes": [graph.node(v) for v in range(graph.node_count)],
+        "edges": sorted((e["source"], e["target"], e["kind"]) for e in graph.edges()),
+        "modules": {m: list(vs) for m, vs in graph.by_module.items()},
+        "kinds": {k: list(vs) for k, vs in graph.by_kind.items()},
+        "vertices": [graph.full_names[v] for v in range(graph.vertex_count)],
+    }
+
+
+def load_both(path: Path, tmp_path: Path):
+    copy = tmp_path / path.name
+    shutil.copyfile(path, copy)
+    plain = DepGraph.load(copy)
+    with open(copy) as f:
+        write_sidecar(json.load(f), copy)
+    assert open_sidecar(copy) is not None
+    return plain, DepGraph.load(copy)
+
+
+@pytest.mark.parametrize("path", EXAMPLES, ids=lambda p: str(p.relative_to(ROOT)))
+def test_sidecar_round_trip(path, tmp_path):
+    plain, indexed = load_both(path, tmp_path)
+    assert indexed._sidecar is not None
+    assert snapshot(indexed) == snapshot(plain)
+
+
+def test_null_module_and_kind(tmp_path):
+    path = tmp_path / "src" / "depgraph.json"
+    path.parent.mkdir()
+    path.write_text(json.dumps({
+        "nodes": [
+            {"name": "a", "fullName": "M.a", "module": None, "kind": None},
+            {"name": "b", "fullName": "M.b", "module": "M"},
+        ],
+        "edges": [{"source": "M.a", "target": "M.b", "kind": None}],
+    }))
+    plain, indexed = load_both(path, tmp_path)
+    assert snapshot(indexed) == snapshot(plain)
+    assert plain.kind(0) == plain.kind(1) == plain.module(0) == ""